@@ -0,0 +1,18 @@
+"""Scenarios shared by several test modules."""
+from trafficSim.simulation import Simulation
+
+
+def build_crossing():
+    # Four approaches meeting at the origin; west-east carries most traffic.
+    sim = Simulation()
+    sim.create_roads([
+        ((-100, 0), (0, 0)),    # 0: west approach
+        ((0, 100), (0, 0)),     # 1: south approach
+        ((100, 0), (0, 0)),     # 2: east approach
+        ((0, -100), (0, 0)),    # 3: north approach
+        ((0, 0), (100, 0)),     # 4: east exit
+        ((0, 0), (0, -100)),    # 5: north exit
+    ])
+    sim.create_gen({'vehicle_rate': 40, 'vehicles': [[4, {'path': [0, 4]}], [1, {'path': [1, 5]}]]})
+    sim.create_signal([[0], [1], [2], [3]])
+    return sim
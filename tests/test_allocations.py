@@ -0,0 +1,79 @@
+import gc
+import tracemalloc
+from trafficSim.allocations import AllocationTracker
+from tests.helpers import build_crossing
+
+
+class Hoarder:
+    update_period = 0.1
+
+    def __init__(self):
+        self.kept = []
+
+    def update(self, sim):
+        self.kept.append([sim.t] * 50)
+
+
+class Collector:
+    update_period = 1.0
+
+    def update(self, sim):
+        gc.collect()
+
+
+class TestAllocationTracker:
+    def test_reports_phases_per_tick(self):
+        sim = build_crossing()
+        with AllocationTracker(sim) as tracker:
+            sim.run(120)
+
+        report = tracker.report()
+        assert report['ticks'] == 120
+        assert report['phases']['roads']['calls'] == 120
+        assert report['phases']['hand_off']['calls'] == 120
+        # Generators and signals are only updated when due.
+        assert 0 < report['phases']['generators']['calls'] < 120
+        assert 0 < report['phases']['signals']['calls'] < 120
+        assert report['phases']['roads']['allocated_per_tick'] > 0
+        assert 'draw' not in report['phases']
+
+    def test_stop_restores_the_simulation(self):
+        sim = build_crossing()
+        tracker = AllocationTracker(sim).start()
+        sim.run(10)
+        tracker.stop()
+
+        assert not tracemalloc.is_tracing()
+        assert 'update_roads' not in vars(sim) and 'update' not in vars(sim.generators[0])
+        assert tracker.observe not in sim.observers
+        sim.run(10)
+        assert tracker.ticks == 10
+
+    def test_keeps_outside_tracing(self):
+        tracemalloc.start()
+        try:
+            with AllocationTracker(build_crossing()) as tracker:
+                tracker.sim.run(10)
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+    def test_counts_collections(self):
+        sim = build_crossing()
+        sim.add_component(Collector())
+        with AllocationTracker(sim) as tracker:
+            sim.run(180)
+
+        assert tracker.report()['phases']['components']['collections'] == 3
+
+    def test_finds_growing_lines(self):
+        sim = build_crossing()
+        hoarder = sim.add_component(Hoarder())
+        with AllocationTracker(sim, {'snapshot_interval': 60}) as tracker:
+            sim.run(300)
+
+        assert len(tracker.snapshots) == 6
+        leaks = tracker.leaks()
+        assert leaks[0]['location'].endswith(f'test_allocations.py:{Hoarder.update.__code__.co_firstlineno + 1}')
+        assert leaks[0]['size'] >= 50 * 8 * len(hoarder.kept) // 2
+        assert tracker.top_allocations(1)[0][0] == leaks[0]['location']
@@ -0,0 +1,105 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from trafficSim.analytics import (APPROACHES, FundamentalDiagram, SpaceTimeDiagram, TravelTimes, analyze,
+                                  intersection_report)
+from trafficSim.recorder import Recording, TrajectoryRecorder
+from trafficSim.scenario import load_scenario
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
+from tests.helpers import build_crossing
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+
+def record(sim, path, seconds, **config):
+    with TrajectoryRecorder(sim, {'path': str(path), **config}):
+        sim.run(int(round(seconds / sim.dt)))
+    return Recording(path)
+
+
+def cruise(path, chunk_frames=4):
+    # One vehicle at a constant 10 m/s over two 100 m roads, for 20 s.
+    sim = Simulation()
+    sim.create_roads([((0, 0), (100, 0)), ((100, 0), (200, 0))])
+    vehicle = Vehicle({'vehicle_type': 'car', 'path': [0, 1], 'v': 10.0, 'v_max': 10.0})
+    sim.roads[0].vehicles.append(vehicle)
+    return record(sim, path, 19.9, interval=0.5, chunk_frames=chunk_frames)
+
+
+class TestAnalytics:
+    def test_fundamental_diagram_of_one_vehicle(self, tmp_path):
+        recording = cruise(tmp_path / 'rec')
+        diagram, = analyze(recording, [FundamentalDiagram(recording, {'both': [0, 1]}, interval=10.0)])
+        result = diagram.result()
+
+        # One vehicle on 200 m is 5 vehicles/km; at 36 km/h that is 180 vehicles/h.
+        assert result['t'].tolist() == [0.0, 10.0]
+        assert result['density']['both'] == pytest.approx([5.0, 5.0])
+        assert result['flow']['both'] == pytest.approx([180.0, 180.0])
+        assert result['speed']['both'] == pytest.approx([10.0, 10.0])
+
+    def test_space_time_of_one_vehicle(self, tmp_path):
+        recording = cruise(tmp_path / 'rec')
+        diagram, = analyze(recording, [SpaceTimeDiagram(recording, [[0, 1]], time_bin=5.0, space_bin=50.0)])
+        result = diagram.result()
+
+        # Each 50 m cell takes 5 s: one vehicle on 50 m is 20 vehicles/km.
+        assert result['x'].tolist() == [0.0, 50.0, 100.0, 150.0]
+        assert result['density'] == pytest.approx(20.0 * np.eye(4), abs=0.1)
+        assert np.diag(result['speed']) == pytest.approx([10.0] * 4)
+        assert np.isnan(result['speed'][0, 2])
+
+    def test_chunking_does_not_change_results(self, tmp_path):
+        results = []
+        for chunk_frames in (3, 1000):
+            np.random.seed(0)
+            recording = record(build_crossing(), tmp_path / str(chunk_frames), 60.0, interval=0.5,
+                               chunk_frames=chunk_frames)
+            analyses = analyze(recording, [FundamentalDiagram(recording, {'west': [0], 'exit': [4]}),
+                                           TravelTimes()])
+            results.append((analyses[0].result(), analyses[1].result()))
+
+        (diagram_a, trips_a), (diagram_b, trips_b) = results
+        assert diagram_a['flow']['west'] == pytest.approx(diagram_b['flow']['west'], nan_ok=True)
+        assert diagram_a['density']['exit'] == pytest.approx(diagram_b['density']['exit'], nan_ok=True)
+        assert trips_a['travel_time'] == pytest.approx(trips_b['travel_time'])
+
+    def test_travel_times_match_frames(self, tmp_path):
+        np.random.seed(0)
+        recording = record(build_crossing(), tmp_path / 'rec', 60.0, interval=0.5, chunk_frames=7)
+        trips = analyze(recording, [TravelTimes()])[0].result()
+
+        seen = {}
+        for frame in recording.frames():
+            for vehicle, road in zip(frame['id'].tolist(), frame['road'].tolist(), strict=True):
+                first, _, entry, _ = seen.get(vehicle, (frame['t'], None, road, None))
+                seen[vehicle] = (first, frame['t'], entry, road)
+        start, end = recording.frame(0)['t'], recording.frame(len(recording) - 1)['t']
+        expected = {vehicle: (last - first, entry) for vehicle, (first, last, entry, _) in seen.items()
+                    if start < first and last < end}
+
+        assert trips['id'].tolist() == sorted(expected)
+        assert trips['travel_time'] == pytest.approx([expected[v][0] for v in sorted(expected)])
+        assert trips['entry_road'].tolist() == [expected[v][1] for v in sorted(expected)]
+
+
+class TestIntersectionReport:
+    def test_four_way(self, tmp_path):
+        np.random.seed(0)
+        recording = record(load_scenario(FOUR_WAY).build(), tmp_path / 'rec', 90.0, interval=0.5)
+        report = intersection_report(recording, interval=30.0, space_bin=20.0)
+
+        diagram = report['fundamental_diagram']
+        assert diagram['t'].tolist() == [0.0, 30.0, 60.0]
+        for approach in APPROACHES:
+            assert np.all(diagram['flow'][approach] > 0)
+            assert report['space_time'][approach]['density'].shape[1] == len(report['space_time'][approach]['x'])
+            assert report['travel_times'][approach].sum() > 0
+        assert sum(h.sum() for h in report['travel_times'].values()) == len(report['trips']['id'])
+
+    def test_needs_four_way_names(self, tmp_path):
+        recording = record(build_crossing(), tmp_path / 'rec', 5.0)
+
+        with pytest.raises(ValueError):
+            intersection_report(recording)
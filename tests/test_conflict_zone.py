@@ -0,0 +1,105 @@
+import pytest
+import numpy as np
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
+
+
+def make_crossing():
+    sim = Simulation()
+    sim.create_roads([
+        ((-10, 0), (10, 0)),     # 0: west to east
+        ((0, -10), (0, 10)),     # 1: north to south
+        ((10, 0), (30, 0)),      # 2: continues road 0
+        ((-40, 0), (-10, 0)),    # 3: approach, outside the box
+    ])
+    return sim
+
+
+def place(sim, road_index, x, v, path):
+    vehicle = Vehicle({'vehicle_type': 'car', 'path': path})
+    vehicle.x = x
+    vehicle.v = v
+    sim.roads[road_index].vehicles.append(vehicle)
+    return vehicle
+
+
+class TestConflictZone:
+    def test_roads_inside_bounds(self):
+        sim = make_crossing()
+        zone = sim.create_conflict_zone({'bounds': (-10, -10, 10, 10)})
+
+        assert zone.road_indices == [0, 1]
+
+    def test_later_vehicle_yields(self):
+        sim = make_crossing()
+        zone = sim.create_conflict_zone({'bounds': (-10, -10, 10, 10)})
+        first = place(sim, 0, 5, 5, [0, 2])
+
+        zone.update()
+        sim.t += 1
+        second = place(sim, 1, 5, 5, [1])
+        zone.update()
+
+        assert second.stopped is True
+        assert first.stopped is False
+        assert zone.holding == {second}
+
+    def test_yielding_vehicle_released(self):
+        sim = make_crossing()
+        zone = sim.create_conflict_zone({'bounds': (-10, -10, 10, 10)})
+        first = place(sim, 0, 5, 5, [0, 2])
+        second = place(sim, 1, 5, 5, [1])
+        zone.update()
+        assert second.stopped is True
+
+        first.x = 9.5
+        second.v = 0
+        zone.update()
+
+        assert second.stopped is False
+        assert zone.holding == set()
+
+    def test_following_on_route_is_not_a_conflict(self):
+        sim = Simulation()
+        sim.create_roads([((-10, 0), (0, 0)), ((0, 0), (10, 0))])
+        zone = sim.create_conflict_zone({'bounds': (-10, -10, 10, 10)})
+        place(sim, 1, 0.5, 5, [0, 1])
+        follower = place(sim, 0, 9.0, 5, [0, 1])
+        follower.current_road_index = 0
+
+        zone.update()
+
+        assert zone.holding == set()
+
+    def test_spatial_hash_matches_pairwise_check(self):
+        np.random.seed(3)
+        sim = Simulation()
+        for _ in range(40):
+            angle = np.random.uniform(0, 2 * np.pi)
+            start = (100 * np.cos(angle), 100 * np.sin(angle))
+            sim.create_road(start, (-start[0], -start[1]))
+        zone = sim.create_conflict_zone({'bounds': (-100, -100, 100, 100), 'horizon': 0.0})
+
+        vehicles, slots = [], []
+        for _ in range(1500):
+            slot = np.random.randint(40)
+            vehicle = Vehicle({'vehicle_type': 'car', 'path': [slot]})
+            vehicle.x = np.random.uniform(0, 200)
+            vehicle.v = 0.0
+            vehicles.append(vehicle)
+            slots.append(slot)
+        slots = np.array(slots)
+
+        pairs = set(zone.find_conflicts(vehicles, slots))
+
+        pos = zone._start[slots] + zone._direction[slots] * np.array([v.x for v in vehicles])[:, None]
+        dist = np.hypot(pos[:, None, 0] - pos[None, :, 0], pos[:, None, 1] - pos[None, :, 1])
+        i, j = np.nonzero((dist < zone.clearance) & (slots[:, None] != slots[None, :]))
+        expected = {(a, b) for a, b in zip(i.tolist(), j.tolist(), strict=True) if a < b}
+        assert pairs == expected
+        assert len(pairs) > 0
+
+    def test_cell_smaller_than_clearance_rejected(self):
+        sim = make_crossing()
+        with pytest.raises(ValueError):
+            sim.create_conflict_zone({'cell_size': 1.0, 'clearance': 3.0})
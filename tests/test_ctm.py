@@ -0,0 +1,96 @@
+from pathlib import Path
+import pytest
+from trafficSim.ctm import CellTransmissionModel, TriangularDiagram, calibrate_diagram
+from trafficSim.optimizer import SignalPlan, SignalPlanOptimizer
+from trafficSim.scenario import load_scenario
+from trafficSim.vehicle import Vehicle
+from tests.helpers import build_crossing
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+# The last phase of the default cycle is green for group 0, the busy west approach.
+BUSY = SignalPlan(20.0, ((0.1, 0.1, 0.1, 0.7),))
+STARVED = SignalPlan(20.0, ((0.7, 0.1, 0.1, 0.1),))
+
+
+class TestCalibration:
+    def test_cars(self):
+        diagram = calibrate_diagram([Vehicle({'vehicle_type': 'car'}) for _ in range(30)])
+
+        assert diagram.free_speed == pytest.approx(20.0)
+        assert diagram.jam_density == pytest.approx(1 / 6.0)
+        # About 2 s headway when discharging: below the 1 s time gap at full speed.
+        assert 0.4 < diagram.capacity < 0.6
+        assert diagram.critical_density + diagram.capacity / diagram.wave_speed == pytest.approx(diagram.jam_density)
+
+    def test_needs_vehicles(self):
+        with pytest.raises(ValueError):
+            calibrate_diagram([Vehicle({'vehicle_type': 'car'})] * 3)
+
+
+class TestCellTransmissionModel:
+    def test_conserves_vehicles(self):
+        model = CellTransmissionModel(build_crossing)
+        metrics = model.run(300.0, BUSY)
+
+        # 40 vehicles per minute for 5 minutes.
+        assert metrics['t'] == pytest.approx(300.0)
+        assert metrics['vehicles_passed'] > 100
+        assert (metrics['vehicles_passed'] + metrics['vehicles_present']
+                + metrics['vehicles_waiting']) == pytest.approx(200.0)
+
+    def test_prefers_green_for_busy_approach(self):
+        model = CellTransmissionModel(build_crossing)
+        busy, starved = model.screen([BUSY, STARVED], 300.0, lambda metrics: metrics['vehicles_passed'])
+
+        assert busy > starved
+        assert model.run(300.0, STARVED)['entry_delay'] > model.run(300.0, BUSY)['entry_delay']
+
+    def test_red_holds_traffic(self):
+        model = CellTransmissionModel(build_crossing, {
+            'diagram': TriangularDiagram(free_speed=20.0, capacity=0.5, jam_density=0.15, wave_speed=5.0)})
+        # Group 0 is never green when only the first phases run.
+        plan = SignalPlan(1000.0, ((1.0, 1.0, 1.0, 1.0),))
+
+        assert model.run(100.0, plan)['vehicles_passed'] < 1.0
+
+    def test_entry_delay_of_released_vehicles(self):
+        model = CellTransmissionModel(build_crossing, {
+            'diagram': TriangularDiagram(free_speed=20.0, capacity=0.5, jam_density=0.15, wave_speed=5.0)})
+        plan = SignalPlan(1000.0, ((1.0, 1.0, 1.0, 1.0),))
+        short, long = model.run(300.0, plan), model.run(600.0, plan)
+
+        # Once the entrance is blocked, vehicles only pile up waiting; as in
+        # Simulation.metrics they count once released.
+        assert long['vehicles_waiting'] > short['vehicles_waiting'] > 0
+        assert long['entry_delay'] == pytest.approx(short['entry_delay'])
+        assert isinstance(long['entry_delay'], float)
+
+    def test_four_way_links(self):
+        scenario = load_scenario(FOUR_WAY)
+        model = CellTransmissionModel(scenario)
+        sim = model.sim
+
+        # Junction curves of many segments become a few links.
+        assert len(model.links) == 76 < len(sim.roads)
+        left = sim.road_names['west_left_1']
+        link = model.links[model.link_of_road[left[0]]]
+        assert link == left[:len(link)] and len(link) >= 10
+        assert sorted(road for link in model.links for road in link) == list(range(len(sim.roads)))
+        assert model.run(120.0)['vehicles_passed'] > 0
+
+
+class TestScreening:
+    def test_only_the_best_plans_are_simulated(self):
+        optimizer = SignalPlanOptimizer(build_crossing, {
+            'num_candidates': 3, 'screen_candidates': 12, 'min_horizon': 10.0, 'max_horizon': 30.0,
+            'workers': 1,
+        })
+
+        optimizer.optimize(seed=1)
+
+        rungs = [(entry['rung'], entry['horizon']) for entry in optimizer.history]
+        assert rungs == [(-1, 30.0)] * 12 + [(0, 10.0)] * 3 + [(1, 30.0)]
+        screened = [entry for entry in optimizer.history if entry['rung'] == -1]
+        assert {entry['plan'] for entry in optimizer.history[12:15]} == {entry['plan'] for entry in screened[:3]}
+        assert optimizer.simulated_time == pytest.approx(3 * 10 + 30)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from trafficSim.distributions import sample, validate_distribution
+from trafficSim.scenario import compile_scenario
+from trafficSim.simulation import Simulation
+
+VAN = {
+    'probability': 1, 'length': 4, 'height': 2, 'color': [0, 128, 0], 's0': 3, 'b_max': 6,
+    'T': {'dist': 'lognormal', 'mean': 1.4, 'std': 0.3, 'min': 0.8},
+    'v_max': {'dist': 'uniform', 'low': 12, 'high': 16},
+    'a_max': {'dist': 'normal', 'mean': 3, 'std': 0.3},
+}
+
+
+def make_generator(vehicle_types, vehicles=None):
+    sim = Simulation()
+    sim.create_road((0, 0), (100, 0))
+    return sim.create_gen({'vehicles': vehicles or [(1, {'path': [0]})], 'vehicle_types': vehicle_types,
+                           'sample_block': 64})
+
+
+class TestDistributions:
+    def test_number_is_fixed(self):
+        assert validate_distribution(2) == {'dist': 'fixed', 'value': 2.0}
+        assert sample(validate_distribution(2), 3).tolist() == [2.0, 2.0, 2.0]
+
+    def test_lognormal_matches_mean_and_std(self):
+        np.random.seed(0)
+        values = sample(validate_distribution({'dist': 'lognormal', 'mean': 1.2, 'std': 0.3}), 200000)
+
+        assert values.mean() == pytest.approx(1.2, rel=0.01)
+        assert values.std() == pytest.approx(0.3, rel=0.02)
+
+    def test_clipping(self):
+        values = sample(validate_distribution({'dist': 'normal', 'mean': 0, 'std': 5, 'min': -1, 'max': 1}), 1000)
+
+        assert values.min() == -1 and values.max() == 1
+
+    @pytest.mark.parametrize('spec', [
+        {'dist': 'gamma', 'shape': 2},
+        {'dist': 'normal', 'mean': 1},
+        {'dist': 'uniform', 'low': 2, 'high': 1},
+        {'dist': 'normal', 'mean': 1, 'std': 1, 'sd': 1},
+        {'dist': 'normal', 'mean': 1, 'std': 1, 'min': 2, 'max': 1},
+        'fast',
+    ])
+    def test_invalid(self, spec):
+        with pytest.raises(ValueError):
+            validate_distribution(spec)
+
+
+class TestHeterogeneousDrivers:
+    def test_parameters_differ_per_vehicle(self):
+        generator = make_generator({'van': VAN})
+        vehicles = [generator.generate_vehicle() for _ in range(150)]
+
+        headway = np.array([v.T for v in vehicles])
+        v_max = np.array([v.v_max for v in vehicles])
+        assert len(set(headway.tolist())) > 100
+        assert headway.min() >= 0.8
+        assert v_max.min() >= 12 and v_max.max() <= 16
+        assert all(v.s0 == 3 and v.l == 4 for v in vehicles)
+        assert all(v.sqrt_ab == pytest.approx(2 * np.sqrt(v.a_max * 6)) for v in vehicles)
+
+    def test_seeded_draws_repeat(self):
+        draws = []
+        for _ in range(2):
+            np.random.seed(3)
+            generator = make_generator({'van': VAN})
+            draws.append([generator.generate_vehicle().T for _ in range(5)])
+
+        assert draws[0] == draws[1]
+
+    def test_vehicle_config_overrides_sample(self):
+        generator = make_generator({'van': VAN}, [(1, {'path': [0], 'T': 2.0})])
+
+        assert {generator.generate_vehicle().T for _ in range(10)} == {2.0}
+
+    def test_scenario_reports_bad_distribution(self):
+        data = {
+            'vehicle_types': {'van': {**VAN, 'T': {'dist': 'normal', 'mean': 1.4}}},
+            'network': {'roads': [{'name': 'road', 'from': [0, 0], 'to': [100, 0]}]},
+            'demand': {'vehicles': [{'route': ['road']}]},
+        }
+
+        with pytest.raises(ValueError, match=r"vehicle_types\.van\.T: normal distribution needs 'std'"):
+            compile_scenario(data)
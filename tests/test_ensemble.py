@@ -0,0 +1,78 @@
+import random
+import numpy as np
+import pytest
+from pathlib import Path
+from trafficSim.batch import run_batch, run_headless
+from trafficSim.ensemble import EnsembleSimulation, run_ensemble
+from trafficSim.optimizer import SignalPlan
+from trafficSim.result_cache import ResultCache
+from trafficSim.scenario import load_scenario
+from trafficSim.simulation import Simulation
+from tests.helpers import build_crossing
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+
+class TestEnsembleSimulation:
+    def test_matches_sequential_runs(self):
+        jobs = [(None, 60.0, 0), (SignalPlan(15.0), 60.0, 1), (SignalPlan(25.0), 40.0, 2), (None, 60.0, 0)]
+
+        assert run_ensemble(build_crossing, jobs) == run_batch(build_crossing, jobs, workers=1)
+
+    def test_matches_on_a_multi_segment_network(self):
+        scenario = load_scenario(FOUR_WAY, cache=False)
+        jobs = [(None, 30.0, seed) for seed in (0, 1)]
+
+        assert run_ensemble(scenario, jobs) == [run_headless(scenario, *job) for job in jobs]
+
+    def test_caller_random_state_untouched(self):
+        random.seed(5)
+        np.random.seed(5)
+        expected = (random.random(), np.random.random())
+
+        random.seed(5)
+        np.random.seed(5)
+        ensemble = EnsembleSimulation(build_crossing, [(None, 0), (None, 1)])
+        ensemble.run(50)
+
+        assert (random.random(), np.random.random()) == expected
+
+    def test_retired_member_stops(self):
+        ensemble = EnsembleSimulation(build_crossing, [(None, 0), (None, 1)])
+        ensemble.run(10)
+        ensemble.retire(0)
+        ensemble.run(10)
+
+        assert ensemble.replicas[0].frame_count == 10
+        assert ensemble.replicas[1].frame_count == 20
+
+    def test_rejects_multilane_roads(self):
+        def build():
+            sim = Simulation()
+            sim.create_multilane_road((0, 0), (100, 0), {'num_lanes': 2})
+            return sim
+
+        with pytest.raises(ValueError, match='plain Road'):
+            EnsembleSimulation(build, [(None, 0)])
+
+    def test_rejects_no_members(self):
+        with pytest.raises(ValueError):
+            EnsembleSimulation(build_crossing, [])
+
+    def test_only_runs_uncached_jobs(self, tmp_path, monkeypatch):
+        cache = ResultCache({'path': str(tmp_path / 'results.sqlite')})
+        jobs = [(None, 20.0, 0), (None, 20.0, 1)]
+        first = run_ensemble(build_crossing, jobs[:1], cache=cache)
+        members = []
+        original = EnsembleSimulation.__init__
+
+        def record(self, build, members_):
+            members.extend(members_)
+            original(self, build, members_)
+
+        monkeypatch.setattr(EnsembleSimulation, '__init__', record)
+        results = run_ensemble(build_crossing, jobs, cache=cache)
+        cache.close()
+
+        assert results[0] == first[0]
+        assert members == [(None, 1)]
@@ -0,0 +1,121 @@
+from pathlib import Path
+import random
+import numpy as np
+import pytest
+from trafficSim.equivalence import assert_equivalent, compare_engines, main, reference_engine, trajectory_digest
+from trafficSim.simulation import Simulation
+from tests.helpers import build_crossing
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+
+def tampering_engine(at_tick, tamper):
+    """The reference engine, with ``tamper(sim)`` applied after tick ``at_tick``."""
+    def engine(build, seed):
+        sim, step = reference_engine(build, seed)
+
+        def tampered():
+            step()
+            if sim.frame_count == at_tick:
+                tamper(sim)
+        return sim, tampered
+    return engine
+
+
+def build_meso():
+    sim = Simulation()
+    sim.create_meso_road((0, 0), (300, 0))
+    sim.create_gen({'vehicle_rate': 30, 'vehicles': [[1, {'path': [0]}]]})
+    return sim
+
+
+def delay_queue(sim):
+    road = sim.meso_roads[0]
+    ready, vehicle = road.queue[-1]
+    road.queue[-1] = (ready + 0.5, vehicle)
+
+
+def nudge(sim):
+    vehicle = next(vehicle for road in sim.roads for vehicle in road.vehicles)
+    vehicle.x += 0.5
+    nudge.vehicle = vehicle.id
+    nudge.road = vehicle.path[vehicle.current_road_index]
+
+
+def drop(sim):
+    road = next(road for road in sim.roads if road.vehicles)
+    road.vehicles.pop()
+
+
+class TestCompareEngines:
+    def test_ensemble_reproduces_reference(self):
+        report = assert_equivalent(build_crossing, 'ensemble', ticks=900)
+
+        assert report.reference_digest == report.candidate_digest
+        assert report.ticks_within_tolerance == 900
+        assert report.max_dx <= 1e-9
+
+    def test_pinpoints_first_divergence(self):
+        report = compare_engines(build_crossing, tampering_engine(300, nudge), ticks=600)
+
+        divergence = report.divergence
+        assert divergence.tick == 300 and divergence.t == pytest.approx(5.0)
+        assert divergence.reason == 'position'
+        assert (divergence.vehicle, divergence.road) == (nudge.vehicle, nudge.road)
+        assert divergence.candidate - divergence.reference == pytest.approx(0.5)
+        assert report.first_exceeding_tick == 300
+        assert report.max_dx >= 0.5
+
+    def test_missing_vehicle(self):
+        report = compare_engines(build_crossing, tampering_engine(300, drop), ticks=320, stop_on_divergence=True)
+
+        assert report.ticks == 300
+        assert report.divergence.reason == 'missing'
+        assert (report.divergence.reference, report.divergence.candidate) == (1.0, 0.0)
+        assert report.vehicle_mismatches >= 1
+
+    def test_other_integrator_diverges(self):
+        report = compare_engines(build_crossing, 'heun', ticks=600)
+
+        assert not report.equivalent
+        assert report.divergence.tick <= report.first_exceeding_tick
+        assert 0 < report.rms_dx < report.max_dx
+
+    def test_assert_equivalent_reports_divergence(self):
+        with pytest.raises(AssertionError, match='First divergence at tick 120'):
+            assert_equivalent(build_crossing, tampering_engine(120, nudge), ticks=200)
+
+    def test_meso_queues_are_compared(self):
+        report = compare_engines(build_meso, tampering_engine(300, delay_queue), ticks=400, stop_on_divergence=True)
+
+        assert report.ticks == 300
+        assert report.divergence.reason == 'queue' and report.divergence.road == 0
+        assert report.divergence.candidate - report.divergence.reference == pytest.approx(0.5)
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            compare_engines(build_crossing, 'compiled', ticks=1)
+        with pytest.raises(ValueError):
+            trajectory_digest(build_crossing, 'compiled', ticks=1)
+
+
+class TestTrajectoryDigest:
+    def test_digest_depends_on_seed_only(self):
+        random.seed(5)
+        before = (random.random(), np.random.get_state()[1][0])
+        random.seed(5)
+
+        first = trajectory_digest(build_crossing, ticks=300)
+        assert trajectory_digest(build_crossing, ticks=300) == first
+        assert trajectory_digest(build_crossing, ticks=300, seed=1) != first
+        assert compare_engines(build_crossing, 'reference', ticks=300).reference_digest == first
+        # The caller's generators are left alone.
+        assert (random.random(), np.random.get_state()[1][0]) == before
+
+
+class TestCommandLine:
+    def test_exit_status(self, capsys):
+        assert main([str(FOUR_WAY), '--engine', 'ensemble', '--ticks', '120']) == 0
+        assert 'Equivalent' in capsys.readouterr().out
+        assert main([str(FOUR_WAY), '--engine', 'semi_implicit', '--ticks', '600', '--stop']) == 1
+        assert 'First divergence' in capsys.readouterr().out
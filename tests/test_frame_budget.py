@@ -0,0 +1,97 @@
+import os
+import numpy as np
+import pygame
+import pytest
+from trafficSim.frame_budget import FrameBudget
+from trafficSim.window import Window
+from tests.helpers import build_crossing
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+DT = 1 / 60
+
+
+def drive(budget, frames, step_cost, draw_cost):
+    """Run frames with synthetic costs; draw_cost maps a detail level to its cost."""
+    for _ in range(frames):
+        steps = budget.plan(DT)
+        sim_seconds = steps * step_cost
+        draw_seconds = draw_cost(budget.level)
+        budget.record(steps, DT, sim_seconds, draw_seconds, max(sim_seconds + draw_seconds, budget.frame_time))
+
+
+class TestFrameBudget:
+    def test_holds_real_time_factor_when_cheap(self):
+        budget = FrameBudget({'real_time_factor': 4.0})
+        drive(budget, 120, 1e-4, lambda level: 1e-3)
+
+        assert budget.steps == 4
+        assert budget.achieved_real_time_factor == pytest.approx(4.0)
+        assert budget.achieved_fps == pytest.approx(60)
+        assert budget.level == 3
+
+    def test_fractional_steps_carried(self):
+        budget = FrameBudget({'real_time_factor': 0.5, 'min_steps': 0})
+        total = 0
+        for _ in range(60):
+            total += budget.plan(DT)
+            budget.record(budget.steps, DT, 0.0, 1e-3, budget.frame_time)
+
+        assert total == 30
+
+    def test_detail_dropped_before_frame_rate(self):
+        budget = FrameBudget()
+        # Drawing alone blows the frame at full detail; the grid is most of it.
+        drive(budget, 60, 1e-4, lambda level: [0.002, 0.004, 0.006, 0.03][level])
+
+        assert budget.level == 2
+        assert not budget.shows('grid') and budget.shows('arrows')
+        assert budget.achieved_fps == pytest.approx(60, rel=0.01)
+
+    def test_longer_frames_keep_real_time_until_min_fps(self):
+        budget = FrameBudget({'real_time_factor': 2.0, 'min_fps': 20})
+        drive(budget, 200, 0.0004, lambda level: 0.02)
+
+        # Two steps of 0.4 ms per 1/60 s fit in frames of about 21 ms.
+        assert budget.level == 0
+        assert budget.achieved_real_time_factor == pytest.approx(2.0, rel=0.05)
+        assert 20 < budget.achieved_fps < 60
+
+    def test_steps_capped_beyond_min_fps(self):
+        budget = FrameBudget({'real_time_factor': 50.0, 'min_fps': 20})
+        drive(budget, 200, 0.001, lambda level: 0.01)
+
+        assert budget.steps == 40
+        assert budget.achieved_fps == pytest.approx(20)
+        assert budget.achieved_real_time_factor == pytest.approx(40 * DT * 20)
+
+    def test_detail_restored_when_load_falls(self):
+        budget = FrameBudget({'patience': 10})
+        drive(budget, 30, 0.02, lambda level: 0.002)
+        assert budget.level == 0
+
+        drive(budget, 9, 1e-4, lambda level: 0.002)
+        assert budget.level == 0
+        drive(budget, 40, 1e-4, lambda level: 0.002)
+        assert budget.level == 3
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            FrameBudget({'min_fps': 90})
+
+
+class TestWindow:
+    def test_run_real_time(self):
+        np.random.seed(0)
+        sim = build_crossing()
+
+        def quit_after(sim):
+            if sim.t >= 1.0:
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+        sim.observers.append(quit_after)
+        window = Window(sim, {'width': 320, 'height': 240})
+        window.run_real_time(2.0)
+
+        assert window.budget.frames > 0
+        assert window.budget.achieved_real_time_factor > 0
+        assert sim.t >= 1.0
@@ -0,0 +1,179 @@
+import random
+import numpy as np
+import pytest
+from trafficSim.ensemble import EnsembleSimulation
+from trafficSim.integrators import INTEGRATORS, GapMonitor, integrator_report, integrator_step
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
+from tests.helpers import build_crossing
+
+
+def free_run(name, dt, seconds=6.0):
+    vehicle = Vehicle({'vehicle_type': 'car', 'v': 0.0})
+    vehicle.a = vehicle.acceleration()
+    step = integrator_step(name)
+    for _ in range(int(round(seconds / dt))):
+        step(vehicle, None, dt, 0.0)
+    return vehicle
+
+
+class TestIntegrators:
+    def test_acceleration_is_the_update_law(self):
+        lead = Vehicle({'vehicle_type': 'car', 'x': 30.0, 'v': 5.0})
+        follower = Vehicle({'vehicle_type': 'truck', 'x': 10.0, 'v': 12.0})
+        follower.update(lead, 1 / 60)
+
+        assert follower.a == follower.acceleration(lead)
+        follower.stop()
+        assert follower.acceleration(lead) == -follower.b_max * follower.v / follower.v_max
+
+    @pytest.mark.parametrize('name', list(INTEGRATORS))
+    def test_converges_with_step_size(self, name):
+        reference = free_run('ballistic', 0.001)
+
+        assert free_run(name, 0.05).x == pytest.approx(reference.x, rel=0.02)
+
+    def test_heun_beats_semi_implicit_at_large_steps(self):
+        reference = free_run('ballistic', 0.001).x
+
+        assert abs(free_run('heun', 0.5).x - reference) < abs(free_run('semi_implicit', 0.5).x - reference)
+
+    def test_heun_predicts_the_stop(self):
+        vehicle = Vehicle({'vehicle_type': 'car', 'v': 2.0})
+        vehicle.stop()
+        vehicle.a = -8.0
+        integrator_step('heun')(vehicle, None, 0.5, 0.0)
+
+        # The prediction stops at 0.25 m with no deceleration left, halving the mean.
+        assert vehicle.v == 0.0
+        assert vehicle.x == pytest.approx(0.5)
+
+    @pytest.mark.parametrize('name', list(INTEGRATORS))
+    def test_hard_braking_never_reverses(self, name):
+        lead = Vehicle({'vehicle_type': 'car', 'x': 25.0, 'v': 0.0})
+        follower = Vehicle({'vehicle_type': 'car', 'x': 0.0, 'v': 20.0})
+        step = integrator_step(name)
+        for _ in range(40):
+            step(follower, lead, 0.5, 0.0)
+            assert follower.v >= 0
+
+        assert follower.x < lead.x
+
+    @pytest.mark.parametrize('name, dt', [('ballistic', 0.1), ('semi_implicit', 0.25), ('heun', 0.5)])
+    def test_coarse_run_without_overlaps(self, name, dt):
+        random.seed(0)
+        np.random.seed(0)
+        sim = build_crossing()
+        sim.dt = dt
+        sim.integrator = name
+        monitor = GapMonitor()
+        sim.observers.append(monitor)
+        sim.run(int(round(120 / dt)))
+
+        assert sim.vehicles_passed > 0
+        assert monitor.overlaps == 0
+
+    def test_unknown_integrator(self):
+        sim = build_crossing()
+        sim.integrator = 'leapfrog'
+
+        with pytest.raises(ValueError, match='leapfrog'):
+            sim.update()
+
+    def test_ensemble_needs_ballistic(self):
+        def build():
+            sim = build_crossing()
+            sim.integrator = 'heun'
+            return sim
+
+        with pytest.raises(ValueError, match='ballistic'):
+            EnsembleSimulation(build, [(None, 0)])
+
+    def test_report(self):
+        rows = integrator_report(build_crossing, dts=(0.5, 0.1), integrators=['ballistic', 'heun'], horizon=60.0)
+
+        assert [(row['integrator'], row['dt']) for row in rows] == [
+            ('ballistic', 0.1), ('ballistic', 0.5), ('heun', 0.1), ('heun', 0.5)]
+        assert rows[0]['error'] == 0
+        assert rows[1]['steps'] == 120
+
+
+class TestHandOff:
+    def build(self, lengths, dt=0.1):
+        sim = Simulation({'dt': dt})
+        x = 0.0
+        for length in lengths:
+            sim.create_road((x, 0), (x + length, 0))
+            x += length
+        return sim
+
+    def test_overshoot_carried(self):
+        sim = self.build([100, 100])
+        vehicle = Vehicle({'path': [0, 1], 'x': 103.0})
+        sim.roads[0].vehicles.append(vehicle)
+        sim.complete_update()
+
+        assert list(sim.roads[1].vehicles) == [vehicle]
+        assert vehicle.x == pytest.approx(3.0)
+
+    def test_short_road_crossed_in_one_step(self):
+        sim = self.build([100, 2, 100])
+        vehicle = Vehicle({'path': [0, 1, 2], 'x': 105.0})
+        sim.roads[0].vehicles.append(vehicle)
+        sim.complete_update()
+
+        assert list(sim.roads[2].vehicles) == [vehicle]
+        assert vehicle.x == pytest.approx(3.0)
+        assert vehicle.current_road_index == 2
+
+    def test_carry_stops_behind_tail(self):
+        sim = self.build([100, 100])
+        tail = Vehicle({'vehicle_type': 'car', 'path': [1], 'x': 10.0})
+        sim.roads[1].vehicles.append(tail)
+        vehicle = Vehicle({'vehicle_type': 'car', 'path': [0, 1], 'x': 106.0})
+        sim.roads[0].vehicles.append(vehicle)
+        sim.complete_update()
+
+        # 3 m behind the tail's rear, its minimum gap.
+        assert vehicle.x == pytest.approx(4.0)
+
+    def test_vehicle_running_a_red_is_released(self):
+        sim = self.build([100, 100])
+        vehicle = Vehicle({'path': [0, 1], 'x': 101.0})
+        vehicle.stop()
+        sim.roads[0].vehicles.append(vehicle)
+        sim.complete_update()
+
+        assert not vehicle.stopped
+
+    def test_default_step_starts_next_road(self):
+        sim = self.build([100, 2, 100], dt=1 / 60)
+        vehicle = Vehicle({'path': [0, 1, 2], 'x': 105.0})
+        sim.roads[0].vehicles.append(vehicle)
+        sim.complete_update()
+
+        assert not sim.long_steps
+        assert list(sim.roads[1].vehicles) == [vehicle]
+        assert vehicle.x == 0.0
+
+
+class TestCoarseSpawning:
+    def test_blocked_entrance_builds_one_vehicle_per_tick(self, monkeypatch):
+        sim = Simulation()
+        sim.create_road((0, 0), (100, 0))
+        gen = sim.create_gen({'vehicle_rate': 6000, 'vehicles': [[1, {'path': [0]}]]})
+        built = []
+        generate = gen.generate_vehicle
+        monkeypatch.setattr(gen, 'generate_vehicle', lambda: built.append(1) or generate())
+        sim.run(600)
+
+        assert len(built) <= 600
+
+    def test_rate_kept_when_interval_is_shorter_than_dt(self):
+        sim = Simulation({'dt': 0.5})
+        sim.create_roads([((0, y), (200, y)) for y in range(0, 80, 10)])
+        sim.create_gen({'vehicle_rate': 240, 'vehicles': [[1, {'path': [i]}] for i in range(8)]})
+        sim.run(120)
+
+        # 240 per minute; one spawn per tick would cap it at 120.
+        assert sim.vehicles_spawned > 180
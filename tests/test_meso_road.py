@@ -0,0 +1,155 @@
+from pathlib import Path
+import numpy as np
+import pytest
+import yaml
+from trafficSim.meso_road import MesoRoad
+from trafficSim.road_network import GridBuilder, IntersectionBuilder
+from trafficSim.scenario import compile_scenario
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+
+def make_vehicle(v_max=20.0):
+    return Vehicle({'vehicle_type': 'car', 'path': [0], 'v_max': v_max})
+
+
+def conserved(sim):
+    return sim.vehicles_spawned == sim.vehicles_passed + sim.vehicles_present
+
+
+class TestMesoRoad:
+    def test_released_after_free_flow_time(self):
+        road = MesoRoad((0, 0), (300, 0), {'micro_length': 60})
+        vehicle = make_vehicle()
+        road.admit(vehicle)
+
+        # 240 m at 20 m/s takes 12 s.
+        for _ in range(47):
+            road.update(0.25)
+        assert road.vehicle_count == 1 and not road.vehicles
+        road.update(0.25)
+
+        assert list(road.vehicles) == [vehicle]
+        assert vehicle.x == road.boundary == pytest.approx(240.0)
+        assert vehicle.v == pytest.approx(20.0)
+
+    def test_release_waits_for_room(self):
+        road = MesoRoad((0, 0), (300, 0), {'micro_length': 60})
+        stopped = make_vehicle()
+        road.vehicles.append(stopped)
+        road.admit(make_vehicle())
+
+        for _ in range(200):
+            stopped.x, stopped.v = 243.0, 0.0
+            road.update(0.1)
+        assert len(road.queue) == 1
+
+        stopped.x, stopped.v = 260.0, 0.0
+        road.update(0.1)
+        follower = road.vehicles[-1]
+        assert follower is not stopped
+        # The follower starts at the speed its gap allows.
+        assert follower.v == pytest.approx((stopped.x - stopped.l - 240.0 - follower.s0) / follower.T)
+
+    def test_first_in_first_out(self):
+        road = MesoRoad((0, 0), (300, 0))
+        slow, fast = make_vehicle(10.0), make_vehicle(30.0)
+        road.admit(slow)
+        road.admit(fast)
+
+        while road.queue:
+            road.update(0.1)
+            if road.vehicles:
+                road.vehicles[-1].x = road.length
+
+        assert list(road.vehicles) == [slow, fast]
+
+    def test_clear(self):
+        road = MesoRoad((0, 0), (300, 0))
+        vehicles = [make_vehicle(), make_vehicle()]
+        road.vehicles.append(vehicles[0])
+        road.admit(vehicles[1])
+
+        assert road.clear() == vehicles
+        assert road.vehicle_count == 0
+
+    def test_queue_storage(self):
+        road = MesoRoad((0, 0), (300, 0), {'micro_length': 60, 'jam_density': 0.1})
+        for _ in range(23):
+            road.admit(make_vehicle())
+        assert road.storage == 24 and road.has_room(make_vehicle())
+
+        road.admit(make_vehicle())
+        assert not road.has_room(make_vehicle())
+
+
+class TestHybridNetworks:
+    def test_grid_conserves_vehicles(self):
+        np.random.seed(0)
+        sim = Simulation()
+        groups = GridBuilder(sim, rows=2, cols=2, micro_length=60).build_grid()
+        sim.create_gen({'od': [(o, d, 5.0) for o in groups['entrances'] for d in groups['exits']]})
+
+        queued = 0
+        for _ in range(60):
+            sim.run(60)
+            assert conserved(sim)
+            queued = max(queued, sum(len(road.queue) for road in sim.meso_roads))
+
+        assert all(isinstance(sim.roads[i], MesoRoad) for group in groups.values() for i in group)
+        assert sim.vehicles_passed > 0 and queued > 0
+
+    def test_four_way_matches_microscopic(self):
+        passed = []
+        for micro_length in (None, 60):
+            data = yaml.safe_load(FOUR_WAY.read_text())
+            data['demand']['vehicle_rate'] = 100
+            if micro_length is not None:
+                data['network']['intersection']['micro_length'] = micro_length
+            np.random.seed(0)
+            sim = compile_scenario(data).build()
+            sim.run(int(120 / sim.dt))
+            assert conserved(sim)
+            passed.append(sim.vehicles_passed)
+
+        assert isinstance(sim.roads[sim.road_names['west_in_1'][0]], MesoRoad)
+        assert sim.roads[sim.road_names['west_out_1'][0]].micro_length == 0
+        assert passed[1] == pytest.approx(passed[0], rel=0.1)
+
+    def test_delete_all_vehicles_empties_queues(self):
+        np.random.seed(0)
+        sim = Simulation()
+        sim.create_vehicle_pool()
+        sim.create_meso_road((0, 0), (300, 0))
+        sim.create_gen({'vehicle_rate': 60, 'backlog': True, 'vehicles': [[1, {'path': [0]}]]})
+        sim.run(600)
+        assert sim.meso_roads[0].queue
+
+        sim.generators[0].delete_all_vehicles()
+
+        assert sim.roads[0].vehicle_count == 0
+        assert sim.vehicle_pool.in_use == 0
+
+    def test_full_queue_spills_back(self):
+        np.random.seed(0)
+        sim = Simulation()
+        sim.create_road((0, 0), (100, 0))
+        sim.create_meso_road((100, 0), (400, 0), {'micro_length': 0, 'jam_density': 0.01})
+        sim.create_gen({'vehicle_rate': 60, 'backlog': True, 'vehicles': [[1, {'path': [0, 1]}]]})
+        queue, upstream = sim.meso_roads[0], sim.roads[0]
+        held = 0
+        for _ in range(1800):
+            sim.update()
+            assert len(queue.queue) <= queue.storage == 3
+            held += bool(upstream.vehicles) and upstream.vehicles[0].x == upstream.length
+        assert conserved(sim)
+
+        # The upstream road and then the entrance fill up behind the full queue.
+        assert held > 0
+        assert sim.metrics()['vehicles_waiting'] > 0
+
+    def test_multilane_approaches_rejected(self):
+        with pytest.raises(ValueError):
+            IntersectionBuilder(Simulation()).build_four_way_intersection(multilane=True, micro_length=60)
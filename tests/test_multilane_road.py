@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from trafficSim.multilane_road import MultiLaneRoad
+from trafficSim.road_network import IntersectionBuilder
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle, idm_acceleration
+
+
+def make_vehicle(vehicle_type, x, v, lane=0):
+    vehicle = Vehicle({'vehicle_type': vehicle_type})
+    vehicle.x = x
+    vehicle.v = v
+    vehicle.lane = lane
+    return vehicle
+
+
+class TestIdmAcceleration:
+    def test_matches_vehicle_update(self):
+        lead = make_vehicle('car', 50, 10)
+        follower = make_vehicle('car', 20, 15)
+        follower.update(lead, 0.0)
+
+        a = idm_acceleration(
+            np.array([follower.v]), np.array([follower.v_max]), np.array([follower.a_max]),
+            np.array([follower.s0]), np.array([follower.T]), np.array([follower.sqrt_ab]),
+            np.array([lead.x - follower.x - lead.l]), np.array([follower.v - lead.v])
+        )
+
+        assert a[0] == pytest.approx(follower.a)
+
+
+class TestMultiLaneRoad:
+    def test_initialization(self):
+        road = MultiLaneRoad((0, 0), (100, 0), {'num_lanes': 3})
+
+        assert road.num_lanes == 3
+        assert road.width == pytest.approx(3 * road.lane_width)
+        assert road.lane_offset(make_vehicle('car', 0, 0, lane=1)) == 0
+
+    def test_lanes_follow_independently(self):
+        road = MultiLaneRoad((0, 0), (1000, 0), {'lane_change_threshold': 100.0})
+        front = make_vehicle('car', 25, 0, lane=0)
+        beside = make_vehicle('car', 20, 20, lane=1)
+        road.vehicles.extend([front, beside])
+
+        for _ in range(30):
+            road.update(1 / 60)
+
+        # The lane-1 car passes the stopped lane-0 car without braking for it.
+        assert beside.x > front.x
+        assert road.vehicles[0] is beside
+
+    def test_overtakes_slow_vehicle(self):
+        np.random.seed(0)
+        road = MultiLaneRoad((0, 0), (2000, 0), {'num_lanes': 2})
+        truck = make_vehicle('truck', 60, 5)
+        truck._v_max = truck.v_max = 5.0
+        car = make_vehicle('car', 30, 20)
+        road.vehicles.extend([truck, car])
+
+        for _ in range(600):
+            road.update(1 / 60)
+
+        assert road.lane_changes >= 1
+        assert car.lane != truck.lane or car.x > truck.x
+        assert car.x > truck.x
+
+    def test_no_change_into_occupied_gap(self):
+        road = MultiLaneRoad((0, 0), (1000, 0), {'politeness': 0.0})
+        blocker = make_vehicle('car', 50, 0, lane=0)
+        car = make_vehicle('car', 44, 10, lane=0)
+        neighbour = make_vehicle('car', 45, 10, lane=1)
+        road.vehicles.extend([blocker, neighbour, car])
+
+        road.update(1 / 60)
+
+        assert car.lane == 0
+
+    def test_builder_multilane_approaches(self):
+        sim = Simulation()
+        IntersectionBuilder(sim, n=5).build_four_way_intersection(num_lanes=3, multilane=True)
+
+        multilane = [road for road in sim.roads if isinstance(road, MultiLaneRoad)]
+        assert len(multilane) == 8
+        assert all(road.num_lanes == 3 for road in multilane)
+        assert len(sim.roads) == 8 + 4 + 8 * 5
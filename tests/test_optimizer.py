@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+from trafficSim.simulation import Simulation
+from trafficSim.traffic_signal import TrafficSignal
+from trafficSim.batch import run_headless, run_batch
+from trafficSim.optimizer import SignalPlan, SignalPlanOptimizer
+from tests.helpers import build_crossing
+
+
+class TestSignalPlan:
+    def test_splits_set_phase_durations(self):
+        signal = TrafficSignal([[], [], [], []], {'cycle_length': 10, 'splits': [2, 1, 1, 0.5]})
+
+        # Full cycle of 40 s: phases of 17.8, 8.9, 8.9 and 4.4 s.
+        assert signal.phase_at(0.0) == 0
+        assert signal.phase_at(17.0) == 0
+        assert signal.phase_at(18.0) == 1
+        assert signal.phase_at(36.0) == 3
+        assert signal.phase_at(40.0) == 0
+
+    def test_offset_shifts_plan(self):
+        signal = TrafficSignal([[], [], [], []], {'cycle_length': 10, 'splits': [1, 1, 1, 1], 'offset': 5})
+
+        assert signal.phase_at(4.0) == 3
+        assert signal.phase_at(5.0) == 0
+
+    def test_invalid_splits_rejected(self):
+        with pytest.raises(ValueError, match="splits"):
+            TrafficSignal([[], [], [], []], {'splits': [1, 1]})
+
+    def test_apply_to_simulation(self):
+        sim = build_crossing()
+        plan = SignalPlan(30.0, ((0.4, 0.2, 0.2, 0.2),), (12.0,))
+
+        plan.apply(sim)
+
+        signal = sim.traffic_signals[0]
+        assert signal.cycle_length == 30.0
+        assert signal.splits == [0.4, 0.2, 0.2, 0.2]
+        assert signal.offset == 12.0
+
+
+class TestBatch:
+    def test_headless_run_is_reproducible(self):
+        plan = SignalPlan(20.0, ((0.25, 0.25, 0.25, 0.25),))
+
+        first = run_headless(build_crossing, plan, horizon=30, seed=3)
+        second = run_headless(build_crossing, plan, horizon=30, seed=3)
+
+        assert first == second
+        assert first['t'] == pytest.approx(30.0)
+
+    def test_stats_are_per_simulation(self):
+        run_headless(build_crossing, horizon=60, seed=0)
+
+        assert Simulation().vehicles_passed == 0
+
+    def test_parallel_matches_inline(self):
+        jobs = [(SignalPlan(float(c)), 30.0, 1) for c in (15, 25)]
+
+        assert run_batch(build_crossing, jobs, workers=2) == run_batch(build_crossing, jobs, workers=1)
+
+
+class TestSignalPlanOptimizer:
+    def test_successive_halving_schedule(self):
+        optimizer = SignalPlanOptimizer(build_crossing, {
+            'num_candidates': 9, 'min_horizon': 10.0, 'max_horizon': 90.0, 'workers': 1,
+        })
+
+        ranked = optimizer.optimize(seed=1)
+
+        rungs = [(entry['rung'], entry['horizon']) for entry in optimizer.history]
+        assert rungs == [(0, 10.0)] * 9 + [(1, 30.0)] * 3 + [(2, 90.0)]
+        assert len(ranked) == 1
+        assert optimizer.simulated_time == pytest.approx(9 * 10 + 3 * 30 + 90)
+
+    def test_prefers_green_for_busy_approach(self):
+        optimizer = SignalPlanOptimizer(build_crossing, {
+            'min_horizon': 60.0, 'max_horizon': 180.0, 'workers': 1,
+        })
+        # The last phase of the default cycle is green for group 0.
+        busy = SignalPlan(20.0, ((0.1, 0.1, 0.1, 0.7),))
+        starved = SignalPlan(20.0, ((0.7, 0.1, 0.1, 0.1),))
+
+        ranked = optimizer.optimize([starved, busy])
+
+        assert ranked[0][0] == busy
+
+    def test_sampled_plans_respect_space(self):
+        optimizer = SignalPlanOptimizer(build_crossing, {'cycle_range': (20.0, 30.0), 'min_split': 0.15})
+
+        for plan in optimizer.sample_plans(5, np.random.default_rng(0)):
+            assert 20.0 <= plan.cycle_length <= 30.0
+            assert min(plan.splits[0]) >= 0.15
+            assert sum(plan.splits[0]) == pytest.approx(1.0)
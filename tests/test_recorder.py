@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pygame
+import pytest
+from trafficSim.recorder import Recording, TrajectoryRecorder
+from trafficSim.render import ReplayWindow, encode_video, render_recording
+from trafficSim.window import Window
+from tests.helpers import build_crossing
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+WINDOW = {'width': 320, 'height': 240, 'zoom': 1.0}
+
+
+def record(tmp_path, seconds=6.0, **config):
+    np.random.seed(0)
+    sim = build_crossing()
+    with TrajectoryRecorder(sim, {'path': str(tmp_path / 'rec'), 'interval': 0.5, **config}):
+        sim.run(int(seconds * 60))
+    return sim
+
+
+class TestTrajectoryRecorder:
+    def test_frames_match_simulation(self, tmp_path):
+        sim = record(tmp_path, chunk_frames=4)
+        recording = Recording(tmp_path / 'rec')
+
+        # One frame every 0.5 s from the first tick, through t = 6 s.
+        assert len(recording) == 13
+        assert [chunk['frames'] for chunk in recording.meta['chunks']] == [4, 4, 4, 1]
+        last = recording.frame(12)
+        vehicles = [v for road in sim.roads for v in road.vehicles]
+        assert last['id'].tolist() == [v.id for v in vehicles]
+        assert last['x'] == pytest.approx([v.x for v in vehicles], abs=1e-4)
+        assert last['signals'].tolist() == list(sim.traffic_signals[0].current_cycle)
+
+    def test_ids_assigned_at_spawn(self, tmp_path):
+        record(tmp_path)
+        recording = Recording(tmp_path / 'rec')
+
+        ids = np.concatenate([frame['id'] for frame in recording.frames()])
+        assert ids.min() >= 0
+        first = recording.frame(1)
+        assert len(set(first['id'].tolist())) == len(first['id'])
+
+    def test_records_after_clock_reset(self, tmp_path, monkeypatch):
+        # The reset at the time limit appends to data.csv in the working directory.
+        monkeypatch.chdir(tmp_path)
+        sim = build_crossing()
+        sim.time_limit = 3.0
+        with TrajectoryRecorder(sim, {'path': str(tmp_path / 'rec'), 'interval': 0.5}):
+            sim.run(360)
+        recording = Recording(tmp_path / 'rec')
+
+        times = [frame['t'] for frame in recording.frames()]
+        # Frames through t = 3 s, then again from the restarted clock.
+        assert len(times) >= 12
+        assert times[-1] == pytest.approx(sim.t, abs=0.5)
+        assert min(times[7:]) < 1.0
+
+
+class TestRender:
+    def test_replay_matches_live_window(self, tmp_path):
+        sim = record(tmp_path)
+        live = Window(sim, WINDOW)
+        pygame.font.init()
+        live.text_font = pygame.font.SysFont('Lucida Console', 16)
+        live.screen = pygame.Surface((live.width, live.height))
+        live.draw()
+
+        replay = ReplayWindow(Recording(tmp_path / 'rec'), WINDOW)
+        replay.show(len(replay.recording) - 1)
+        replay.draw()
+
+        a = pygame.surfarray.array3d(live.screen)
+        b = pygame.surfarray.array3d(replay.screen)
+        assert np.mean(np.any(a != b, axis=2)) < 0.005
+
+    def test_parallel_render_writes_sequence(self, tmp_path):
+        record(tmp_path)
+
+        paths = render_recording(tmp_path / 'rec', tmp_path / 'frames', WINDOW, frame_step=2, workers=2)
+
+        assert [p.name for p in paths] == [f'frame_{n:06d}.png' for n in range(7)]
+        assert pygame.image.load(str(paths[0])).get_size() == (320, 240)
+
+    def test_encode_without_ffmpeg(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('shutil.which', lambda name: None)
+
+        with pytest.raises(RuntimeError, match="ffmpeg"):
+            encode_video(tmp_path, tmp_path / 'out.mp4')
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from scipy import stats as scipy_stats
+from trafficSim.optimizer import SignalPlan
+from trafficSim.replication import ReplicationController, RunningStats
+from trafficSim.simulation import Simulation
+from tests.helpers import build_crossing
+
+
+def build_fork():
+    # Vehicles pick a short or a long exit at random, so throughput varies by seed.
+    sim = Simulation()
+    sim.create_roads([((-100, 0), (0, 0)), ((0, 0), (20, 0)), ((0, 0), (0, -300))])
+    sim.create_gen({'vehicle_rate': 40, 'vehicles': [[1, {'path': [0, 1]}], [1, {'path': [0, 2]}]]})
+    return sim
+
+
+def stats_of(values):
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    return stats
+
+
+class TestRunningStats:
+    def test_matches_numpy(self):
+        values = np.random.default_rng(0).normal(1000, 30, 50)
+        stats = stats_of(values)
+
+        assert stats.count == 50
+        assert stats.mean == pytest.approx(values.mean())
+        assert stats.variance == pytest.approx(values.var(ddof=1))
+
+    def test_half_width_is_student_t_interval(self):
+        values = [971, 971, 996, 989, 995]
+        low, high = scipy_stats.t.interval(0.95, 4, loc=np.mean(values), scale=scipy_stats.sem(values))
+
+        assert stats_of(values).half_width(0.95) == pytest.approx((high - low) / 2)
+
+    def test_undefined_below_two_values(self):
+        assert stats_of([5.0]).half_width() == float('inf')
+
+
+class TestReplicationController:
+    def test_noisier_configuration_gets_more_runs(self):
+        controller = ReplicationController(build_crossing, {'batch_size': 20, 'half_width': 1.0})
+        requests = controller.allocate([stats_of([5, 10, 15]), stats_of([10, 30, 20])])
+
+        assert sum(requests.values()) == 20
+        assert requests[1] > 2 * requests[0] > 0
+
+    def test_converged_and_capped_configurations_get_none(self):
+        controller = ReplicationController(build_crossing, {'half_width': 1.0, 'max_replications': 3})
+
+        assert controller.allocate([stats_of([10, 10, 10]), stats_of([10, 30, 20])]) == {}
+
+    def test_stops_at_min_replications_without_noise(self):
+        controller = ReplicationController(build_crossing, {
+            'horizon': 10.0, 'workers': 1, 'objective': lambda metrics: 1.0,
+        })
+        summary = controller.run([None, SignalPlan(20.0)])
+
+        assert [row['replications'] for row in summary] == [3, 3]
+        assert all(row['converged'] and row['half_width'] == 0 for row in summary)
+        assert controller.rounds == 1
+
+    def test_runs_until_target_or_cap(self):
+        controller = ReplicationController(build_fork, {
+            'horizon': 40.0, 'workers': 1, 'half_width': 0.5, 'max_replications': 5, 'batch_size': 2,
+        })
+        summary = controller.run([None])
+
+        assert summary[0]['replications'] == 5
+        assert not summary[0]['converged'] and summary[0]['half_width'] > 0.5
+        assert controller.rounds == 2
+        assert controller.simulated_time == 5 * 40.0
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            ReplicationController(build_crossing, {'min_replications': 1})
@@ -0,0 +1,76 @@
+import pytest
+from trafficSim.simulation import Simulation
+
+
+def make_two_route_sim():
+    sim = Simulation()
+    sim.create_roads([
+        ((0, 0), (100, 0)),       # 0: shared approach
+        ((100, 0), (200, 0)),     # 1: short branch, blocked by a red light
+        ((100, 0), (150, 40)),    # 2: long branch
+        ((200, 0), (300, 0)),     # 3
+        ((150, 40), (200, 0)),    # 4
+    ])
+    return sim
+
+
+class TestRerouter:
+    def test_record_smooths_link_time(self):
+        sim = make_two_route_sim()
+        rerouter = sim.create_rerouter({'smoothing': 0.5, 'free_speed': 10.0})
+
+        assert rerouter.link_times[1] == pytest.approx(10.0)
+        rerouter.record(1, 30.0)
+        assert rerouter.link_times[1] == pytest.approx(20.0)
+
+    def test_queue_at_red_light_triggers_reroute(self):
+        sim = make_two_route_sim()
+        sim.create_gen({'vehicle_rate': 30, 'od': [(0, 3, 30)]})
+        signal = sim.create_signal([[1]], {'cycle': [(False,)] * 4})
+        rerouter = sim.create_rerouter({'interval': 1.0})
+
+        sim.run(60 * 90)
+
+        assert signal.current_cycle == (False,)
+        assert rerouter.reroutes > 0
+        assert sim.vehicles_passed > 0
+
+    def test_search_results_are_reused(self):
+        sim = make_two_route_sim()
+        sim.create_gen({'vehicle_rate': 30, 'od': [(0, 3, 30)]})
+        rerouter = sim.create_rerouter({'interval': 0.5})
+
+        sim.run(60 * 20)
+
+        assert rerouter.reroutes == 0
+        assert rerouter.cache_hits > 0
+        assert rerouter.searches < rerouter.cache_hits
+
+    def test_runs_after_clock_reset(self):
+        sim = make_two_route_sim()
+        sim.create_gen({'vehicle_rate': 30, 'od': [(0, 3, 30)]})
+        rerouter = sim.create_rerouter({'interval': 1.0})
+        sim.run(60 * 10)
+        assert rerouter.last_run_time > 8.0
+
+        # As the time_limit reset of a new iteration does.
+        sim.t = 0.001
+        sim.run(60 * 3)
+
+        assert 1.0 < rerouter.last_run_time < sim.t
+        assert rerouter.next_update(sim.t) < sim.t + 1.0
+
+    def test_tracks_vehicles_on_diverging_roads(self):
+        sim = make_two_route_sim()
+        sim.create_gen({'vehicle_rate': 30, 'od': [(0, 3, 30)]})
+        sim.create_signal([[1]], {'cycle': [(False,)] * 4})
+        rerouter = sim.create_rerouter({'interval': 1.0})
+        sim.run(60 * 30)
+
+        # Only road 0 diverges; vehicles past it are no longer considered.
+        assert list(rerouter._candidates) == list(sim.roads[0].vehicles)
+        assert any(road.vehicles for road in sim.roads[1:])
+
+        sim.generators[0].delete_all_vehicles()
+        assert not rerouter._candidates
+
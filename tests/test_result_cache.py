@@ -0,0 +1,76 @@
+import pytest
+from trafficSim.batch import run_headless, run_batch
+from trafficSim.optimizer import SignalPlan
+from trafficSim.result_cache import ResultCache, fingerprint, run_key
+from tests.helpers import build_crossing
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache({'path': str(tmp_path / 'results.sqlite')})
+    yield cache
+    cache.close()
+
+
+class TestFingerprint:
+    def test_identical_builds_share_key(self):
+        first = run_key(fingerprint(build_crossing()), None, 60.0, 0)
+        second = run_key(fingerprint(build_crossing()), None, 60.0, 0)
+
+        assert first == second
+
+    def test_key_covers_demand_plan_and_seed(self):
+        sim = build_crossing()
+        base = run_key(fingerprint(sim), None, 60.0, 0)
+
+        assert run_key(fingerprint(sim), None, 60.0, 1) != base
+        assert run_key(fingerprint(sim), SignalPlan(20.0), 60.0, 0) != base
+        sim.generators[0].vehicle_rate = 50
+        assert run_key(fingerprint(sim), None, 60.0, 0) != base
+
+    def test_signal_groups_included(self):
+        sim = build_crossing()
+
+        assert fingerprint(sim)['signals'][0]['roads'] == [[0], [1], [2], [3]]
+
+
+class TestResultCache:
+    def test_batch_only_computes_new_points(self, cache):
+        jobs = [(SignalPlan(20.0), 20.0, seed) for seed in (0, 1)]
+        first = run_batch(build_crossing, jobs, workers=1, cache=cache)
+        assert cache.misses == 2
+
+        second = run_batch(build_crossing, jobs + [(SignalPlan(20.0), 20.0, 2)], workers=1, cache=cache)
+
+        assert second[:2] == first
+        assert cache.hits == 2
+        assert len(cache) == 3
+
+    def test_headless_and_batch_agree_on_keys(self, cache):
+        run_headless(build_crossing, None, horizon=20.0, seed=4, cache=cache)
+
+        run_batch(build_crossing, [(None, 20.0, 4)], workers=1, cache=cache)
+
+        assert cache.hits == 1
+
+    def test_least_recently_used_evicted(self, cache):
+        cache.max_entries = 2
+        cache.put('a', {'x': 1})
+        cache.put('b', {'x': 2})
+        cache.get('a')
+        cache.put('c', {'x': 3})
+
+        assert cache.get('b') is None
+        assert cache.get('a') == {'x': 1}
+        assert len(cache) == 2
+
+    def test_engine_change_invalidates(self, tmp_path):
+        path = str(tmp_path / 'results.sqlite')
+        old = ResultCache({'path': path, 'engine': 'old'})
+        old.put('a', {'x': 1})
+        old.close()
+
+        new = ResultCache({'path': path})
+
+        assert len(new) == 0
+        new.close()
@@ -0,0 +1,141 @@
+import pytest
+import numpy as np
+from trafficSim.road import Road
+from trafficSim.road_graph import RoadGraph
+from trafficSim.simulation import Simulation
+from trafficSim.road_network import GridBuilder
+
+
+def make_roads():
+    # 0: A->B, 1: B->C, 2: B->D, 3: C->A
+    return [
+        Road((0, 0), (100, 0)),
+        Road((100, 0), (200, 0)),
+        Road((100, 0), (100, 100)),
+        Road((200, 0), (0, 0)),
+    ]
+
+
+class TestRoadGraph:
+    def test_csr_successors(self):
+        graph = RoadGraph(make_roads())
+
+        assert graph.num_roads == 4
+        assert graph.num_nodes == 4
+        assert sorted(graph.successors(0).tolist()) == [1, 2]
+        assert graph.successors(1).tolist() == [3]
+        assert graph.successors(2).tolist() == []
+        assert graph.successors(3).tolist() == [0]
+        assert graph.indptr.tolist() == [0, 2, 3, 3, 4]
+
+    def test_intern_route_shares_array(self):
+        graph = RoadGraph(make_roads())
+
+        first = graph.intern_route([0, 1, 3])
+        second = graph.intern_route(np.array([0, 1, 3]))
+
+        assert first == second
+        assert graph.route(first).dtype == np.int64
+        assert graph.next_roads[first].tolist() == [1, 3, -1]
+        assert not graph.route(first).flags.writeable
+
+    def test_disconnected_route_rejected(self):
+        graph = RoadGraph(make_roads())
+
+        with pytest.raises(ValueError, match="not connected"):
+            graph.intern_route([0, 3])
+
+    def test_unknown_road_rejected(self):
+        graph = RoadGraph(make_roads())
+
+        with pytest.raises(ValueError, match="unknown road"):
+            graph.intern_route([0, 7])
+
+
+class TestSimulationRoutes:
+    def test_generator_interns_paths(self):
+        sim = Simulation()
+        sim.create_roads([((0, 0), (100, 0)), ((100, 0), (200, 0))])
+        gen = sim.create_gen({'vehicles': [[1, {'path': [0, 1]}], [1, {'path': [0, 1]}]]})
+
+        routes = [config['path'] for _, config in gen.vehicles]
+        assert routes[0] is routes[1]
+        assert gen.upcoming_vehicle.route_id == 0
+
+    def test_generator_rejects_broken_path(self):
+        sim = Simulation()
+        sim.create_roads([((0, 0), (100, 0)), ((150, 0), (200, 0))])
+
+        with pytest.raises(ValueError, match="Invalid vehicle path"):
+            sim.create_gen({'vehicles': [[1, {'path': [0, 1]}]]})
+
+    def test_hand_off_follows_route(self):
+        sim = Simulation()
+        sim.create_roads([((0, 0), (10, 0)), ((10, 0), (20, 0)), ((10, 0), (10, 10))])
+        gen = sim.create_gen({'vehicle_rate': 60, 'vehicles': [[1, {'path': [0, 2]}]]})
+        vehicle = gen.upcoming_vehicle
+
+        sim.run(120)
+
+        assert vehicle in sim.roads[2].vehicles or sim.vehicles_passed > 0
+        assert len(sim.roads[1].vehicles) == 0
+
+    def test_route_ids_survive_new_roads(self):
+        sim = Simulation()
+        sim.create_roads([((0, 0), (10, 0)), ((10, 0), (20, 0))])
+        route_id = sim.road_graph.intern_route([0, 1])
+
+        sim.create_road((20, 0), (30, 0))
+
+        assert sim.road_graph.num_roads == 3
+        assert sim.road_graph.route(route_id).tolist() == [0, 1]
+
+
+class TestShortestRoutes:
+    def test_shortest_route_prefers_shorter_branch(self):
+        sim = Simulation()
+        sim.create_roads([
+            ((0, 0), (10, 0)),      # 0: origin
+            ((10, 0), (20, 0)),     # 1: short branch
+            ((10, 0), (15, 50)),    # 2: long branch
+            ((15, 50), (20, 0)),    # 3
+            ((20, 0), (30, 0)),     # 4: destination
+        ])
+
+        route_id = sim.road_graph.shortest_route(0, 4)
+
+        assert sim.road_graph.route(route_id).tolist() == [0, 1, 4]
+        assert sim.road_graph.shortest_route(0, 4) == route_id
+
+    def test_unreachable_destination(self):
+        sim = Simulation()
+        sim.create_roads([((0, 0), (10, 0)), ((50, 0), (60, 0))])
+
+        with pytest.raises(ValueError, match="not reachable"):
+            sim.road_graph.shortest_route(0, 1)
+
+    def test_generator_od_demand(self):
+        sim = Simulation()
+        groups = GridBuilder(sim, rows=4, cols=4, spacing=100).build_grid()
+        od = [(o, d, 2.0) for o in groups['entrances'] for d in groups['exits'] if o != d]
+
+        gen = sim.create_gen({'od': od})
+
+        assert gen.vehicle_rate == pytest.approx(2.0 * len(od))
+        assert sim.vehicle_rate == gen.vehicle_rate
+        vehicle = gen.generate_vehicle()
+        assert vehicle.path is sim.road_graph.route(vehicle.route_id)
+        assert vehicle.path[0] in groups['entrances']
+        assert vehicle.path[-1] in groups['exits']
+
+
+class TestGridBuilder:
+    def test_grid_road_counts(self):
+        sim = Simulation()
+        groups = GridBuilder(sim, rows=2, cols=3).build_grid()
+
+        # 7 adjacent pairs, two directions each; 10 border sides.
+        assert len(groups['links']) == 14
+        assert len(groups['entrances']) == 10
+        assert len(groups['exits']) == 10
+        assert len(sim.roads) == 34
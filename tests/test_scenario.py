@@ -0,0 +1,138 @@
+import pickle
+import pytest
+from pathlib import Path
+from trafficSim.batch import run_batch
+from trafficSim.scenario import Scenario, compile_scenario, load_scenario
+from trafficSim.simulation import Simulation
+from trafficSim.road_network import IntersectionBuilder
+
+FOUR_WAY = Path(__file__).parent.parent / 'scenarios' / 'four_way.yaml'
+
+CROSSING = """
+vehicle_types: types.yaml
+network:
+  nodes:
+    W: [-100, 0]
+    C: [0, 0]
+    E: [100, 0]
+    N: [0, -100]
+  roads:
+    - {name: west_in, from: W, to: C}
+    - {name: east_out, from: C, to: E}
+    - {name: north_out, from: [10, -10], to: N}
+    - {name: bend, from: C, to: [10, -10], turn: left, resolution: 5}
+demand:
+  vehicle_rate: 30
+  vehicles:
+    - {weight: 3, route: [west_in, east_out]}
+    - {weight: 1, route: [west_in, bend, north_out], vehicle_type: van}
+signals:
+  - groups: [[west_in]]
+    cycle_length: 20
+    splits: [1, 1, 1, 1]
+"""
+
+TYPES = """
+vehicle_types:
+  van: {probability: 1, length: 4, height: 2, color: [0, 128, 0], s0: 3, T: 1.5, v_max: 14, a_max: 3, b_max: 6}
+"""
+
+
+@pytest.fixture
+def crossing(tmp_path):
+    (tmp_path / 'types.yaml').write_text(TYPES)
+    path = tmp_path / 'crossing.yaml'
+    path.write_text(CROSSING)
+    return path
+
+
+class TestScenario:
+    def test_four_way_builds(self):
+        sim = load_scenario(FOUR_WAY, cache=False).build()
+
+        assert len(sim.roads) == 3 * (12 + 8 * 20)
+        assert len(sim.traffic_signals) == 6
+        assert sim.vehicle_rate == 400
+        west, south = sim.road_names['west_in_1'][0], sim.road_names['south_in_1'][0]
+        assert sim.traffic_signals[0].roads[:2] == [[sim.roads[west]], [sim.roads[south]]]
+
+    def test_named_roads_and_turns(self, crossing):
+        scenario = load_scenario(crossing, cache=False)
+        sim = scenario.build()
+
+        assert sim.road_names['bend'] == [3, 4, 5, 6, 7]
+        routes = [config['path'].tolist() for _, config in sim.generators[0].vehicles]
+        assert routes == [[0, 1], [0, 3, 4, 5, 6, 7, 2]]
+        assert sim.traffic_signals[0].splits == [1.0, 1.0, 1.0, 1.0]
+
+    def test_vehicle_types_apply(self, crossing):
+        sim = load_scenario(crossing, cache=False).build()
+        generator = sim.generators[0]
+
+        for _ in range(20):
+            vehicle = generator.generate_vehicle()
+            assert vehicle.vehicle_type == 'van'
+            assert (vehicle.l, vehicle.v_max, vehicle.color) == (4, 14, (0, 128, 0))
+
+    def test_defaults_from_config(self, crossing):
+        sim = load_scenario(crossing, cache=False).build()
+
+        assert sim.time_limit == 300
+        assert sim.traffic_signals[0].cycle_length_max == 40
+
+    @pytest.mark.parametrize('change, message', [
+        ({'demand': {'vehicles': [{'route': ['west_in', 'nowhere']}]}},
+         "demand.vehicles[0].route: unknown road 'nowhere'"),
+        ({'demand': {'vehicles': [{'route': ['east_out', 'west_in']}]}}, 'Invalid vehicle path'),
+        ({'signals': [{'groups': [['west_in']], 'cycle_lenght': 20}]}, "signals[0]: unknown option 'cycle_lenght'"),
+        ({'network': {'roads': [{'from': 'X', 'to': [0, 0]}]}}, "network.roads[0].from: unknown node 'X'"),
+        ({'sigals': []}, "unknown section 'sigals'"),
+    ])
+    def test_errors_give_location(self, change, message):
+        data = {
+            'network': {'roads': [{'name': 'west_in', 'from': [-100, 0], 'to': [0, 0]},
+                                  {'name': 'east_out', 'from': [0, 0], 'to': [100, 0]}]},
+            'demand': {'vehicles': [{'route': ['west_in', 'east_out']}]},
+        }
+        data.update(change)
+
+        with pytest.raises(ValueError, match='^test.yaml: .*' + message.replace('[', r'\[').replace(']', r'\]')):
+            compile_scenario(data, source='test.yaml')
+
+    def test_cache_reused_until_sources_change(self, crossing, tmp_path):
+        cache_dir = tmp_path / 'cache'
+        first = load_scenario(crossing, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob('*.pickle'))) == 1
+
+        (tmp_path / 'types.yaml').write_text('{}')
+        with pytest.raises(ValueError, match='vehicle_types'):
+            load_scenario(crossing, cache_dir=cache_dir)
+
+        (tmp_path / 'types.yaml').write_text(TYPES)
+        assert load_scenario(crossing, cache_dir=cache_dir) == first
+
+    def test_picklable_build_for_batches(self, crossing):
+        scenario = pickle.loads(pickle.dumps(load_scenario(crossing, cache=False)))
+
+        assert isinstance(scenario, Scenario)
+        assert isinstance(scenario(), Simulation)
+        first, second = run_batch(scenario, [(None, 30.0, 0), (None, 30.0, 0)], workers=1)
+        assert first == second
+
+
+class TestIntersectionNames:
+    def test_turns_bend_towards_their_exit(self):
+        sim = Simulation()
+        IntersectionBuilder(sim, n=5).build_four_way_intersection(num_lanes=1)
+
+        for approach in ('west', 'south', 'east', 'north'):
+            for side in ('left', 'right'):
+                turn = sim.road_names[f'{approach}_{side}_1']
+                # The first segment leaves the approach heading straight on.
+                start, end = sim.roads[turn[0]].start, sim.roads[turn[0]].end
+                approach_road = sim.roads[sim.road_names[f'{approach}_in_1'][0]]
+                heading = (approach_road.end[0] - approach_road.start[0], approach_road.end[1] - approach_road.start[1])
+                step = (end[0] - start[0], end[1] - start[1])
+                along = heading[0] * step[0] + heading[1] * step[1]
+                across = heading[0] * step[1] - heading[1] * step[0]
+                assert along > abs(across)
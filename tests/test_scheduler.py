@@ -0,0 +1,145 @@
+import math
+import random
+import numpy as np
+import pytest
+from trafficSim.optimizer import SignalPlan
+from trafficSim.road_network import GridBuilder
+from trafficSim.scheduler import Scheduler
+from trafficSim.simulation import Simulation
+from trafficSim.traffic_signal import TrafficSignal
+from tests.helpers import build_crossing
+
+
+class Periodic:
+    def __init__(self, update_period, log, name):
+        self.update_period = update_period
+        self.log = log
+        self.name = name
+
+    def update(self):
+        self.log.append(self.name)
+
+
+class Detector:
+    update_period = 1.0
+
+    def __init__(self):
+        self.times = []
+
+    def update(self, sim):
+        self.times.append(sim.t)
+
+
+class EveryTick(Periodic):
+    def __init__(self, log, name):
+        super().__init__(None, log, name)
+
+
+def run_ticks(scheduler, ticks, dt=0.25):
+    for tick in range(ticks):
+        scheduler.run(tick * dt)
+
+
+def state(sim):
+    return (sim.vehicles_passed, sim.vehicles_present,
+            [(vehicle.x, vehicle.v) for road in sim.roads for vehicle in road.vehicles],
+            [signal.current_cycle_index for signal in sim.traffic_signals])
+
+
+class TestScheduler:
+    def test_periods(self):
+        log = []
+        scheduler = Scheduler()
+        for component in (Periodic(1.0, log, 'a'), EveryTick(log, 'b'), Periodic(0.5, log, 'c')):
+            scheduler.add(component, component.update)
+
+        run_ticks(scheduler, 5)
+
+        # Ticks at 0, 0.25, 0.5, 0.75 and 1.0 s, in the order of registration.
+        assert log == ['a', 'b', 'c', 'b', 'b', 'c', 'b', 'a', 'b', 'c']
+        assert scheduler.updates == len(log)
+
+    def test_wake_and_clock_reset(self):
+        log = []
+        scheduler = Scheduler()
+        component = Periodic(10.0, log, 'a')
+        scheduler.add(component, component.update)
+
+        run_ticks(scheduler, 4)
+        scheduler.wake()
+        scheduler.run(1.0)
+        scheduler.run(1.25)
+        scheduler.run(0.0)
+
+        assert log == ['a'] * 3
+
+
+class TestComponents:
+    def test_signal_changes_only_at_phase_boundaries(self):
+        signal = TrafficSignal([[], [], [], []], {'cycle_length': 10, 'splits': [2, 1, 1, 0.5], 'offset': 3.3})
+        sim = Simulation()
+
+        phases, updates = [], 0
+        due = -math.inf
+        for tick in range(6000):
+            sim.t = tick * sim.dt
+            expected = signal.phase_at(sim.t)
+            if sim.t + 1e-6 >= due:
+                signal.update(sim)
+                due = signal.next_update(sim.t)
+                updates += 1
+            phases.append(signal.current_cycle_index == expected)
+
+        assert all(phases)
+        # Four phase changes per 40 s cycle over 100 s.
+        assert updates <= 12
+
+    def test_short_signal_is_updated_once(self):
+        signal = TrafficSignal([[], []])
+
+        assert signal.next_update(0.0) == math.inf
+
+    def test_waiting_vehicles_keep_generator_due(self):
+        sim = Simulation()
+        sim.create_road((0, 0), (100, 0))
+        gen = sim.create_gen({'vehicle_rate': 600, 'backlog': True, 'vehicles': [[1, {'path': [0]}]]})
+        sim.run(30)
+
+        assert any(gen.backlogs.values())
+        assert gen.next_update(sim.t) == sim.t
+
+    def test_added_component(self):
+        sim = build_crossing()
+        detector = sim.add_component(Detector())
+
+        sim.run(600)
+
+        assert len(detector.times) == 10
+        assert detector.times[1] == pytest.approx(1.0, abs=sim.dt)
+
+
+class TestSchedule:
+    @pytest.mark.parametrize('scenario', ['crossing', 'splits', 'grid'])
+    def test_matches_updating_every_tick(self, scenario):
+        results = []
+        for tolerance in (1e-6, math.inf):
+            random.seed(0)
+            np.random.seed(0)
+            if scenario == 'grid':
+                sim = Simulation()
+                groups = GridBuilder(sim, rows=2, cols=2).build_grid()
+                sim.create_gen({'od': [(o, d, 5.0) for o in groups['entrances'] for d in groups['exits']],
+                                'backlog': True})
+                sim.create_rerouter({'interval': 2.0})
+            else:
+                sim = build_crossing()
+                if scenario == 'splits':
+                    SignalPlan(20.0, ((0.1, 0.2, 0.3, 0.4),), (3.3,)).apply(sim)
+            # An infinite tolerance makes every component due in every tick.
+            sim.scheduler.tolerance = tolerance
+            sim.run(3600)
+            results.append((state(sim), sim.scheduler.updates))
+
+        (scheduled, scheduled_updates), (every_tick, all_updates) = results
+        assert scheduled == every_tick
+        assert scheduled_updates < all_updates
@@ -1,5 +1,6 @@
 import pytest
 from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
 
 
 class TestSimulation:
@@ -93,3 +94,46 @@ class TestSimulation:
 
         assert sim.dt == 0.5
         assert sim.iteration == 5
+
+
+class TestLeaderLookahead:
+    def make_sim(self, lookahead=50.0):
+        sim = Simulation({'lookahead': lookahead})
+        sim.create_roads([((0, 0), (100, 0)), ((100, 0), (101, 0)), ((101, 0), (200, 0))])
+        leader = Vehicle({'vehicle_type': 'car', 'path': [0, 1, 2], 'current_road_index': 2})
+        leader.x = 4.0
+        leader.v = 0.0
+        follower = Vehicle({'vehicle_type': 'car', 'path': [0, 1, 2]})
+        follower.x = 90.0
+        follower.v = 10.0
+        sim.roads[2].vehicles.append(leader)
+        sim.roads[0].vehicles.append(follower)
+        return sim, leader, follower
+
+    def test_leader_found_across_empty_road(self):
+        sim, leader, follower = self.make_sim()
+
+        lead, offset = sim.leader_ahead(0, follower, {})
+
+        assert lead is leader
+        assert offset == pytest.approx(101.0)
+
+    def test_follower_brakes_for_leader_on_next_road(self):
+        sim, leader, follower = self.make_sim()
+        sim.update()
+        assert follower.a < 0
+
+        sim_off, _, follower_off = self.make_sim(lookahead=0)
+        sim_off.update()
+        assert follower_off.a > follower.a
+
+    def test_follower_keeps_gap_across_boundary(self):
+        sim, leader, follower = self.make_sim()
+        starts = [0.0, 100.0, 101.0]
+
+        gaps = []
+        for _ in range(60 * 4):
+            sim.update()
+            gaps.append(starts[2] + leader.x - leader.l - starts[follower.current_road_index] - follower.x)
+
+        assert min(gaps) > 0
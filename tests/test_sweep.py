@@ -0,0 +1,63 @@
+import asyncio
+from trafficSim.batch import run_headless
+from trafficSim.optimizer import SignalPlan
+from trafficSim.sweep import SweepCoordinator, run_sweep
+from tests.helpers import build_crossing
+
+
+def make_jobs(horizon=20.0):
+    return [(SignalPlan(float(c)), horizon, 0) for c in (15, 20, 25)]
+
+
+class TestSweepCoordinator:
+    def test_streams_progress_and_results(self):
+        events = []
+
+        results = run_sweep(build_crossing, make_jobs(), {'max_concurrency': 2, 'progress_interval': 5.0},
+                            on_event=events.append)
+
+        for index, job in enumerate(make_jobs()):
+            assert results[index] == run_headless(build_crossing, *job)
+            progress = [e.metrics['t'] for e in events if e.index == index and e.kind == 'progress']
+            assert len(progress) == 3
+            assert progress == sorted(progress)
+        assert [e.kind for e in events].count('done') == 3
+
+    def test_resume_skips_completed_jobs(self, tmp_path):
+        path = tmp_path / 'sweep.jsonl'
+        config = {'max_concurrency': 2, 'results_path': str(path)}
+        first = run_sweep(build_crossing, make_jobs(), config)
+        lines = path.read_text().splitlines()
+        path.write_text('\n'.join(lines[:2]) + '\n{"key": "trunc')
+        events = []
+
+        second = run_sweep(build_crossing, make_jobs(), config, on_event=events.append)
+
+        assert second == first
+        assert sorted(e.cached for e in events if e.kind == 'done') == [False, True, True]
+        assert len(SweepCoordinator(build_crossing, config).completed()) == 3
+
+    def test_cancel_stops_all_jobs(self):
+        coordinator = SweepCoordinator(build_crossing, {'max_concurrency': 1, 'progress_interval': 1.0})
+        final = {}
+
+        async def consume():
+            async for event in coordinator.events(make_jobs(horizon=600.0)):
+                if event.kind == 'progress':
+                    coordinator.cancel()
+                else:
+                    final[event.index] = event.kind
+
+        asyncio.run(consume())
+
+        assert final == {0: 'cancelled', 1: 'cancelled', 2: 'cancelled'}
+
+    def test_failed_job_reported(self):
+        events = []
+        jobs = [(SignalPlan(20.0, ((1.0, 1.0),)), 10.0, 0), (None, 10.0, 0)]
+
+        results = run_sweep(build_crossing, jobs, {'max_concurrency': 2}, on_event=events.append)
+
+        failed = [e for e in events if e.kind == 'failed']
+        assert len(failed) == 1 and 'splits' in failed[0].error
+        assert results[0] is None and results[1] is not None
@@ -0,0 +1,70 @@
+import http.client
+import json
+import urllib.error
+import urllib.request
+import pytest
+from trafficSim.telemetry import TelemetryServer
+from tests.helpers import build_crossing
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+class TestTelemetryServer:
+    def test_metrics_endpoint(self):
+        sim = build_crossing()
+        with TelemetryServer(sim, {'port': 0, 'sample_interval': 0.0}) as server:
+            sim.run(120)
+            for _ in range(50):
+                metrics = get_json(server.url + '/metrics')
+                if metrics.get('frame_count') == 120:
+                    break
+
+        assert metrics['frame_count'] == 120
+        assert metrics['t'] == pytest.approx(2.0)
+        assert len(metrics['occupancy']) == len(sim.roads)
+        assert metrics['signals'] == [sim.traffic_signals[0].current_cycle_index]
+        assert metrics['ticks_per_second'] > 0
+
+    def test_stream_delivers_snapshots(self):
+        sim = build_crossing()
+        with TelemetryServer(sim, {'port': 0, 'sample_interval': 0.0}) as server:
+            connection = http.client.HTTPConnection(server.host, server.port, timeout=5)
+            connection.request('GET', '/stream')
+            response = connection.getresponse()
+            assert response.getheader('Content-Type') == 'text/event-stream'
+            sim.run(5)
+            frames = []
+            while len(frames) < 3:
+                line = response.fp.readline().decode().strip()
+                if line.startswith('data: '):
+                    frames.append(json.loads(line[6:])['frame_count'])
+            connection.close()
+
+        assert frames == sorted(frames)
+
+    def test_sampling_is_rate_limited(self):
+        sim = build_crossing()
+        server = TelemetryServer(sim, {'sample_interval': 3600.0})
+        sim.observers.append(server.observe)
+
+        sim.run(100)
+
+        assert server.samples == 1
+
+    def test_full_queue_drops_oldest(self):
+        sim = build_crossing()
+        server = TelemetryServer(sim, {'sample_interval': 0.0, 'queue_size': 4})
+        sim.observers.append(server.observe)
+
+        sim.run(50)
+
+        assert server.snapshots.qsize() == 4
+        assert server.snapshots.get_nowait()['frame_count'] == 47
+
+    def test_unknown_path(self):
+        sim = build_crossing()
+        with TelemetryServer(sim, {'port': 0}) as server, pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url + '/nope', timeout=5)
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from trafficSim.scenario import compile_scenario
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle_generator import EntranceBacklog
+
+
+def build_entrance(rate, backlog=True, pool=None):
+    # One entrance road takes about 40 vehicles per minute.
+    sim = Simulation()
+    if pool is not None:
+        sim.create_vehicle_pool(pool)
+    sim.create_roads([((-100, 0), (0, 0)), ((0, 0), (100, 0))])
+    sim.create_gen({'vehicle_rate': rate, 'backlog': backlog,
+                    'vehicles': [[1, {'path': [0, 1], 'vehicle_type': 'car'}]]})
+    return sim
+
+
+class TestEntranceBacklog:
+    def test_first_in_first_out_across_growth(self):
+        backlog = EntranceBacklog(capacity=4)
+        expected = []
+        for i in range(40):
+            backlog.push(float(i), i, -1)
+            expected.append(i)
+            if i % 3 == 0:
+                assert backlog.peek()[1] == expected.pop(0)
+                backlog.pop()
+
+        drained = []
+        while backlog:
+            drained.append(backlog.peek()[1])
+            backlog.pop()
+
+        assert drained == expected
+
+    def test_compact(self):
+        backlog = EntranceBacklog()
+        for i in range(10000):
+            backlog.push(float(i), 0, -1)
+
+        assert backlog.times.nbytes + backlog.choices.nbytes + backlog.routes.nbytes < 16 * 2 ** 14 + 1
+
+
+class TestBacklog:
+    def test_demand_is_kept(self):
+        np.random.seed(0)
+        sim = build_entrance(120)
+        sim.run(60 * 60)
+        gen = sim.generators[0]
+
+        # Every arrival has either entered or is still waiting.
+        assert sim.vehicles_spawned + gen.waiting == 119
+        assert gen.waiting > 50
+        assert sim.metrics()['vehicles_waiting'] == gen.waiting
+        assert sim.metrics()['entry_delay'] == pytest.approx(gen.entry_delay) and gen.entry_delay > 5
+
+    def test_without_backlog_demand_is_lost(self):
+        np.random.seed(0)
+        sim = build_entrance(120, backlog=False)
+        sim.run(60 * 60)
+
+        assert sim.vehicles_spawned < 80
+        assert sim.metrics()['vehicles_waiting'] == 0
+
+    def test_undersaturated_runs_match(self):
+        spawned = []
+        for backlog in (False, True):
+            np.random.seed(0)
+            sim = build_entrance(20, backlog)
+            sim.run(60 * 60)
+            spawned.append(sim.vehicles_spawned)
+
+        assert spawned[0] == spawned[1] == 19
+        assert sim.generators[0].entry_delay < sim.dt
+
+    def test_arrival_time_kept(self):
+        np.random.seed(0)
+        sim = build_entrance(120)
+        sim.run(30 * 60)
+        last = sim.roads[0].vehicles[-1]
+
+        assert last.time_entered - last.time_added > 1.0
+        assert last.time_added == pytest.approx(round(last.time_added / 0.5) * 0.5)
+
+    def test_delete_all_vehicles_empties_backlog(self):
+        np.random.seed(0)
+        sim = build_entrance(120, pool={})
+        sim.run(30 * 60)
+        gen = sim.generators[0]
+        gen.delete_all_vehicles()
+
+        assert gen.waiting == 0
+        assert sim.vehicle_pool.in_use == 0
+        # A new iteration starts its delay statistics afresh.
+        assert gen.released == 0 and gen.entry_delay == 0.0
+        assert sim.metrics()['entry_delay'] == 0.0
+
+    def test_scenario_option(self):
+        scenario = compile_scenario({
+            'network': {'roads': [{'name': 'road', 'from': [0, 0], 'to': [100, 0]}]},
+            'demand': {'vehicles': [{'route': ['road']}], 'backlog': True},
+        })
+
+        assert scenario.build().generators[0].backlog
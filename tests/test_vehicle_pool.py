@@ -0,0 +1,118 @@
+import gc
+import math
+import numpy as np
+import pytest
+from trafficSim.scenario import compile_scenario
+from trafficSim.simulation import Simulation
+from trafficSim.vehicle import Vehicle
+from trafficSim.vehicle_pool import VehiclePool
+
+
+def build_busy(pool=None):
+    # Demand well above what the entrance takes, so upcoming vehicles are often thrown away.
+    sim = Simulation()
+    if pool is not None:
+        sim.create_vehicle_pool(pool)
+    sim.create_roads([((-100, 0), (0, 0)), ((0, 0), (60, 0)), ((0, 0), (0, -80))])
+    sim.create_gen({'vehicle_rate': 200, 'vehicles': [[3, {'path': [0, 1]}], [1, {'path': [0, 2]}]]})
+    return sim
+
+
+def positions(sim):
+    return [(vehicle.id, vehicle.x, vehicle.v) for road in sim.roads for vehicle in road.vehicles]
+
+
+class TestVehiclePool:
+    def test_reset_matches_new_vehicle(self):
+        config = {'vehicle_type': 'truck', 'path': [0, 2], 'v': 3.0}
+        np.random.seed(1)
+        fresh = vars(Vehicle(config)).copy()
+        np.random.seed(1)
+        recycled = Vehicle({'vehicle_type': 'bus'})
+        recycled.x, recycled.stopped, recycled.slot = 40.0, True, 7
+        np.random.seed(1)
+        recycled.reset(config)
+
+        assert vars(recycled) == fresh
+
+    def test_runs_are_unchanged(self):
+        runs = []
+        for pool in (None, {'preallocate': 10}):
+            np.random.seed(0)
+            sim = build_busy(pool)
+            sim.run(3000)
+            runs.append((sim.metrics(), positions(sim)))
+
+        assert runs[0] == runs[1]
+
+    def test_steady_state_allocates_nothing(self):
+        np.random.seed(0)
+        sim = build_busy({})
+        sim.run(3000)
+        allocated = sim.vehicle_pool.allocated
+        sim.run(3000)
+        stats = sim.vehicle_pool.stats()
+
+        assert stats['allocated'] == allocated
+        assert stats['reused'] > 0 and stats['released'] > 0
+        assert stats['in_use'] == sim.vehicles_present + 1
+        assert stats['in_use'] + stats['free'] == stats['allocated']
+
+    def test_capacity_ceiling(self):
+        np.random.seed(0)
+        sim = build_busy({'capacity': 5})
+        for _ in range(3000):
+            sim.update()
+            assert sim.vehicle_pool.in_use <= 5
+
+        assert sim.vehicle_pool.stats()['refused'] > 0
+        assert sim.vehicles_passed > 0
+
+    def test_delete_all_vehicles_releases(self):
+        sim = build_busy({})
+        sim.run(600)
+        pool = sim.vehicle_pool
+        released, acquired = pool.released, pool.acquired
+        sim.generators[0].delete_all_vehicles()
+
+        # The upcoming vehicle is released too and a new one drawn.
+        assert pool.released == released + sim.vehicles_present + 1
+        assert pool.acquired == acquired + 1
+        assert pool.in_use == 1
+
+    def test_steady_state_runs_no_collections(self):
+        np.random.seed(0)
+        sim = build_busy({})
+        sim.time_limit = math.inf
+        sim.run(3000)
+        collections = []
+
+        def count(event, info):
+            if event == 'start':
+                collections.append(info['generation'])
+        gc.callbacks.append(count)
+        try:
+            sim.run(6000)
+        finally:
+            gc.callbacks.remove(count)
+
+        assert collections == []
+
+    def test_must_precede_generators(self):
+        with pytest.raises(ValueError):
+            build_busy().create_vehicle_pool()
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            VehiclePool({'capacity': 4, 'preallocate': 5})
+
+    def test_scenario_section(self):
+        scenario = compile_scenario({
+            'network': {'roads': [{'name': 'road', 'from': [0, 0], 'to': [100, 0]}]},
+            'demand': {'vehicles': [{'route': ['road']}]},
+            'vehicle_pool': {'capacity': 50, 'preallocate': 20},
+        })
+        sim = scenario.build()
+
+        assert sim.vehicle_pool.stats()['capacity'] == 50
+        assert sim.vehicle_pool.stats()['allocated'] == 20
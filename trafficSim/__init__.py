@@ -1,10 +1,33 @@
 from .curve import curve_points, curve_road, turn_road, TURN_LEFT, TURN_RIGHT
 from .vehicle import Vehicle
+from .integrators import INTEGRATORS, integrator_report
 from .road import Road
+from .multilane_road import MultiLaneRoad
+from .meso_road import MesoRoad
+from .road_graph import RoadGraph
+from .rerouting import Rerouter
+from .conflict_zone import ConflictZone
+from .scheduler import Scheduler
 from .simulation import Simulation
 from .window import Window
+from .frame_budget import FrameBudget
 from .vehicle_generator import VehicleGenerator
+from .vehicle_pool import VehiclePool
 from .traffic_signal import TrafficSignal
+from .road_network import IntersectionBuilder, GridBuilder
+from .result_cache import ResultCache
+from .batch import prepare_run, run_headless, run_batch
+from .ensemble import EnsembleSimulation, run_ensemble
+from .ctm import CellTransmissionModel, TriangularDiagram, calibrate_diagram
+from .optimizer import SignalPlan, SignalPlanOptimizer
+from .replication import ReplicationController, RunningStats
+from .sweep import SweepCoordinator, SweepEvent, run_sweep
+from .telemetry import TelemetryServer
+from .allocations import AllocationTracker
+from .recorder import TrajectoryRecorder, Recording
+from .analytics import FundamentalDiagram, SpaceTimeDiagram, TravelTimes, analyze, intersection_report
+from .render import ReplayWindow, render_recording, encode_video
+from .scenario import Scenario, compile_scenario, load_scenario
 
 __all__ = [
     'curve_points',
@@ -13,9 +36,52 @@ __all__ = [
     'TURN_LEFT',
     'TURN_RIGHT',
     'Vehicle',
+    'INTEGRATORS',
+    'integrator_report',
     'Road',
+    'MultiLaneRoad',
+    'MesoRoad',
+    'RoadGraph',
+    'Rerouter',
+    'ConflictZone',
+    'Scheduler',
     'Simulation',
     'Window',
+    'FrameBudget',
     'VehicleGenerator',
+    'VehiclePool',
     'TrafficSignal',
+    'IntersectionBuilder',
+    'GridBuilder',
+    'ResultCache',
+    'prepare_run',
+    'run_headless',
+    'run_batch',
+    'EnsembleSimulation',
+    'run_ensemble',
+    'CellTransmissionModel',
+    'TriangularDiagram',
+    'calibrate_diagram',
+    'SignalPlan',
+    'SignalPlanOptimizer',
+    'ReplicationController',
+    'RunningStats',
+    'SweepCoordinator',
+    'SweepEvent',
+    'run_sweep',
+    'TelemetryServer',
+    'AllocationTracker',
+    'TrajectoryRecorder',
+    'Recording',
+    'FundamentalDiagram',
+    'SpaceTimeDiagram',
+    'TravelTimes',
+    'analyze',
+    'intersection_report',
+    'ReplayWindow',
+    'render_recording',
+    'encode_video',
+    'Scenario',
+    'compile_scenario',
+    'load_scenario',
 ]
\ No newline at end of file
@@ -0,0 +1,224 @@
+import gc
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.window import Window
+
+# Phases of a tick in the order they run, and the drawing of a window frame.
+PHASES = ('roads', 'generators', 'signals', 'conflict_zones', 'rerouter', 'components', 'hand_off', 'draw')
+
+# Allocations made by the tracker itself or by the import machinery are not reported.
+_IGNORED = (tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'), tracemalloc.Filter(False, '<unknown>'))
+
+
+class PhaseStats:
+    """Running allocation totals of one phase."""
+
+    __slots__ = ('calls', 'allocated', 'max_allocated', 'retained', 'blocks', 'collections')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.allocated = 0
+        self.max_allocated = 0
+        self.retained = 0
+        self.blocks = 0
+        self.collections = 0
+
+
+class AllocationTracker(Configurable):
+    """Opt-in accounting of the memory each phase of a tick allocates.
+
+    While started, the tracker traces allocations with ``tracemalloc`` and
+    wraps the road update, the updates of the generators, signals, conflict
+    zones, rerouter and added components, the hand-offs and, with
+    ``attach_window``, the window's ``draw``. Around each call it records:
+
+    - ``allocated``: the growth of traced memory to its peak within the
+      call, i.e. the memory the call needed at once (``tracemalloc`` does not
+      count memory allocated and freed again below that peak)
+    - ``retained``: the traced memory still held when the call returns
+    - ``blocks``: the change in Python's allocated memory blocks, about the
+      number of objects the call left alive
+    - ``collections``: garbage collections that ran during the call
+
+    Memory allocated in one phase is often freed in another, such as a
+    vehicle created by a generator and dropped at its last hand-off, so
+    retained memory per phase is no proof of a leak. Leaks are found from
+    ``tracemalloc`` snapshots taken every ``snapshot_interval`` ticks:
+    ``leaks`` lists the source lines whose memory grew in every interval.
+
+    Components added after ``start`` are not wrapped. Tracing slows the run
+    several times over, so the tracker is meant for diagnosis only.
+    """
+
+    def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
+        self.sim = sim
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.frames = 1
+        self.snapshot_interval = 600
+
+    def init_properties(self) -> None:
+        self.stats: Dict[str, PhaseStats] = {phase: PhaseStats() for phase in PHASES}
+        self.ticks = 0
+        self.snapshots: List[tracemalloc.Snapshot] = []
+        self.snapshot_ticks: List[int] = []
+        self.window: Optional['Window'] = None
+        self._phase: Optional[str] = None
+        self._wrapped: List[Tuple[Any, str]] = []
+        self._started_tracing = False
+
+    def start(self) -> 'AllocationTracker':
+        """Start tracing and wrap the phases; returns self."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._wrap('roads', self.sim, 'update_roads')
+        for gen in self.sim.generators:
+            self._wrap('generators', gen, 'update')
+        for signal in self.sim.traffic_signals:
+            self._wrap('signals', signal, 'update')
+        for zone in self.sim.conflict_zones:
+            self._wrap('conflict_zones', zone, 'update')
+        if self.sim.rerouter is not None:
+            self._wrap('rerouter', self.sim.rerouter, 'update')
+        for component in self.sim.components:
+            self._wrap('components', component, 'update')
+        self._wrap('hand_off', self.sim, 'hand_off_vehicles')
+        if self.window is not None:
+            self._wrap('draw', self.window, 'draw')
+        gc.callbacks.append(self._on_collection)
+        self.sim.observers.append(self.observe)
+        self._take_snapshot()
+        return self
+
+    def stop(self) -> None:
+        """Unwrap the phases, take a last snapshot and stop tracing if the tracker started it."""
+        if self.observe in self.sim.observers:
+            self.sim.observers.remove(self.observe)
+        if self._on_collection in gc.callbacks:
+            gc.callbacks.remove(self._on_collection)
+        for owner, name in self._wrapped:
+            delattr(owner, name)
+        self._wrapped = []
+        if tracemalloc.is_tracing():
+            if self.snapshot_ticks[-1:] != [self.ticks]:
+                self._take_snapshot()
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def __enter__(self) -> 'AllocationTracker':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def attach_window(self, window: 'Window') -> 'AllocationTracker':
+        """Also track the drawing of ``window``; call before ``start``."""
+        self.window = window
+        return self
+
+    def _wrap(self, phase: str, owner: Any, name: str) -> None:
+        method = getattr(owner, name)
+        stats = self.stats[phase]
+
+        def measured(*args: Any, **kwargs: Any) -> Any:
+            self._phase = phase
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                blocks = sys.getallocatedblocks() - blocks
+                current, peak = tracemalloc.get_traced_memory()
+                self._phase = None
+                stats.calls += 1
+                stats.allocated += peak - start
+                stats.max_allocated = max(stats.max_allocated, peak - start)
+                stats.retained += current - start
+                stats.blocks += blocks
+
+        setattr(owner, name, measured)
+        self._wrapped.append((owner, name))
+
+    def _on_collection(self, event: str, info: Dict[str, Any]) -> None:
+        if event == 'start' and self._phase is not None:
+            self.stats[self._phase].collections += 1
+
+    def _take_snapshot(self) -> None:
+        self.snapshots.append(tracemalloc.take_snapshot().filter_traces(_IGNORED))
+        self.snapshot_ticks.append(self.ticks)
+
+    def observe(self, sim: 'Simulation') -> None:
+        """Simulation observer: count the tick and take a snapshot when one is due."""
+        self.ticks += 1
+        if self.snapshot_interval > 0 and self.ticks % self.snapshot_interval == 0:
+            self._take_snapshot()
+
+    def report(self) -> Dict[str, Any]:
+        """Return the allocations of each phase that ran, averaged per tick.
+
+        ``max_allocated`` is the largest allocation of a single call;
+        ``collections`` counts all the garbage collections of the phase.
+        """
+        ticks = max(self.ticks, 1)
+        phases: Dict[str, Dict[str, float]] = {}
+        for phase, stats in self.stats.items():
+            if stats.calls == 0:
+                continue
+            phases[phase] = {
+                'calls': stats.calls,
+                'allocated_per_tick': stats.allocated / ticks,
+                'max_allocated': stats.max_allocated,
+                'retained_per_tick': stats.retained / ticks,
+                'blocks_per_tick': stats.blocks / ticks,
+                'collections': stats.collections,
+            }
+        return {'ticks': self.ticks, 'traced': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+                'phases': phases}
+
+    def leaks(self, min_growth: int = 1024) -> List[Dict[str, Any]]:
+        """Return the source lines whose memory grew in every snapshot interval.
+
+        The first interval is left out as warm-up, so at least four
+        snapshots are needed to report anything.
+
+        Args:
+            min_growth: Bytes a line must have grown by in total to be reported
+
+        Returns:
+            One entry per line with its ``location``, total ``growth`` in
+            bytes, ``count`` of new blocks and the ``size`` it holds now,
+            largest growth first
+        """
+        if len(self.snapshots) < 4:
+            return []
+        snapshots = self.snapshots[1:]
+        growing: Optional[set] = None
+        for before, after in zip(snapshots, snapshots[1:], strict=False):
+            grown = {stat.traceback for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0}
+            growing = grown if growing is None else growing & grown
+        leaks = []
+        for stat in snapshots[-1].compare_to(snapshots[0], 'lineno'):
+            if growing and stat.traceback in growing and stat.size_diff >= min_growth:
+                frame = stat.traceback[0]
+                leaks.append({'location': f'{frame.filename}:{frame.lineno}', 'growth': stat.size_diff,
+                              'count': stat.count_diff, 'size': stat.size})
+        return leaks
+
+    def top_allocations(self, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """Return the ``(location, size, count)`` of the source lines holding the most memory now."""
+        if not self.snapshots:
+            return []
+        stats = self.snapshots[-1].statistics('lineno')[:limit]
+        return [(f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}', stat.size, stat.count)
+                for stat in stats]
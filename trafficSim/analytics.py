@@ -0,0 +1,364 @@
+import math
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from trafficSim.recorder import Recording
+
+# Approaches built by ``IntersectionBuilder.build_four_way_intersection`` and
+# where their straight-through traffic leaves.
+APPROACHES = ('west', 'south', 'east', 'north')
+OPPOSITE = {'west': 'east', 'south': 'north', 'east': 'west', 'north': 'south'}
+
+# Rows of a block pairing a vehicle in one frame with itself in the next.
+Pairs = Tuple[np.ndarray, np.ndarray]
+
+
+def road_lengths(recording: Recording) -> np.ndarray:
+    roads = recording.meta['roads']
+    return np.array([road.get('length', math.dist(road['start'], road['end'])) for road in roads])
+
+
+def blocks(recording: Recording, columns: Sequence[str] = ('id', 'road', 'x')) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream a recording chunk by chunk as flat per-vehicle rows.
+
+    Only ``columns`` and the frame index of every chunk are read, and one
+    chunk is held at a time, so recordings larger than memory can be
+    reduced. Each block adds the frame time ``t`` and global ``frame``
+    index of every row, and the times of the chunk's frames as
+    ``frame_times``, including frames without vehicles. It also starts
+    with the last frame of the previous chunk, marked False in ``fresh``,
+    so that consecutive frames of a vehicle pair up across chunk
+    boundaries.
+    """
+    previous: Optional[Dict[str, np.ndarray]] = None
+    for index, chunk in enumerate(recording.meta['chunks']):
+        data = recording.read(index, ['offsets', 't', *columns])
+        counts = np.diff(data['offsets'])
+        block = {name: data[name] for name in columns}
+        block['t'] = np.repeat(data['t'], counts)
+        block['frame'] = np.repeat(np.arange(chunk['start'], chunk['start'] + chunk['frames']), counts)
+        block['fresh'] = np.ones(len(block['t']), dtype=bool)
+        last = {name: values[int(data['offsets'][-2]):] for name, values in block.items()}
+        if previous is not None:
+            block = {name: np.concatenate([previous[name], block[name]]) for name in block}
+        block['frame_times'] = data['t']
+        yield block
+        previous = last
+        previous['fresh'] = np.zeros(len(previous['fresh']), dtype=bool)
+
+
+def pairs(block: Dict[str, np.ndarray]) -> Pairs:
+    """Rows ``(a, b)`` where ``b`` is the vehicle of row ``a`` one frame later."""
+    order = np.lexsort((block['frame'], block['id']))
+    ids = block['id'][order]
+    frames = block['frame'][order]
+    same = (ids[1:] == ids[:-1]) & (frames[1:] == frames[:-1] + 1)
+    return order[:-1][same], order[1:][same]
+
+
+def _bins(t: np.ndarray, width: float) -> np.ndarray:
+    return np.floor(t / width + 1e-9).astype(np.int64)
+
+
+class _Binned:
+    """Sums over (time bin, column) cells, growing along the time axis."""
+
+    def __init__(self, columns: int) -> None:
+        self.sums = np.zeros((0, columns))
+
+    def add(self, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray | float = 1.0) -> None:
+        if len(rows) == 0:
+            return
+        columns = self.sums.shape[1]
+        n = int(rows.max()) + 1
+        if n > len(self.sums):
+            self.sums = np.vstack([self.sums, np.zeros((n - len(self.sums), columns))])
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), rows.shape)
+        self.sums[:n] += np.bincount(rows * columns + cols, weights=weights, minlength=n * columns).reshape(n, columns)
+
+    def padded(self, rows: int) -> np.ndarray:
+        return np.vstack([self.sums, np.zeros((max(rows - len(self.sums), 0), self.sums.shape[1]))])
+
+
+class _Coverage:
+    """Simulated time covered by the frames of each time bin.
+
+    Every frame stands for the time until the next one; the last frame of
+    the recording has none after it and covers nothing.
+    """
+
+    def __init__(self, width: float) -> None:
+        self.width = width
+        self.binned = _Binned(1)
+        self.last: Optional[float] = None
+
+    def add(self, block: Dict[str, np.ndarray]) -> None:
+        times = block['frame_times']
+        if self.last is not None:
+            times = np.concatenate([[self.last], times])
+        if len(times):
+            starts = times[:-1]
+            self.binned.add(_bins(starts, self.width), np.zeros(len(starts), dtype=np.int64), np.diff(times))
+            self.last = float(times[-1])
+
+    def seconds(self, rows: int) -> np.ndarray:
+        return self.binned.padded(rows)[:, 0]
+
+
+class FundamentalDiagram:
+    """Flow, density and speed of groups of roads per time interval.
+
+    Uses Edie's definitions over each road group and ``interval``. Density
+    is the time spent by all vehicles divided by the group's length and
+    the covered time. Flow is the distance they travelled divided by the
+    same product. Both come from the moves of each vehicle between
+    consecutive frames, binned by the time the move starts. A move onto
+    another road counts the rest of the old road and the start of the new
+    one, and its time is split between them in proportion.
+    """
+
+    def __init__(self, recording: Recording, groups: Dict[str, List[int]], interval: float = 60.0) -> None:
+        self.names = list(groups)
+        self.interval = interval
+        self.lengths = road_lengths(recording)
+        self.member = np.zeros((len(self.names), len(self.lengths)), dtype=bool)
+        for g, name in enumerate(self.names):
+            self.member[g, groups[name]] = True
+        self.group_length = self.member @ self.lengths
+        self.time_spent = _Binned(len(self.names))
+        self.distance = _Binned(len(self.names))
+        self.coverage = _Coverage(interval)
+
+    def add(self, block: Dict[str, np.ndarray], moves: Pairs) -> None:
+        self.coverage.add(block)
+        a, b = moves
+        road_a, road_b = block['road'][a], block['road'][b]
+        x_a, x_b = block['x'][a].astype(float), block['x'][b].astype(float)
+        rows = _bins(block['t'][a], self.interval)
+        dt = block['t'][b] - block['t'][a]
+        same = road_a == road_b
+        # Distance on the road of each move's start, and on the next road after a hand-off.
+        on_a = np.where(same, x_b - x_a, self.lengths[road_a] - x_a).clip(min=0.0)
+        on_b = np.where(same, 0.0, x_b).clip(min=0.0)
+        total = on_a + on_b
+        share_a = np.divide(on_a, total, out=np.where(same, 1.0, 0.5), where=total > 0)
+        for g in range(len(self.names)):
+            for road, distance, share in ((road_a, on_a, share_a), (road_b, on_b, 1 - share_a)):
+                inside = self.member[g, road]
+                cols = np.full(inside.sum(), g)
+                self.time_spent.add(rows[inside], cols, (dt * share)[inside])
+                self.distance.add(rows[inside], cols, distance[inside])
+
+    def result(self) -> Dict[str, Any]:
+        """Per-group arrays over the time bins starting at ``t``.
+
+        Returns:
+            ``t`` (s), and dictionaries by group name of ``density``
+            (vehicles/km) and ``flow`` (vehicles/h), per road averaged
+            over the group, and ``speed`` (m/s, NaN without vehicles)
+        """
+        rows = max(len(self.time_spent.sums), len(self.distance.sums), len(self.coverage.binned.sums))
+        area = np.outer(self.coverage.seconds(rows), self.group_length)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            density = self.time_spent.padded(rows) / area * 1000
+            flow = self.distance.padded(rows) / area * 3600
+            speed = self.distance.padded(rows) / self.time_spent.padded(rows)
+        return {
+            't': np.arange(rows) * self.interval,
+            'density': {name: density[:, g] for g, name in enumerate(self.names)},
+            'flow': {name: flow[:, g] for g, name in enumerate(self.names)},
+            'speed': {name: speed[:, g] for g, name in enumerate(self.names)},
+        }
+
+
+class SpaceTimeDiagram:
+    """Density and speed heatmaps over time and distance along a stretch of road.
+
+    A stretch is a list of chains of roads driven one after another, such
+    as an approach, the junction and the exit. Chains are parallel lanes
+    of the same stretch: positions on each are measured from the chain's
+    start, and densities add up over them. Each move of a vehicle between
+    consecutive frames counts its time and speed in the cell it starts in.
+    """
+
+    def __init__(self, recording: Recording, chains: List[List[int]], time_bin: float = 5.0,
+                 space_bin: float = 10.0) -> None:
+        self.time_bin = time_bin
+        self.space_bin = space_bin
+        lengths = road_lengths(recording)
+        self.offset = np.full(len(lengths), np.nan)
+        self.chain = np.full(len(lengths), -1)
+        self.length = 0.0
+        for c, roads in enumerate(chains):
+            start = 0.0
+            for road in roads:
+                self.offset[road] = start
+                self.chain[road] = c
+                start += lengths[road]
+            self.length = max(self.length, start)
+        self.columns = max(int(math.ceil(self.length / space_bin)), 1)
+        self.occupancy = _Binned(self.columns)
+        self.speed_sum = _Binned(self.columns)
+        self.speed_count = _Binned(self.columns)
+        self.coverage = _Coverage(time_bin)
+
+    def _cells(self, block: Dict[str, np.ndarray], rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        position = self.offset[block['road'][rows]] + block['x'][rows]
+        cols = np.clip((position / self.space_bin).astype(np.int64), 0, self.columns - 1)
+        return _bins(block['t'][rows], self.time_bin), cols
+
+    def add(self, block: Dict[str, np.ndarray], moves: Pairs) -> None:
+        self.coverage.add(block)
+        a, b = moves
+        along = self.chain[block['road'][a]]
+        a, b, along = a[along >= 0], b[along >= 0], along[along >= 0]
+        dt = block['t'][b] - block['t'][a]
+        rows, cols = self._cells(block, a)
+        self.occupancy.add(rows, cols, dt)
+        keep = along == self.chain[block['road'][b]]
+        distance = (self.offset[block['road'][b]] + block['x'][b]) - (self.offset[block['road'][a]] + block['x'][a])
+        self.speed_sum.add(rows[keep], cols[keep], (distance / dt)[keep])
+        self.speed_count.add(rows[keep], cols[keep])
+
+    def result(self) -> Dict[str, Any]:
+        """Heatmaps indexed ``[time bin, space bin]``.
+
+        Returns:
+            ``t`` and ``x``, the bin starts (s, m), ``density``
+            (vehicles/km over all chains) and ``speed`` (m/s, NaN where no
+            vehicle moved)
+        """
+        rows = max(len(self.occupancy.sums), len(self.speed_sum.sums), len(self.coverage.binned.sums))
+        seconds = self.coverage.seconds(rows)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            density = self.occupancy.padded(rows) / (seconds * self.space_bin) * 1000
+            speed = self.speed_sum.padded(rows) / self.speed_count.padded(rows)
+        return {
+            't': np.arange(rows) * self.time_bin,
+            'x': np.arange(self.columns) * self.space_bin,
+            'density': density,
+            'speed': speed,
+        }
+
+
+class TravelTimes:
+    """Time from the first to the last frame each vehicle was seen in.
+
+    Per-vehicle state lives in arrays indexed by the vehicle ids given at
+    spawn. Vehicles already present in the first frame or still present
+    in the last one did not make a whole trip and are left out.
+    """
+
+    def __init__(self) -> None:
+        self.first = np.zeros(0)
+        self.last = np.zeros(0)
+        self.entry = np.zeros(0, dtype=np.int32)
+        self.exit = np.zeros(0, dtype=np.int32)
+        self.t_start = math.inf
+        self.t_end = -math.inf
+
+    def _grow(self, size: int) -> None:
+        if size <= len(self.first):
+            return
+        size = max(size, 2 * len(self.first))
+        extra = size - len(self.first)
+        self.first = np.concatenate([self.first, np.full(extra, np.inf)])
+        self.last = np.concatenate([self.last, np.full(extra, -np.inf)])
+        self.entry = np.concatenate([self.entry, np.full(extra, -1, dtype=np.int32)])
+        self.exit = np.concatenate([self.exit, np.full(extra, -1, dtype=np.int32)])
+
+    def add(self, block: Dict[str, np.ndarray], moves: Pairs) -> None:
+        if len(block['frame_times']):
+            self.t_start = min(self.t_start, float(block['frame_times'][0]))
+            self.t_end = max(self.t_end, float(block['frame_times'][-1]))
+        fresh = block['fresh']
+        ids, t, roads = block['id'][fresh], block['t'][fresh], block['road'][fresh]
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.max()) + 1)
+        # Rows are in frame order: the first occurrence in a block is the earliest.
+        seen, first = np.unique(ids, return_index=True)
+        new = np.isinf(self.first[seen])
+        self.first[seen[new]] = t[first[new]]
+        self.entry[seen[new]] = roads[first[new]]
+        seen, last = np.unique(ids[::-1], return_index=True)
+        last = len(ids) - 1 - last
+        self.last[seen] = t[last]
+        self.exit[seen] = roads[last]
+
+    def result(self) -> Dict[str, np.ndarray]:
+        """Completed trips: ``id``, ``entry_road``, ``exit_road`` and ``travel_time`` (s)."""
+        complete = (self.first > self.t_start) & (self.last < self.t_end) & np.isfinite(self.first)
+        ids = np.flatnonzero(complete)
+        return {
+            'id': ids,
+            'entry_road': self.entry[ids],
+            'exit_road': self.exit[ids],
+            'travel_time': self.last[ids] - self.first[ids],
+        }
+
+    def histogram(self, groups: Dict[str, List[int]], bins: Sequence[float] | np.ndarray) -> Dict[str, np.ndarray]:
+        """Counts of completed trips per travel-time bin, by the group of their entry road."""
+        trips = self.result()
+        return {name: np.histogram(trips['travel_time'][np.isin(trips['entry_road'], roads)], bins=bins)[0]
+                for name, roads in groups.items()}
+
+
+def analyze(recording: Recording, analyses: Sequence[Any]) -> Sequence[Any]:
+    """Feed a recording once, chunk by chunk, to analyses with an ``add(block, pairs)`` method."""
+    for block in blocks(recording):
+        moves = pairs(block)
+        for analysis in analyses:
+            analysis.add(block, moves)
+    return analyses
+
+
+def intersection_report(recording: Recording, interval: float = 60.0, time_bin: float = 5.0,
+                        space_bin: float = 10.0, bins: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """Fundamental diagrams, space-time diagrams and travel times of a four-way intersection.
+
+    The recording must have been made of a network built by
+    ``IntersectionBuilder.build_four_way_intersection``. Every approach
+    groups its ``<approach>_in_<k>`` lanes; its space-time diagram follows
+    each lane straight through the junction and out of the opposite side.
+    Travel times are counted by the approach vehicles enter from.
+
+    Args:
+        recording: Recording to analyze, read in one pass
+        interval: Time bin of the fundamental diagrams (s)
+        time_bin: Time bin of the space-time diagrams (s)
+        space_bin: Space bin of the space-time diagrams (m)
+        bins: Travel time histogram edges (s), 10 s wide up to 300 s by default
+
+    Returns:
+        ``fundamental_diagram`` (see ``FundamentalDiagram.result``),
+        ``space_time`` by approach (see ``SpaceTimeDiagram.result``),
+        ``travel_time_bins`` and ``travel_times``, histogram counts by
+        approach, and ``trips`` (see ``TravelTimes.result``)
+
+    Raises:
+        ValueError: If the recording has no four-way intersection road names
+    """
+    names = recording.meta.get('road_names', {})
+    lanes = {approach: sorted(int(name.rsplit('_', 1)[1]) for name in names if name.startswith(f'{approach}_in_'))
+             for approach in APPROACHES}
+    if not all(lanes.values()):
+        raise ValueError("Recording has no road names of a four-way intersection")
+    groups = {approach: [road for k in lanes[approach] for road in names[f'{approach}_in_{k}']]
+              for approach in APPROACHES}
+    diagram = FundamentalDiagram(recording, groups, interval)
+    space_time = {
+        approach: SpaceTimeDiagram(recording, [
+            names[f'{approach}_in_{k}'] + names[f'{approach}_straight_{k}'] + names[f'{OPPOSITE[approach]}_out_{k}']
+            for k in lanes[approach]], time_bin, space_bin)
+        for approach in APPROACHES
+    }
+    travel = TravelTimes()
+    analyze(recording, [diagram, *space_time.values(), travel])
+    edges = np.arange(0.0, 310.0, 10.0) if bins is None else np.asarray(bins, dtype=float)
+    return {
+        'fundamental_diagram': diagram.result(),
+        'space_time': {approach: analysis.result() for approach, analysis in space_time.items()},
+        'travel_time_bins': edges,
+        'travel_times': travel.histogram(groups, edges),
+        'trips': travel.result(),
+    }
@@ -0,0 +1,120 @@
+import math
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from trafficSim.result_cache import ResultCache, fingerprint, run_key
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.optimizer import SignalPlan
+
+# A job is a signal plan (or None for the scenario as built), a horizon in
+# simulated seconds and a random seed.
+Job = Tuple[Optional['SignalPlan'], float, int]
+
+
+def prepare_run(build: Callable[[], 'Simulation'], plan: Optional['SignalPlan'] = None,
+                seed: int = 0) -> 'Simulation':
+    """Build a seeded scenario ready for a headless run.
+
+    The ``random`` and NumPy generators are seeded before ``build`` is
+    called, the simulation's ``time_limit`` reset is disabled and ``plan``,
+    if any, is applied. Every headless runner sets up its runs this way, so
+    they all agree on the result of a (scenario, plan, seed) combination.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    sim = build()
+    sim.time_limit = math.inf
+    if plan is not None:
+        plan.apply(sim)
+    return sim
+
+
+def horizon_steps(sim: 'Simulation', horizon: float) -> int:
+    """Return the number of ticks of ``sim`` that make up ``horizon`` simulated seconds."""
+    return int(round(horizon / sim.dt))
+
+
+def run_headless(build: Callable[[], 'Simulation'], plan: Optional['SignalPlan'] = None,
+                 horizon: float = 300.0, seed: int = 0,
+                 cache: Optional[ResultCache] = None) -> Dict[str, Any]:
+    """Build a scenario and run it without a window.
+
+    The run is set up by ``prepare_run``, so a (scenario, plan, seed)
+    combination always produces the same run. With a ``cache``, a stored
+    result for the same scenario, plan, horizon and seed is returned instead
+    of simulating, and new results are stored; the key is computed from a
+    separate build, as ``run_batch`` does.
+
+    Args:
+        build: Callable returning a freshly built simulation
+        plan: Signal plan applied after building, if any
+        horizon: Simulated seconds to run
+        seed: Seed for the ``random`` and NumPy generators
+        cache: Result cache to consult and fill
+
+    Returns:
+        The simulation's metrics at the end of the run
+    """
+    key = None
+    if cache is not None:
+        key = run_key(fingerprint(build()), plan, horizon, seed)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    sim = prepare_run(build, plan, seed)
+    sim.run(horizon_steps(sim, horizon))
+    metrics: Dict[str, Any] = sim.metrics()
+    if cache is not None and key is not None:
+        cache.put(key, metrics)
+    return metrics
+
+
+def _run_job(build: Callable[[], 'Simulation'], job: Job) -> Dict[str, Any]:
+    plan, horizon, seed = job
+    return run_headless(build, plan, horizon, seed)
+
+
+def run_batch(build: Callable[[], 'Simulation'], jobs: Sequence[Job],
+              workers: Optional[int] = None,
+              cache: Optional[ResultCache] = None) -> List[Dict[str, Any]]:
+    """Run many headless jobs, in parallel worker processes when possible.
+
+    ``build`` and the plans are sent to the workers, so ``build`` must be
+    picklable (a module-level function). With ``workers=1``, or a single
+    job, everything runs in the calling process. With a ``cache``, only jobs
+    without a stored result are simulated; the scenario is built once in the
+    calling process to compute the keys.
+
+    Args:
+        build: Callable returning a freshly built simulation
+        jobs: ``(plan, horizon, seed)`` tuples
+        workers: Number of worker processes, the CPU count by default
+        cache: Result cache to consult and fill
+
+    Returns:
+        The metrics of each job, in job order
+    """
+    jobs = list(jobs)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    keys: List[str] = []
+    if cache is not None:
+        scenario = fingerprint(build())
+        keys = [run_key(scenario, *job) for job in jobs]
+        results = [cache.get(key) for key in keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    todo = [jobs[i] for i in pending]
+    if workers == 1 or len(todo) <= 1:
+        computed = [_run_job(build, job) for job in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            computed = list(executor.map(_run_job, [build] * len(todo), todo))
+
+    for i, metrics in zip(pending, computed, strict=True):
+        results[i] = metrics
+    if cache is not None and computed:
+        cache.put_many({keys[i]: metrics for i, metrics in zip(pending, computed, strict=True)})
+    return [result for result in results if result is not None]
@@ -15,12 +15,12 @@ class ConfigLoader:
 
     @staticmethod
     def get_default_config() -> Dict[str, Any]:
-        config_dir = Path(__file__).parent / 'config'
+        config_dir = Path(__file__).parent.parent / 'config'
         return ConfigLoader.load_yaml(config_dir / 'default.yaml')
 
     @staticmethod
     def get_vehicles_config() -> Dict[str, Any]:
-        config_dir = Path(__file__).parent / 'config'
+        config_dir = Path(__file__).parent.parent / 'config'
         return ConfigLoader.load_yaml(config_dir / 'vehicles.yaml')
 
     @staticmethod
@@ -0,0 +1,128 @@
+import numpy as np
+from typing import Any, Dict, List, Set, Tuple, TYPE_CHECKING
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.vehicle import Vehicle
+
+
+class ConflictZone(Configurable):
+    """Resolves crossing and merging movements inside an intersection box.
+
+    The zone covers every road lying entirely within ``bounds``. Each tick
+    the vehicles on those roads are projected ``horizon`` seconds ahead and
+    hashed into a uniform grid of ``cell_size`` cells. Candidate pairs come
+    only from the same or neighbouring cells, so the cost grows with the
+    number of vehicles in the box rather than with its square. Two vehicles
+    conflict when their projected positions come within ``clearance`` and
+    neither is following the other along its route. The vehicle that entered
+    the zone later yields: it is stopped until the conflict clears.
+    """
+
+    def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
+        self.sim = sim
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.bounds: Tuple[float, float, float, float] = (-12.0, -12.0, 12.0, 12.0)
+        self.cell_size = 4.0
+        self.clearance = 3.0
+        self.horizon = 1.0
+
+    def init_properties(self) -> None:
+        if self.cell_size < self.clearance:
+            raise ValueError("cell_size must be at least the clearance")
+        x_min, y_min, x_max, y_max = self.bounds
+        eps = 1e-6
+
+        def inside(point: Tuple[float, float]) -> bool:
+            return x_min - eps <= point[0] <= x_max + eps and y_min - eps <= point[1] <= y_max + eps
+
+        self.road_indices = [i for i, road in enumerate(self.sim.roads)
+                             if inside(road.start) and inside(road.end)]
+        roads = [self.sim.roads[i] for i in self.road_indices]
+        self._start = np.array([road.start for road in roads], dtype=float).reshape(-1, 2)
+        self._direction = np.array([(road.angle_cos, road.angle_sin) for road in roads]).reshape(-1, 2)
+
+        self.entry_times: Dict['Vehicle', float] = {}
+        self.holding: Set['Vehicle'] = set()
+        self.conflicts = 0
+
+    def update(self) -> None:
+        vehicles: List['Vehicle'] = []
+        slots: List[int] = []
+        for slot, road_index in enumerate(self.road_indices):
+            for vehicle in self.sim.roads[road_index].vehicles:
+                vehicles.append(vehicle)
+                slots.append(slot)
+
+        self.entry_times = {vehicle: self.entry_times.get(vehicle, self.sim.t) for vehicle in vehicles}
+        yielding: Set['Vehicle'] = set()
+        if len(vehicles) > 1:
+            for i, j in self.find_conflicts(vehicles, np.array(slots)):
+                a, b = vehicles[i], vehicles[j]
+                # Vehicles that entered in the same tick: the first one listed goes.
+                loser = b if self.entry_times[b] >= self.entry_times[a] else a
+                yielding.add(loser)
+            self.conflicts += len(yielding)
+
+        for vehicle in self.holding - yielding:
+            vehicle.unstop()
+        brake = self.sim.long_steps
+        for vehicle in yielding:
+            vehicle.stop(brake)
+        self.holding = yielding
+
+    def find_conflicts(self, vehicles: List['Vehicle'], slots: np.ndarray) -> List[Tuple[int, int]]:
+        """Return index pairs ``(i, j)``, ``i < j``, of conflicting vehicles."""
+        n = len(vehicles)
+        x = np.fromiter((vehicle.x + vehicle.v * self.horizon for vehicle in vehicles), float, n)
+        pos = self._start[slots] + self._direction[slots] * x[:, None]
+
+        cells = np.floor(pos / self.cell_size).astype(np.int64)
+        # Offset so that neighbouring cells never wrap into another row.
+        cells -= cells.min(axis=0) - 1
+        stride = int(cells[:, 1].max()) + 2
+        keys = cells[:, 0] * stride + cells[:, 1]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        firsts: List[np.ndarray] = []
+        seconds: List[np.ndarray] = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighbour = keys + dx * stride + dy
+                lo = np.searchsorted(sorted_keys, neighbour, side='left')
+                hi = np.searchsorted(sorted_keys, neighbour, side='right')
+                counts = hi - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                first = np.repeat(np.arange(n), counts)
+                starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                firsts.append(first)
+                seconds.append(order[starts + np.arange(total)])
+
+        if not firsts:
+            return []
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+        keep = first < second
+        first, second = first[keep], second[keep]
+        keep = (slots[first] != slots[second]) & (
+            np.hypot(*(pos[first] - pos[second]).T) < self.clearance
+        )
+
+        pairs: List[Tuple[int, int]] = []
+        for i, j in zip(first[keep].tolist(), second[keep].tolist(), strict=True):
+            if not self._following(vehicles[i], vehicles[j]) and not self._following(vehicles[j], vehicles[i]):
+                pairs.append((i, j))
+        return pairs
+
+    def _following(self, vehicle: 'Vehicle', other: 'Vehicle') -> bool:
+        """Return whether ``other`` is ahead of ``vehicle`` on its own route."""
+        road = other.path[other.current_road_index] if len(other.path) else -1
+        ahead = vehicle.path[vehicle.current_road_index:]
+        return bool(len(ahead) and (np.asarray(ahead) == road).any())
@@ -0,0 +1,366 @@
+import math
+import random
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from trafficSim.config import Configurable
+from trafficSim.vehicle import Vehicle
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.optimizer import SignalPlan
+
+
+@dataclass(frozen=True)
+class TriangularDiagram:
+    """Triangular fundamental diagram of one lane.
+
+    Speeds are in m/s, ``capacity`` in vehicles/s and ``jam_density`` in
+    vehicles/m. ``lost_time`` is the start-up loss of a queue released at
+    a signal, in seconds of green.
+    """
+    free_speed: float
+    capacity: float
+    jam_density: float
+    wave_speed: float
+    lost_time: float = 0.0
+
+    @property
+    def critical_density(self) -> float:
+        return self.capacity / self.free_speed
+
+
+def calibrate_diagram(vehicles: Sequence[Vehicle], dt: float = 0.1, skip: int = 4) -> TriangularDiagram:
+    """Fit a triangular fundamental diagram to the IDM of a sample of vehicles.
+
+    The vehicles stand in a queue at their jam spacing ``l + s0`` behind a
+    line, and are released together, as at a green signal. The capacity is
+    the rate at which they then cross the line, leaving out the first
+    ``skip``, and the lost time is how much later than at that rate the
+    first ``skip`` have crossed. The jam density comes from the
+    queue spacing and the free speed is the harmonic mean of ``v_max``, so
+    free-flow travel times add up; the backward wave speed closes the
+    triangle. The vehicles are moved by the run.
+
+    Raises:
+        ValueError: If there are not enough vehicles to measure a discharge rate
+    """
+    if len(vehicles) < skip + 2:
+        raise ValueError(f"Calibration needs at least {skip + 2} vehicles")
+    x = 0.0
+    spacing = 0.0
+    lead: Optional[Vehicle] = None
+    for vehicle in vehicles:
+        if lead is not None:
+            x -= lead.l + vehicle.s0
+            spacing += lead.l + vehicle.s0
+        vehicle.x, vehicle.v = x, 0.0
+        vehicle.stopped = False
+        vehicle.a = vehicle.acceleration(lead)
+        lead = vehicle
+
+    crossed = np.full(len(vehicles), np.nan)
+    crossed[0] = 0.0
+    t = 0.0
+    limit = 10.0 * len(vehicles)
+    while np.isnan(crossed[-1]) and t < limit:
+        t += dt
+        lead = None
+        for i, vehicle in enumerate(vehicles):
+            vehicle.update(lead, dt)
+            if np.isnan(crossed[i]) and vehicle.x >= 0.0:
+                crossed[i] = t
+            lead = vehicle
+    if np.isnan(crossed[-1]):
+        raise ValueError("The calibration queue did not discharge")
+
+    free_speed = len(vehicles) / sum(1.0 / vehicle._v_max for vehicle in vehicles)
+    capacity = (len(vehicles) - 1 - skip) / (crossed[-1] - crossed[skip])
+    jam_density = (len(vehicles) - 1) / spacing
+    wave_speed = capacity / (jam_density - capacity / free_speed)
+    lost_time = max(crossed[skip] - skip / capacity, 0.0)
+    return TriangularDiagram(float(free_speed), float(capacity), float(jam_density), float(wave_speed),
+                             float(lost_time))
+
+
+class CellTransmissionModel(Configurable):
+    """Cell transmission model (Daganzo) of a simulation's network, signals and demand.
+
+    Screens signal plans far faster than the vehicle-by-vehicle engine. The
+    roads of ``build()`` are joined into links wherever a road is the only
+    way on from the previous one, so junction curves made of many short
+    segments become one link, and each link is cut into cells at least
+    ``free_speed * dt`` long; shorter links are treated as that long. Each step moves the flow ``min(sending,
+    receiving)`` between neighbouring cells under the triangular
+    ``diagram``, calibrated with ``calibrate_diagram`` on vehicles drawn from
+    the generators unless given. At link ends, flow is split among the next
+    links in the proportions of the demand's routes and held back as a
+    whole when any of them is full (first in, first out); merging links
+    share the room of the next one in proportion to what they send. A
+    signalized road's link only sends while its group has green, following
+    ``TrafficSignal.phases``, and not during the first ``lost_time`` seconds
+    of each green. Demand too large for an entrance waits at it.
+
+    Vehicles are counted fractionally. Conflict zones, rerouting, lane
+    changing and the slow zones before signals are not modelled.
+    """
+
+    def __init__(self, build: Callable[[], 'Simulation'], config: Dict[str, Any] | None = None) -> None:
+        """Create the model of a scenario.
+
+        Args:
+            build: Callable returning a freshly built simulation; the model
+                keeps the one it builds and applies plans to its signals
+            config: Dictionary of configuration overrides
+        """
+        self.sim = build()
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.dt = 1.0
+        self.diagram: Optional[TriangularDiagram] = None
+        self.calibration_vehicles = 40
+        self.calibration_dt = 0.1
+        self.seed = 0
+
+    def init_properties(self) -> None:
+        diagram = self.diagram
+        if diagram is None:
+            diagram = self.diagram = calibrate_diagram(self.sample_vehicles(self.calibration_vehicles),
+                                                       self.calibration_dt)
+        self.lost_time = diagram.lost_time
+        self._build_links()
+        self._build_cells(diagram)
+        self._build_demand()
+
+    def sample_vehicles(self, n: int) -> List[Vehicle]:
+        """Draw ``n`` vehicles from the generators, in proportion to their rates, with ``seed``."""
+        caller = (random.getstate(), np.random.get_state())
+        try:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+            generators = self.sim.generators
+            vehicles: List[Vehicle] = []
+            for _ in range(n):
+                if not generators:
+                    vehicles.append(Vehicle())
+                    continue
+                rates = np.array([gen.vehicle_rate for gen in generators], dtype=float)
+                gen = generators[int(np.searchsorted(np.cumsum(rates) / rates.sum(), np.random.random()))]
+                vehicle = gen.build_vehicle(*gen.draw_demand())
+                if vehicle is None:
+                    vehicle = Vehicle()
+                elif self.sim.vehicle_pool is not None:
+                    self.sim.vehicle_pool.release(vehicle)
+                vehicles.append(vehicle)
+            return vehicles
+        finally:
+            random.setstate(caller[0])
+            np.random.set_state(caller[1])
+
+    def _build_links(self) -> None:
+        """Join the roads into links and note where demand enters and leaves them."""
+        sim = self.sim
+        graph = sim.road_graph
+        num_roads = len(sim.roads)
+        origins = set()
+        ends = set()
+        for gen in sim.generators:
+            for path, _ in gen.route_rates():
+                origins.add(int(path[0]))
+                ends.add(int(path[-1]))
+        predecessors = np.zeros(num_roads, dtype=int)
+        for index in range(num_roads):
+            for successor in graph.successors(index):
+                predecessors[successor] += 1
+
+        def continues(index: int) -> int:
+            # The road the link goes on with after ``index``, or -1.
+            successors = graph.successors(index)
+            if len(successors) != 1 or sim.roads[index].has_traffic_signal or index in ends:
+                return -1
+            successor = int(successors[0])
+            if predecessors[successor] != 1 or successor in origins:
+                return -1
+            return successor
+
+        follows = [continues(index) for index in range(num_roads)]
+        heads = set(range(num_roads)) - {successor for successor in follows if successor >= 0}
+        self.link_of_road = np.full(num_roads, -1, dtype=int)
+        self.links: List[List[int]] = []
+        # Roads on a loop of single continuations have no head; start one anywhere.
+        for head in sorted(heads) + list(range(num_roads)):
+            if self.link_of_road[head] >= 0:
+                continue
+            link: List[int] = []
+            index = head
+            while index >= 0 and self.link_of_road[index] < 0:
+                self.link_of_road[index] = len(self.links)
+                link.append(index)
+                index = follows[index]
+            self.links.append(link)
+
+    def _build_cells(self, diagram: TriangularDiagram) -> None:
+        lengths: List[float] = []
+        lanes: List[int] = []
+        first: List[int] = []
+        last: List[int] = []
+        for link in self.links:
+            length = sum(self.sim.roads[index].length for index in link)
+            num_lanes = min(getattr(self.sim.roads[index], 'num_lanes', 1) for index in link)
+            # Links shorter than a step at free speed get one cell of that
+            # length; shorter cells would hold back capacity flows.
+            num_cells = max(1, int(length // (diagram.free_speed * self.dt)))
+            first.append(len(lengths))
+            lengths.extend([max(length / num_cells, diagram.free_speed * self.dt)] * num_cells)
+            lanes.extend([num_lanes] * num_cells)
+            last.append(len(lengths) - 1)
+        cell_length = np.array(lengths)
+        cell_lanes = np.array(lanes, dtype=float)
+        self.first_cell = np.array(first, dtype=int)
+        self.last_cell = np.array(last, dtype=int)
+        self.storage = diagram.jam_density * cell_length * cell_lanes
+        self.max_flow = diagram.capacity * self.dt * cell_lanes
+        self.send_share = diagram.free_speed * self.dt / cell_length
+        self.receive_share = np.minimum(diagram.wave_speed * self.dt / cell_length, 1.0)
+        inner = np.ones(len(cell_length), dtype=bool)
+        inner[self.last_cell] = False
+        self.inner = np.flatnonzero(inner)
+
+    def _build_demand(self) -> None:
+        """Turn the demand's routes into link turning proportions and entrance rates."""
+        num_links = len(self.links)
+        turns: Dict[Tuple[int, int], float] = {}
+        leaving = np.zeros(num_links)
+        entering = np.zeros(num_links)
+        for gen in self.sim.generators:
+            for path, rate in gen.route_rates():
+                sequence = [int(self.link_of_road[index]) for index in path]
+                sequence = [link for k, link in enumerate(sequence) if k == 0 or link != sequence[k - 1]]
+                entering[sequence[0]] += rate
+                for a, b in zip(sequence, sequence[1:], strict=False):
+                    if rate > 0:
+                        turns[(a, b)] = turns.get((a, b), 0.0) + rate
+                leaving[sequence[-1]] += rate
+        outgoing = leaving.copy()
+        for (a, _), rate in turns.items():
+            outgoing[a] += rate
+        # Links without demand never hold vehicles; let them leave the network.
+        self.exit_share = np.where(outgoing > 0, leaving / np.maximum(outgoing, 1e-300), 1.0)
+        edges = sorted(turns)
+        self.edge_from = np.array([a for a, _ in edges], dtype=int)
+        self.edge_to = np.array([b for _, b in edges], dtype=int)
+        self.edge_share = np.array([turns[edge] / outgoing[edge[0]] for edge in edges])
+        self.arrivals = entering / 60.0 * self.dt
+        self.entrances = np.flatnonzero(entering > 0)
+
+        self.signal_links: List[Tuple[int, Any, int]] = []
+        for link_index, link in enumerate(self.links):
+            road = self.sim.roads[link[-1]]
+            if road.has_traffic_signal:
+                signal_index = self.sim.traffic_signals.index(road.traffic_signal)
+                self.signal_links.append((link_index, signal_index, road.traffic_signal_group))
+
+    def green(self, steps: int) -> np.ndarray:
+        """Return the share of each of ``steps`` steps each link may send in, from the signals' current plans."""
+        times = np.arange(steps) * self.dt
+        green = np.ones((steps, len(self.links)))
+        if not self.signal_links:
+            return green
+        phases = [signal.phases(times) for signal in self.sim.traffic_signals]
+        columns = [link_index for link_index, _, _ in self.signal_links]
+        for link_index, signal_index, group in self.signal_links:
+            signal = self.sim.traffic_signals[signal_index]
+            table = np.array([bool(phase[group]) for phase in signal.cycle])
+            green[:, link_index] = table[phases[signal_index]]
+        # Green since the end of the last red, less the start-up loss; a
+        # signal green from the start has no loss to make up.
+        step = np.arange(steps)[:, None]
+        last_red = np.maximum.accumulate(np.where(green[:, columns] > 0, -steps, step), axis=0)
+        elapsed = np.where(last_red < 0, np.inf, (step - last_red) * self.dt)
+        share = np.clip((elapsed - self.lost_time) / self.dt, 0.0, 1.0)
+        green[:, columns] *= share
+        return green
+
+    def run(self, horizon: float, plan: Optional['SignalPlan'] = None) -> Dict[str, float]:
+        """Simulate ``horizon`` seconds from an empty network.
+
+        Args:
+            horizon: Simulated time in seconds
+            plan: Signal plan to apply first; the signals' current plans otherwise
+
+        Returns:
+            The keys of ``Simulation.metrics``, with fractional vehicle counts
+        """
+        if plan is not None:
+            plan.apply(self.sim)
+        steps = max(int(math.ceil(horizon / self.dt - 1e-9)), 0)
+        green = self.green(steps)
+        num_links = len(self.links)
+        num_cells = len(self.storage)
+        n = np.zeros(num_cells)
+        waiting = np.zeros(num_links)
+        passed = entered = 0.0
+        # Cumulative arrivals and admissions at each entrance after every step.
+        arrived = np.cumsum(np.broadcast_to(self.arrivals, (steps, num_links)), axis=0)
+        admitted_by = np.zeros((steps, num_links))
+        first, last, inner = self.first_cell, self.last_cell, self.inner
+        edge_from, edge_to, edge_share = self.edge_from, self.edge_to, self.edge_share
+        has_edges = len(edge_from) > 0
+
+        for step in range(steps):
+            sending = np.minimum(self.send_share * n, self.max_flow)
+            receiving = np.minimum(self.receive_share * (self.storage - n), self.max_flow)
+
+            # Within links.
+            moved = np.minimum(sending[inner], receiving[inner + 1])
+
+            # Link ends: first in, first out diverges, then merges sharing
+            # the room ahead.
+            out = sending[last] * green[step]
+            room = receiving[first]
+            if has_edges:
+                limit = np.full(num_links, np.inf)
+                np.minimum.at(limit, edge_from, room[edge_to] / edge_share)
+                out = np.minimum(out, limit)
+                demand = np.bincount(edge_to, edge_share * out[edge_from], num_links)
+                scale = np.ones(num_links)
+                np.minimum.at(scale, edge_from, np.minimum(room[edge_to] / np.maximum(demand[edge_to], 1e-12), 1.0))
+                out *= scale
+                arriving: np.ndarray = np.bincount(edge_to, edge_share * out[edge_from], num_links)
+            else:
+                arriving = np.zeros(num_links)
+
+            # Entrances take what room is left.
+            waiting += self.arrivals
+            admitted = np.minimum(waiting, np.maximum(room - arriving, 0.0))
+            waiting -= admitted
+            entered += float(admitted.sum())
+            admitted_by[step] = admitted_by[step - 1] + admitted if step > 0 else admitted
+
+            n[inner] -= moved
+            n[inner + 1] += moved
+            n[last] -= out
+            n[first] += arriving + admitted
+            passed += float(np.dot(out, self.exit_share))
+
+        t = steps * self.dt
+        # Entrances are first in, first out: the vehicles admitted by the end
+        # are the first ones to arrive, and each waited while it was queued.
+        delay = 0.0
+        if steps > 0:
+            delay = float(np.maximum(np.minimum(arrived, admitted_by[-1]) - admitted_by, 0.0).sum()) * self.dt
+        return {
+            't': t,
+            'vehicles_passed': passed,
+            'vehicles_present': float(n.sum()),
+            'throughput': passed / t * 60 if t > 0 else 0.0,
+            'vehicles_waiting': float(waiting.sum()),
+            'entry_delay': delay / entered if entered else 0.0,
+        }
+
+    def screen(self, plans: Sequence['SignalPlan'], horizon: float,
+               objective: Callable[[Dict[str, float]], float]) -> List[float]:
+        """Return the objective of each plan over ``horizon`` seconds."""
+        return [objective(self.run(horizon, plan)) for plan in plans]
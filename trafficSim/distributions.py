@@ -0,0 +1,69 @@
+import numpy as np
+from typing import Any, Dict
+
+# Vehicle parameters that may be given as a distribution instead of a number.
+DISTRIBUTED_PARAMETERS = ('s0', 'T', 'v_max', 'a_max', 'b_max')
+
+DISTRIBUTIONS: Dict[str, tuple] = {
+    'fixed': ('value',),
+    'uniform': ('low', 'high'),
+    'normal': ('mean', 'std'),
+    'lognormal': ('mean', 'std'),
+}
+
+
+def validate_distribution(spec: Any) -> Dict[str, Any]:
+    """Check a parameter distribution and return it as a plain dict.
+
+    A distribution is a number (a fixed value) or a mapping with a ``dist``
+    name and its parameters: ``uniform`` (``low``, ``high``), ``normal`` or
+    ``lognormal`` (``mean``, ``std`` of the values themselves). Optional
+    ``min`` and ``max`` clip the samples.
+
+    Raises:
+        ValueError: If the distribution or its parameters are invalid
+    """
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        return {'dist': 'fixed', 'value': float(spec)}
+    if not isinstance(spec, dict) or spec.get('dist') not in DISTRIBUTIONS:
+        raise ValueError(f"expected a number or a mapping with dist one of {', '.join(DISTRIBUTIONS)}")
+    required = DISTRIBUTIONS[spec['dist']]
+    for key in spec:
+        if key not in ('dist', 'min', 'max') + required:
+            raise ValueError(f"unknown {spec['dist']} parameter '{key}'")
+    spec = dict(spec)
+    for key in required + ('min', 'max'):
+        if key in spec:
+            spec[key] = float(spec[key])
+        elif key in required:
+            raise ValueError(f"{spec['dist']} distribution needs '{key}'")
+    if spec['dist'] == 'uniform' and spec['high'] < spec['low']:
+        raise ValueError("uniform distribution needs low <= high")
+    if spec['dist'] in ('normal', 'lognormal') and spec['std'] < 0:
+        raise ValueError("std must be non-negative")
+    if spec['dist'] == 'lognormal' and spec['mean'] <= 0:
+        raise ValueError("lognormal mean must be positive")
+    if spec.get('min', -np.inf) > spec.get('max', np.inf):
+        raise ValueError("min must not exceed max")
+    return dict(spec)
+
+
+def sample(spec: Dict[str, Any], size: int) -> np.ndarray:
+    """Draw ``size`` values of a validated distribution in one call.
+
+    Draws come from ``numpy.random``, so seeding it makes runs repeatable.
+    """
+    dist = spec['dist']
+    if dist == 'fixed':
+        values = np.full(size, spec['value'])
+    elif dist == 'uniform':
+        values = np.random.uniform(spec['low'], spec['high'], size)
+    elif dist == 'normal':
+        values = np.random.normal(spec['mean'], spec['std'], size)
+    else:
+        # Parameters of the underlying normal giving the requested mean and std.
+        sigma2 = np.log1p((spec['std'] / spec['mean']) ** 2)
+        values = np.random.lognormal(np.log(spec['mean']) - sigma2 / 2, np.sqrt(sigma2), size)
+    if 'min' in spec or 'max' in spec:
+        values = np.clip(values, spec.get('min', -np.inf), spec.get('max', np.inf))
+    return values
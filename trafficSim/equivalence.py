@@ -0,0 +1,382 @@
+import argparse
+import hashlib
+import math
+import random
+import sys
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, TYPE_CHECKING
+from trafficSim.batch import prepare_run
+from trafficSim.ensemble import EnsembleSimulation
+from trafficSim.meso_road import MesoRoad
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+
+# An engine builds a seeded simulation and returns it with the function that
+# advances it by one tick.
+Engine = Callable[[Callable[[], 'Simulation'], int], Tuple['Simulation', Callable[[], None]]]
+
+
+def reference_engine(build: Callable[[], 'Simulation'], seed: int) -> Tuple['Simulation', Callable[[], None]]:
+    """``Simulation.update``, the engine every other engine must reproduce."""
+    sim = prepare_run(build, seed=seed)
+    return sim, sim.update
+
+
+def ensemble_engine(build: Callable[[], 'Simulation'], seed: int) -> Tuple['Simulation', Callable[[], None]]:
+    """The batched IDM step of a one-member ``EnsembleSimulation``."""
+    ensemble = EnsembleSimulation(build, [(None, seed)])
+    return ensemble.replicas[0], ensemble.update
+
+
+def integrator_engine(name: str) -> Engine:
+    """Return an engine running ``Simulation.update`` with another vehicle integrator."""
+    def engine(build: Callable[[], 'Simulation'], seed: int) -> Tuple['Simulation', Callable[[], None]]:
+        sim, step = reference_engine(build, seed)
+        sim.integrator = name
+        return sim, step
+    return engine
+
+
+ENGINES: Dict[str, Engine] = {
+    'reference': reference_engine,
+    'ensemble': ensemble_engine,
+    'semi_implicit': integrator_engine('semi_implicit'),
+    'heun': integrator_engine('heun'),
+}
+
+
+class TickState(NamedTuple):
+    """State of a simulation after a tick, vehicles in road order.
+
+    The vehicles in the point queues of MesoRoads are listed apart, in queue
+    order, with the time they are released onto the road.
+    """
+
+    ids: np.ndarray
+    roads: np.ndarray
+    x: np.ndarray
+    v: np.ndarray
+    totals: np.ndarray
+    queue_ids: np.ndarray
+    queue_roads: np.ndarray
+    queue_ready: np.ndarray
+
+    @classmethod
+    def of(cls, sim: 'Simulation') -> 'TickState':
+        ids: List[int] = []
+        roads: List[int] = []
+        x: List[float] = []
+        v: List[float] = []
+        queue_ids: List[int] = []
+        queue_roads: List[int] = []
+        queue_ready: List[float] = []
+        for road_index, road in enumerate(sim.roads):
+            for vehicle in road.vehicles:
+                ids.append(vehicle.id)
+                roads.append(road_index)
+                x.append(vehicle.x)
+                v.append(vehicle.v)
+            if isinstance(road, MesoRoad):
+                for ready, vehicle in road.queue:
+                    queue_ids.append(vehicle.id)
+                    queue_roads.append(road_index)
+                    queue_ready.append(ready)
+        totals = [sim.vehicles_spawned, sim.vehicles_passed] + [signal.current_cycle_index
+                                                                for signal in sim.traffic_signals]
+        return cls(np.array(ids, dtype=np.int64), np.array(roads, dtype=np.int64), np.array(x, dtype=float),
+                   np.array(v, dtype=float), np.array(totals, dtype=np.int64),
+                   np.array(queue_ids, dtype=np.int64), np.array(queue_roads, dtype=np.int64),
+                   np.array(queue_ready, dtype=float))
+
+    def quantized(self, quantum: float) -> bytes:
+        """Canonical bytes of the state with positions and speeds rounded to multiples of ``quantum``."""
+        return b''.join((self.ids.tobytes(), self.roads.tobytes(),
+                         np.round(self.x / quantum).astype(np.int64).tobytes(),
+                         np.round(self.v / quantum).astype(np.int64).tobytes(), self.totals.tobytes(),
+                         self.queue_ids.tobytes(), self.queue_roads.tobytes(),
+                         np.round(self.queue_ready / quantum).astype(np.int64).tobytes()))
+
+
+class RollingDigest:
+    """blake2b digest chained over the quantized state of every tick."""
+
+    def __init__(self, quantum: float) -> None:
+        self.quantum = quantum
+        self.digest = b''
+
+    def update(self, state: TickState) -> bytes:
+        self.digest = hashlib.blake2b(self.digest + state.quantized(self.quantum), digest_size=16).digest()
+        return self.digest
+
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+
+@dataclass(frozen=True)
+class Divergence:
+    """Where two engines first stopped producing the same quantized state.
+
+    ``vehicle`` and ``road`` are -1 when only the totals or signal phases
+    differ. ``reason`` is ``'missing'`` (the vehicle exists in one engine
+    only), ``'road'``, ``'position'``, ``'speed'``, ``'queue'`` (the first
+    place where the MesoRoad queues differ) or ``'totals'``; ``reference``
+    and ``candidate`` hold the differing values, for a missing vehicle 1 in
+    the engine that has it and 0 in the other, for a queue the release times
+    (NaN past the end of a queue). ``vehicles`` counts the vehicles that
+    differ in the tick.
+    """
+    tick: int
+    t: float
+    vehicle: int
+    road: int
+    reason: str
+    reference: float
+    candidate: float
+    vehicles: int
+
+
+@dataclass
+class EquivalenceReport:
+    """Outcome of ``compare_engines``.
+
+    The deviations cover the vehicles present in both engines on the same
+    road, over all ticks; ``vehicle_mismatches`` counts the vehicle-ticks
+    where a vehicle was missing in one engine or on different roads.
+    """
+    ticks: int
+    reference_digest: str
+    candidate_digest: str
+    divergence: Optional[Divergence]
+    tolerance: float
+    first_exceeding_tick: int = -1
+    ticks_within_tolerance: int = 0
+    max_dx: float = 0.0
+    max_dv: float = 0.0
+    rms_dx: float = 0.0
+    rms_dv: float = 0.0
+    vehicle_mismatches: int = 0
+
+    @property
+    def equivalent(self) -> bool:
+        return self.divergence is None
+
+    def summary(self) -> str:
+        lines = [f'{self.ticks} ticks, reference {self.reference_digest}, candidate {self.candidate_digest}']
+        if self.divergence is None:
+            lines.append('Equivalent: every tick hashes the same')
+        else:
+            d = self.divergence
+            lines.append(f'First divergence at tick {d.tick} (t={d.t:.4f} s): {d.reason} of vehicle {d.vehicle} '
+                         f'on road {d.road}, reference {d.reference!r}, candidate {d.candidate!r}; '
+                         f'{d.vehicles} vehicle(s) differ')
+        lines.append(f'Within tolerance {self.tolerance:g} in {self.ticks_within_tolerance} of {self.ticks} ticks'
+                     + (f', first exceeded at tick {self.first_exceeding_tick}' if self.first_exceeding_tick >= 0
+                        else ''))
+        lines.append(f'max |dx| {self.max_dx:.3g} m, max |dv| {self.max_dv:.3g} m/s, '
+                     f'rms dx {self.rms_dx:.3g} m, rms dv {self.rms_dv:.3g} m/s, '
+                     f'{self.vehicle_mismatches} vehicle mismatches')
+        return '\n'.join(lines)
+
+
+def _engine(engine: Engine | str) -> Engine:
+    """Return an engine given itself or by its name in ``ENGINES``."""
+    if isinstance(engine, str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        return ENGINES[engine]
+    return engine
+
+
+class _Isolated:
+    """Runs an engine with its own ``random`` and NumPy generator states, so engines can run in lockstep."""
+
+    def __init__(self, engine: Engine, build: Callable[[], 'Simulation'], seed: int) -> None:
+        caller = (random.getstate(), np.random.get_state())
+        try:
+            self.sim, self._step = engine(build, seed)
+            self._rng = (random.getstate(), np.random.get_state())
+        finally:
+            random.setstate(caller[0])
+            np.random.set_state(caller[1])
+
+    def step(self) -> TickState:
+        caller = (random.getstate(), np.random.get_state())
+        try:
+            random.setstate(self._rng[0])
+            np.random.set_state(self._rng[1])
+            self._step()
+            self._rng = (random.getstate(), np.random.get_state())
+        finally:
+            random.setstate(caller[0])
+            np.random.set_state(caller[1])
+        return TickState.of(self.sim)
+
+
+def _divergence(tick: int, t: float, reference: TickState, candidate: TickState, quantum: float) -> Divergence:
+    """Locate the largest difference between two states that hash differently."""
+    missing = np.setxor1d(reference.ids, candidate.ids)
+    if len(missing):
+        vehicle = int(missing[0])
+        in_reference = bool(np.any(reference.ids == vehicle))
+        side = reference if in_reference else candidate
+        road = int(side.roads[np.flatnonzero(side.ids == vehicle)[0]])
+        return Divergence(tick, t, vehicle, road, 'missing', float(in_reference), float(not in_reference),
+                          len(missing))
+
+    ref = np.argsort(reference.ids, kind='stable')
+    cand = np.argsort(candidate.ids, kind='stable')
+    ids, roads = reference.ids[ref], reference.roads[ref]
+    # Compared in this order: a vehicle on another road also has another position.
+    differences = [
+        ('road', reference.roads[ref], candidate.roads[cand]),
+        ('position', np.round(reference.x[ref] / quantum), np.round(candidate.x[cand] / quantum)),
+        ('speed', np.round(reference.v[ref] / quantum), np.round(candidate.v[cand] / quantum)),
+    ]
+    values = {'road': (reference.roads[ref], candidate.roads[cand]), 'position': (reference.x[ref], candidate.x[cand]),
+              'speed': (reference.v[ref], candidate.v[cand])}
+    differing = np.zeros(len(ids), dtype=bool)
+    for _, a, b in differences:
+        differing |= a != b
+    for reason, a, b in differences:
+        rows = np.flatnonzero(a != b)
+        if len(rows):
+            ref_values, cand_values = values[reason]
+            k = int(rows[np.argmax(np.abs(ref_values[rows] - cand_values[rows]))])
+            return Divergence(tick, t, int(ids[k]), int(roads[k]), reason, float(ref_values[k]),
+                              float(cand_values[k]), int(differing.sum()))
+
+    queues = [(reference.queue_ids, candidate.queue_ids), (reference.queue_roads, candidate.queue_roads),
+              (np.round(reference.queue_ready / quantum), np.round(candidate.queue_ready / quantum))]
+    length = min(len(reference.queue_ids), len(candidate.queue_ids))
+    mismatches = [np.flatnonzero(a[:length] != b[:length]) for a, b in queues]
+    first = min((int(found[0]) for found in mismatches if len(found)), default=length)
+    if first < max(len(reference.queue_ids), len(candidate.queue_ids)):
+        side = reference if first < len(reference.queue_ids) else candidate
+        return Divergence(tick, t, int(side.queue_ids[first]), int(side.queue_roads[first]), 'queue',
+                          float(reference.queue_ready[first]) if first < len(reference.queue_ids) else math.nan,
+                          float(candidate.queue_ready[first]) if first < len(candidate.queue_ids) else math.nan,
+                          0)
+
+    k = int(np.flatnonzero(reference.totals != candidate.totals)[0])
+    return Divergence(tick, t, -1, -1, 'totals', float(reference.totals[k]), float(candidate.totals[k]), 0)
+
+
+def compare_engines(build: Callable[[], 'Simulation'], candidate: Engine | str,
+                    reference: Engine | str = 'reference', ticks: int = 3600, seed: int = 0,
+                    quantum: float = 1e-9, tolerance: float = 1e-6,
+                    stop_on_divergence: bool = False) -> EquivalenceReport:
+    """Run the same seeded scenario on two engines in lockstep and compare every tick.
+
+    After each tick the vehicles' roads, positions and speeds, rounded to
+    multiples of ``quantum``, the MesoRoad queues with their release times,
+    and the spawn, exit and signal totals are folded into a rolling blake2b
+    digest per engine. The first tick whose
+    digests differ is examined for the vehicle and road that differ most.
+    Positions and speeds are also compared against ``tolerance`` in every
+    tick.
+
+    Args:
+        build: Callable returning a freshly built simulation, such as a ``Scenario``
+        candidate: Engine to check, or a name in ``ENGINES``
+        reference: Engine to check against
+        ticks: Number of ticks to run
+        seed: Seed for the ``random`` and NumPy generators of both engines
+        quantum: Resolution of the hashed positions (m) and speeds (m/s)
+        tolerance: Largest deviation of a position or speed accepted in the statistics
+        stop_on_divergence: Stop at the first diverging tick
+
+    Raises:
+        ValueError: If an engine name is unknown
+    """
+    runs = [_Isolated(_engine(engine), build, seed) for engine in (reference, candidate)]
+    digests = (RollingDigest(quantum), RollingDigest(quantum))
+
+    report = EquivalenceReport(ticks, '', '', None, tolerance)
+    sum_dx = sum_dv = 0.0
+    compared = 0
+    for tick in range(1, ticks + 1):
+        states = [run.step() for run in runs]
+        ref_state, cand_state = states
+        if digests[0].update(ref_state) != digests[1].update(cand_state) and report.divergence is None:
+            report.divergence = _divergence(tick, runs[0].sim.t, ref_state, cand_state, quantum)
+
+        common, ref_rows, cand_rows = np.intersect1d(ref_state.ids, cand_state.ids, return_indices=True)
+        same_road = ref_state.roads[ref_rows] == cand_state.roads[cand_rows]
+        report.vehicle_mismatches += (len(ref_state.ids) + len(cand_state.ids) - 2 * len(common)
+                                      + int(np.count_nonzero(~same_road)))
+        dx = np.abs(ref_state.x[ref_rows[same_road]] - cand_state.x[cand_rows[same_road]])
+        dv = np.abs(ref_state.v[ref_rows[same_road]] - cand_state.v[cand_rows[same_road]])
+        within = (len(common) == len(ref_state.ids) == len(cand_state.ids) and bool(same_road.all())
+                  and np.array_equal(ref_state.totals, cand_state.totals))
+        if len(dx):
+            report.max_dx = max(report.max_dx, float(dx.max()))
+            report.max_dv = max(report.max_dv, float(dv.max()))
+            sum_dx += float(np.dot(dx, dx))
+            sum_dv += float(np.dot(dv, dv))
+            compared += len(dx)
+            within = within and dx.max() <= tolerance and dv.max() <= tolerance
+        if within:
+            report.ticks_within_tolerance += 1
+        elif report.first_exceeding_tick < 0:
+            report.first_exceeding_tick = tick
+
+        if stop_on_divergence and report.divergence is not None:
+            report.ticks = tick
+            break
+
+    if compared:
+        report.rms_dx = math.sqrt(sum_dx / compared)
+        report.rms_dv = math.sqrt(sum_dv / compared)
+    report.reference_digest = digests[0].hexdigest()
+    report.candidate_digest = digests[1].hexdigest()
+    return report
+
+
+def trajectory_digest(build: Callable[[], 'Simulation'], engine: Engine | str = 'reference', ticks: int = 3600,
+                      seed: int = 0, quantum: float = 1e-9) -> str:
+    """Return the rolling digest of a run, to compare with one recorded earlier.
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    run = _Isolated(_engine(engine), build, seed)
+    digest = RollingDigest(quantum)
+    for _ in range(ticks):
+        digest.update(run.step())
+    return digest.hexdigest()
+
+
+def assert_equivalent(build: Callable[[], 'Simulation'], candidate: Engine | str, **kwargs: Any) -> EquivalenceReport:
+    """``compare_engines`` for tests: raise ``AssertionError`` with the summary when the engines diverge."""
+    report = compare_engines(build, candidate, stop_on_divergence=True, **kwargs)
+    if not report.equivalent:
+        raise AssertionError(report.summary())
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line: compare an engine with the reference on a scenario file; exits with 1 on divergence."""
+    from trafficSim.scenario import load_scenario
+
+    parser = argparse.ArgumentParser(prog='python -m trafficSim.equivalence',
+                                     description='Check that an engine reproduces the reference simulation.')
+    parser.add_argument('scenario', help='Scenario file')
+    parser.add_argument('--engine', default='ensemble', choices=list(ENGINES), help='Engine to check')
+    parser.add_argument('--reference', default='reference', choices=list(ENGINES), help='Engine to check against')
+    parser.add_argument('--ticks', type=int, default=3600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quantum', type=float, default=1e-9, help='Resolution of hashed positions and speeds')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='Accepted deviation in the statistics')
+    parser.add_argument('--stop', action='store_true', help='Stop at the first diverging tick')
+    args = parser.parse_args(argv)
+
+    report = compare_engines(load_scenario(args.scenario), args.engine, args.reference, args.ticks, args.seed,
+                             args.quantum, args.tolerance, args.stop)
+    print(report.summary())
+    return 0 if report.equivalent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import math
+from typing import Any, Dict
+from trafficSim.config import Configurable
+
+# Optional render detail, most important first; lower levels drop from the end.
+DETAIL = ('status', 'arrows', 'grid')
+
+
+class FrameBudget(Configurable):
+    """Chooses steps per frame and render detail to hold a frame rate and real-time factor.
+
+    Each frame the window asks ``plan(dt)`` how many steps to simulate and
+    reports the measured costs with ``record``. The simulation owes
+    ``real_time_factor`` simulated seconds per wall-clock second of the
+    previous frame; whole steps of that are simulated and the remainder is
+    carried to the next frame. Per-step and drawing costs are smoothed with
+    an exponential moving average.
+
+    When the steps for one frame at ``fps`` and the drawing do not fit in
+    that frame, the render detail in ``DETAIL`` is dropped from the end
+    (grid, then arrows, then the full status line). Frames then get longer
+    rather than the simulation falling behind, down to ``min_fps``: beyond
+    that the steps are capped, never below ``min_steps``, and the shortfall
+    is dropped instead of owed. A level is restored after ``patience``
+    frames in a row in which it is expected to fit with ``headroom`` of the
+    frame to spare. ``achieved_fps`` and ``achieved_real_time_factor``
+    report what the window actually reaches.
+    """
+
+    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.fps = 60
+        self.real_time_factor = 1.0
+        self.min_fps = 15
+        self.min_steps = 1
+        self.max_steps = 1000
+        self.smoothing = 0.1
+        self.headroom = 0.2
+        self.patience = 30
+
+    def init_properties(self) -> None:
+        if self.fps <= 0 or self.real_time_factor <= 0:
+            raise ValueError("fps and real_time_factor must be positive")
+        if not 0 < self.min_fps <= self.fps:
+            raise ValueError("min_fps must be between 0 and fps")
+        if not 0 <= self.min_steps <= self.max_steps:
+            raise ValueError("min_steps must be between 0 and max_steps")
+        if not 0 < self.smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.level = len(DETAIL)
+        self.step_cost: float | None = None
+        self.draw_cost: Dict[int, float] = {}
+        self.frames = 0
+        self.steps = 0
+        self.achieved_fps = 0.0
+        self.achieved_real_time_factor = 0.0
+        self._frame_seconds: float | None = None
+        self._sim_seconds: float | None = None
+        self._last_frame = 1 / self.fps
+        self._carry = 0.0
+        self._calm = 0
+
+    @property
+    def frame_time(self) -> float:
+        return 1 / self.fps
+
+    def shows(self, feature: str) -> bool:
+        """Whether a feature of ``DETAIL`` is drawn at the current level."""
+        return DETAIL.index(feature) < self.level
+
+    def wanted_steps(self, dt: float) -> float:
+        """Steps per frame that hold the target real-time factor."""
+        return self.real_time_factor / (self.fps * dt)
+
+    def affordable_steps(self) -> float:
+        """Steps that fit in a frame at ``min_fps`` next to the drawing at the current level."""
+        if not self.step_cost:
+            return math.inf
+        return (1 / self.min_fps - self.draw_cost.get(self.level, 0.0)) / self.step_cost
+
+    def plan(self, dt: float) -> int:
+        """Return the number of steps to simulate in the next frame."""
+        self._carry += self.real_time_factor * self._last_frame / dt
+        steps = int(self._carry)
+        self._carry -= steps
+        affordable = self.affordable_steps()
+        if steps > affordable:
+            # Behind the target: drop the shortfall rather than owing it.
+            steps = max(int(affordable), self.min_steps)
+        self.steps = min(steps, self.max_steps)
+        return self.steps
+
+    def record(self, steps: int, dt: float, sim_seconds: float, draw_seconds: float, frame_seconds: float) -> None:
+        """Report a finished frame and adapt the render detail.
+
+        Args:
+            steps: Steps simulated in the frame
+            dt: Simulation step in seconds
+            sim_seconds: Wall time spent simulating
+            draw_seconds: Wall time spent drawing
+            frame_seconds: Wall time of the whole frame, including waiting
+        """
+        self.frames += 1
+        if steps > 0:
+            self.step_cost = self._smooth(self.step_cost, sim_seconds / steps)
+        self.draw_cost[self.level] = self._smooth(self.draw_cost.get(self.level), draw_seconds)
+        if frame_seconds > 0:
+            self._last_frame = frame_seconds
+            self._frame_seconds = self._smooth(self._frame_seconds, frame_seconds)
+            self._sim_seconds = self._smooth(self._sim_seconds, steps * dt)
+            self.achieved_fps = 1 / self._frame_seconds
+            self.achieved_real_time_factor = self._sim_seconds / self._frame_seconds
+        self._adapt(dt)
+
+    def _smooth(self, average: float | None, value: float) -> float:
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def _expected(self, level: int, dt: float) -> float:
+        """Expected work of a frame at ``fps`` and a detail level."""
+        steps = max(min(self.wanted_steps(dt), self.max_steps), self.min_steps)
+        # A level not measured yet is assumed to cost what the current one does.
+        draw = self.draw_cost.get(level, self.draw_cost[self.level])
+        return steps * (self.step_cost or 0.0) + draw
+
+    def _adapt(self, dt: float) -> None:
+        if self.level > 0 and self._expected(self.level, dt) > self.frame_time:
+            self.level -= 1
+            self._calm = 0
+        elif self.level < len(DETAIL) and \
+                self._expected(self.level + 1, dt) < (1 - self.headroom) * self.frame_time:
+            self._calm += 1
+            if self._calm >= self.patience:
+                self.level += 1
+                self._calm = 0
+        else:
+            self._calm = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'frames': self.frames,
+            'steps': self.steps,
+            'level': self.level,
+            'detail': list(DETAIL[:self.level]),
+            'step_cost': self.step_cost,
+            'draw_cost': self.draw_cost.get(self.level),
+            'achieved_fps': self.achieved_fps,
+            'achieved_real_time_factor': self.achieved_real_time_factor,
+        }
@@ -0,0 +1,83 @@
+from collections import deque
+from typing import List, Optional, Tuple, TYPE_CHECKING
+from trafficSim.road import Road
+
+if TYPE_CHECKING:
+    from trafficSim.vehicle import Vehicle
+    from trafficSim.integrators import Step
+
+
+class MesoRoad(Road):
+    """A long road whose upstream part is a queue-based mesoscopic link.
+
+    Only the last ``micro_length`` metres, where the stop line and the
+    signal's slow zone are, hold vehicles simulated with IDM in
+    ``vehicles``. A vehicle entering the road joins a first-in first-out
+    point queue instead and is given the time it would take to cross the
+    upstream part at its desired speed. Once that time is up it is released
+    onto the microscopic part at the boundary, as soon as the last vehicle
+    there has left it at least ``s0``; it starts at the speed that gap
+    allows under its time headway ``T``, so the microscopic part sets the
+    discharge rate. Vehicles are only ever moved between the queue and
+    ``vehicles``, so every vehicle that enters the road leaves it.
+
+    The point queue stores the vehicles the upstream part holds at
+    ``jam_density`` (vehicles per metre), at least one. ``has_room`` is
+    false while it is full, so generators keep arrivals waiting and the
+    vehicles of the road upstream wait at its end: a full queue spills back.
+    Queued vehicles are not drawn or recorded.
+    """
+
+    def __init__(self, start: Tuple[float, float], end: Tuple[float, float], config: Optional[dict] = None) -> None:
+        Road.__init__(self, start, end, config)
+        self.queue: deque = deque()
+        self.clock = 0.0
+
+    def set_defaults(self) -> None:
+        Road.set_defaults(self)
+        self.micro_length = 60.0
+        self.jam_density = 0.15
+
+    def init_properties(self) -> None:
+        Road.init_properties(self)
+        self.boundary = max(self.length - self.micro_length, 0.0)
+        self.storage = max(int(self.boundary * self.jam_density), 1)
+
+    @property
+    def vehicle_count(self) -> int:
+        return len(self.vehicles) + len(self.queue)
+
+    def has_room(self, vehicle: 'Vehicle') -> bool:
+        """Whether the point queue has room for another vehicle."""
+        return len(self.queue) < self.storage
+
+    def admit(self, vehicle: 'Vehicle') -> None:
+        """Queue a vehicle entering the road until it reaches the microscopic part."""
+        ready = self.clock + self.boundary / vehicle._v_max
+        if self.queue:
+            ready = max(ready, self.queue[-1][0])
+        self.queue.append((ready, vehicle))
+
+    def update(self, dt: float, lead: Optional['Vehicle'] = None, lead_offset: float = 0.0,
+               step: Optional['Step'] = None, horizon: float = 0.0) -> None:
+        Road.update(self, dt, lead, lead_offset, step, horizon)
+        self.clock += dt
+        while self.queue and self.queue[0][0] <= self.clock:
+            vehicle = self.queue[0][1]
+            tail = self.vehicles[-1] if self.vehicles else None
+            v = vehicle._v_max
+            if tail is not None:
+                gap = tail.x - tail.l - self.boundary
+                if gap <= vehicle.s0:
+                    break
+                v = min(v, (gap - vehicle.s0) / vehicle.T)
+            self.queue.popleft()
+            vehicle.x = self.boundary
+            vehicle.v = v
+            vehicle.a = vehicle.acceleration(tail)
+            self.vehicles.append(vehicle)
+
+    def clear(self) -> List['Vehicle']:
+        vehicles = Road.clear(self) + [vehicle for _, vehicle in self.queue]
+        self.queue.clear()
+        return vehicles
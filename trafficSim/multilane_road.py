@@ -0,0 +1,173 @@
+import numpy as np
+from typing import List, Optional, Tuple, TYPE_CHECKING
+from trafficSim.road import Road
+from trafficSim.vehicle import Vehicle, idm_acceleration
+
+if TYPE_CHECKING:
+    from trafficSim.integrators import Step
+
+
+class MultiLaneRoad(Road):
+    """A road segment carrying several parallel lanes with lane changing.
+
+    ``vehicles`` keeps every vehicle on the road ordered by position, front
+    first, so hand-offs and spawning work as on a single-lane road. Each
+    vehicle's ``lane`` selects its leader for car following. After the IDM
+    step the lane contents are gathered into per-lane sorted position arrays
+    and lane changes are decided with MOBIL (Kesting, Treiber and Helbing):
+    a vehicle moves when its own IDM acceleration gain, plus ``politeness``
+    times the change for the old and new followers, exceeds
+    ``lane_change_threshold``, and the new follower would not brake harder
+    than ``safe_deceleration``. New leaders and followers are found for all
+    vehicles at once with ``np.searchsorted``.
+    """
+
+    def __init__(self, start: Tuple[float, float], end: Tuple[float, float], config: Optional[dict] = None) -> None:
+        Road.__init__(self, start, end, config)
+
+    def set_defaults(self) -> None:
+        Road.set_defaults(self)
+        self.num_lanes = 2
+        self.lane_width = 3.7
+        self.politeness = 0.2
+        self.lane_change_threshold = 0.2
+        self.safe_deceleration = 4.0
+        self.lane_changes = 0
+
+    def init_properties(self) -> None:
+        Road.init_properties(self)
+        self.width = self.num_lanes * self.lane_width
+
+    def lane_offset(self, vehicle: 'Vehicle') -> float:
+        return (vehicle.lane - (self.num_lanes - 1) / 2) * self.lane_width
+
+    def update(self, dt: float, lead: Optional['Vehicle'] = None, lead_offset: float = 0.0,
+               step: Optional['Step'] = None, horizon: float = 0.0) -> None:
+        if len(self.vehicles) == 0:
+            return
+        front = self.vehicles[0]
+        if step is None:
+            step = Vehicle.update
+
+        vehicles = list(self.vehicles)
+        last_in_lane: List[Optional['Vehicle']] = [None] * self.num_lanes
+        fronts: List['Vehicle'] = []
+        for vehicle in vehicles:
+            if not 0 <= vehicle.lane < self.num_lanes:
+                vehicle.lane = min(max(vehicle.lane, 0), self.num_lanes - 1)
+            lane_lead = last_in_lane[vehicle.lane]
+            if lane_lead is not None:
+                step(vehicle, lane_lead, dt, 0.0)
+            elif vehicle is front:
+                fronts.append(vehicle)
+                step(vehicle, lead, dt, lead_offset)
+            else:
+                fronts.append(vehicle)
+                step(vehicle, None, dt, 0.0)
+            last_in_lane[vehicle.lane] = vehicle
+
+        if self.traffic_signal_state:
+            for vehicle in fronts:
+                vehicle.unstop()
+            for vehicle in vehicles:
+                vehicle.unslow()
+        else:
+            for vehicle in fronts:
+                self.hold_at_signal(vehicle, horizon)
+
+        vehicles.sort(key=lambda vehicle: -vehicle.x)
+        if self.num_lanes > 1 and len(vehicles) > 1:
+            self.change_lanes(vehicles)
+
+        self.vehicles.clear()
+        self.vehicles.extend(vehicles)
+
+    def change_lanes(self, vehicles: List['Vehicle']) -> None:
+        """Apply MOBIL lane changes to vehicles ordered front first."""
+        n = len(vehicles)
+        x = np.fromiter((veh.x for veh in vehicles), float, n)
+        v = np.fromiter((veh.v for veh in vehicles), float, n)
+        length = np.fromiter((veh.l for veh in vehicles), float, n)
+        s0 = np.fromiter((veh.s0 for veh in vehicles), float, n)
+        headway = np.fromiter((veh.T for veh in vehicles), float, n)
+        v_max = np.fromiter((veh.v_max for veh in vehicles), float, n)
+        a_max = np.fromiter((veh.a_max for veh in vehicles), float, n)
+        sqrt_ab = np.fromiter((veh.sqrt_ab for veh in vehicles), float, n)
+        acc = np.fromiter((veh.a for veh in vehicles), float, n)
+        lane = np.fromiter((veh.lane for veh in vehicles), np.int64, n)
+        stopped = np.fromiter((veh.stopped for veh in vehicles), bool, n)
+
+        # Vehicles grouped by lane, rear first within each lane.
+        order = np.lexsort((x, lane))
+        lane_sorted = lane[order]
+        bounds = np.searchsorted(lane_sorted, np.arange(self.num_lanes + 1))
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+
+        def neighbour(pos: np.ndarray, lanes: np.ndarray) -> np.ndarray:
+            inside = (pos >= bounds[lanes]) & (pos < bounds[lanes + 1])
+            return np.where(inside, order[np.clip(pos, 0, n - 1)], -1)
+
+        def accel(i: np.ndarray, lead: np.ndarray) -> np.ndarray:
+            has_lead = lead >= 0
+            j = np.where(has_lead, lead, 0)
+            gap = np.where(has_lead, x[j] - x[i] - length[j], np.inf)
+            dv = np.where(has_lead, v[i] - v[j], 0.0)
+            return idm_acceleration(v[i], v_max[i], a_max[i], s0[i], headway[i], sqrt_ab[i], gap, dv)
+
+        everyone = np.arange(n)
+        old_lead = neighbour(rank + 1, lane)
+        old_follower = neighbour(rank - 1, lane)
+
+        # Gain of the old follower once the vehicle has left its lane.
+        o = np.where(old_follower >= 0, old_follower, 0)
+        old_follower_gain = np.where(old_follower >= 0, accel(o, old_lead) - acc[o], 0.0)
+
+        best_gain = np.full(n, -np.inf)
+        best_lane = lane.copy()
+        best_slot = np.zeros(n, dtype=np.int64)
+        xs = x[order]
+        for direction in (-1, 1):
+            target = lane + direction
+            movable = (target >= 0) & (target < self.num_lanes) & ~stopped
+            i = everyone[movable]
+            if i.size == 0:
+                continue
+            tl = target[movable]
+            # First vehicle in the target lane positioned at or ahead of us.
+            pos = np.empty(i.size, dtype=np.int64)
+            for k in np.unique(tl):
+                sel = tl == k
+                lo, hi = bounds[k], bounds[k + 1]
+                pos[sel] = lo + np.searchsorted(xs[lo:hi], x[i[sel]], side='right')
+            new_lead = neighbour(pos, tl)
+            new_follower = neighbour(pos - 1, tl)
+
+            has_lead = new_lead >= 0
+            lead_gap = np.where(has_lead, x[np.where(has_lead, new_lead, 0)] - x[i], np.inf)
+            lead_gap -= np.where(has_lead, length[np.where(has_lead, new_lead, 0)], 0.0)
+
+            has_follower = new_follower >= 0
+            f = np.where(has_follower, new_follower, 0)
+            follower_gap = np.where(has_follower, x[i] - length[i] - x[f], np.inf)
+            follower_new = np.where(has_follower, accel(f, i), 0.0)
+            follower_gain = np.where(has_follower, follower_new - acc[f], 0.0)
+
+            gain = accel(i, new_lead) - acc[i] + self.politeness * (follower_gain + old_follower_gain[i])
+            safe = (lead_gap > 0) & (follower_gap > 0) & (~has_follower | (follower_new >= -self.safe_deceleration))
+            better = safe & (gain > self.lane_change_threshold) & (gain > best_gain[i])
+
+            chosen = i[better]
+            best_gain[chosen] = gain[better]
+            best_lane[chosen] = tl[better]
+            best_slot[chosen] = pos[better]
+
+        changing = np.flatnonzero(best_lane != lane)
+        if changing.size == 0:
+            return
+        # Only one vehicle may move into each gap per step; the frontmost wins.
+        slots = best_lane[changing] * (n + 1) + best_slot[changing]
+        _, first = np.unique(slots, return_index=True)
+        for i in changing[first]:
+            vehicles[i].lane = int(best_lane[i])
+        self.lane_changes += first.size
@@ -0,0 +1,158 @@
+import math
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from trafficSim.batch import run_batch
+from trafficSim.ctm import CellTransmissionModel
+from trafficSim.result_cache import ResultCache
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+
+
+@dataclass(frozen=True)
+class SignalPlan:
+    """Timing of every traffic signal in a scenario.
+
+    ``splits`` and ``offsets`` hold one entry per signal, in the order of
+    ``Simulation.traffic_signals``; an empty ``splits`` keeps each signal's
+    fixed phase length.
+    """
+    cycle_length: float
+    splits: Tuple[Tuple[float, ...], ...] = ()
+    offsets: Tuple[float, ...] = ()
+
+    def apply(self, sim: 'Simulation') -> None:
+        for i, signal in enumerate(sim.traffic_signals):
+            splits = list(self.splits[i]) if i < len(self.splits) else None
+            offset = self.offsets[i] if i < len(self.offsets) else 0.0
+            signal.set_plan(self.cycle_length, splits, offset)
+        sim.wake()
+
+
+def default_objective(metrics: Dict[str, float]) -> float:
+    return metrics['vehicles_passed']
+
+
+class SignalPlanOptimizer(Configurable):
+    """Searches signal plans with successive halving.
+
+    All candidates are first simulated for ``min_horizon`` seconds. Only the
+    best ``1 / eta`` of them survive to the next round, which runs ``eta``
+    times longer, until one candidate remains or ``max_horizon`` is reached.
+    Poor plans are dropped after short runs, and most of the simulated time
+    goes to the promising ones. Every round is run in parallel with
+    ``run_batch``, and every candidate of a round sees the same ``seeds``, so
+    candidates are compared on identical demand. With a ``cache``, runs
+    already stored from earlier searches are not simulated again.
+
+    With ``screen_candidates``, that many random plans are first scored over
+    ``max_horizon`` with a ``CellTransmissionModel`` (configured by
+    ``screen_config``), and only the best ``num_candidates`` go on to the
+    microscopic runs.
+    """
+
+    def __init__(self, build: Callable[[], 'Simulation'], config: Dict[str, Any] | None = None) -> None:
+        """Create an optimizer for a scenario.
+
+        Args:
+            build: Picklable callable returning a freshly built simulation
+            config: Dictionary of configuration overrides
+        """
+        self.build = build
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.cycle_range: Tuple[float, float] = (15.0, 45.0)
+        self.min_split = 0.1
+        self.num_candidates = 27
+        self.min_horizon = 60.0
+        self.max_horizon = 540.0
+        self.eta = 3
+        self.seeds: Sequence[int] = (0,)
+        self.workers: Optional[int] = None
+        self.cache: Optional[ResultCache] = None
+        self.objective: Callable[[Dict[str, float]], float] = default_objective
+        self.screen_candidates = 0
+        self.screen_config: Dict[str, Any] = {}
+
+    def init_properties(self) -> None:
+        if self.eta < 2:
+            raise ValueError("eta must be at least 2")
+        sim = self.build()
+        self.phase_counts = [len(signal.cycle) for signal in sim.traffic_signals]
+        self.history: List[Dict[str, Any]] = []
+        self.simulated_time = 0.0
+        self._screening_model: Optional[CellTransmissionModel] = None
+
+    def sample_plans(self, n: int, rng: np.random.Generator) -> List[SignalPlan]:
+        """Draw random plans from the configured plan space.
+
+        Every phase gets at least ``min_split`` of its signal's cycle, and
+        offsets are uniform over the cycle.
+        """
+        low, high = self.cycle_range
+        plans: List[SignalPlan] = []
+        for _ in range(n):
+            cycle_length = float(rng.uniform(low, high))
+            splits = []
+            offsets = []
+            for phases in self.phase_counts:
+                free = max(1.0 - phases * self.min_split, 0.0)
+                shares = self.min_split + free * rng.dirichlet(np.ones(phases))
+                splits.append(tuple(float(share) for share in shares))
+                offsets.append(float(rng.uniform(0.0, cycle_length * phases)))
+            plans.append(SignalPlan(cycle_length, tuple(splits), tuple(offsets)))
+        return plans
+
+    def evaluate(self, plans: Sequence[SignalPlan], horizon: float) -> List[float]:
+        """Return the mean objective of each plan over all seeds."""
+        jobs = [(plan, horizon, seed) for plan in plans for seed in self.seeds]
+        results = run_batch(self.build, jobs, self.workers, self.cache)
+        self.simulated_time += horizon * len(jobs)
+        scores = np.array([self.objective(metrics) for metrics in results], dtype=float)
+        means: List[float] = scores.reshape(len(plans), len(self.seeds)).mean(axis=1).tolist()
+        return means
+
+    def screen(self, plans: Sequence[SignalPlan]) -> List[SignalPlan]:
+        """Return the best ``num_candidates`` plans by the cell transmission model.
+
+        The scores are kept in ``history`` as rung -1.
+        """
+        if self._screening_model is None:
+            self._screening_model = CellTransmissionModel(self.build, self.screen_config)
+        scores = self._screening_model.screen(plans, self.max_horizon, self.objective)
+        ranked = sorted(zip(plans, scores, strict=True), key=lambda item: -item[1])
+        for plan, score in ranked:
+            self.history.append({'rung': -1, 'horizon': self.max_horizon, 'plan': plan, 'score': score})
+        return [plan for plan, _ in ranked[:self.num_candidates]]
+
+    def optimize(self, candidates: Optional[Sequence[SignalPlan]] = None,
+                 seed: int = 0) -> List[Tuple[SignalPlan, float]]:
+        """Run successive halving and return the final candidates, best first.
+
+        Args:
+            candidates: Plans to consider, ``num_candidates`` random plans
+                (``screen_candidates`` when screening) by default
+            seed: Seed for sampling random candidates
+        """
+        if candidates is None:
+            num_plans = max(self.num_candidates, self.screen_candidates)
+            candidates = self.sample_plans(num_plans, np.random.default_rng(seed))
+        survivors = list(candidates)
+        if self.screen_candidates and len(survivors) > self.num_candidates:
+            survivors = self.screen(survivors)
+        horizon = self.min_horizon
+        rung = 0
+        while True:
+            scores = self.evaluate(survivors, horizon)
+            ranked = sorted(zip(survivors, scores, strict=True), key=lambda item: -item[1])
+            for plan, score in ranked:
+                self.history.append({'rung': rung, 'horizon': horizon, 'plan': plan, 'score': score})
+            if len(ranked) == 1 or horizon >= self.max_horizon:
+                return ranked
+            survivors = [plan for plan, _ in ranked[:math.ceil(len(ranked) / self.eta)]]
+            horizon = min(horizon * self.eta, self.max_horizon)
+            rung += 1
@@ -0,0 +1,201 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+
+# Per-vehicle columns of a recording and their dtypes.
+VEHICLE_COLUMNS: Dict[str, Any] = {
+    'id': np.int64,
+    'road': np.int32,
+    'x': np.float32,
+    'offset': np.float32,
+    'length': np.float32,
+    'height': np.float32,
+    'color': np.uint8,
+}
+
+
+def _rgb(color: Any) -> Tuple[int, int, int]:
+    if isinstance(color, (tuple, list)):
+        return (int(color[0]), int(color[1]), int(color[2]))
+    return (int(color), int(color), int(color))
+
+
+class TrajectoryRecorder(Configurable):
+    """Records a run as frames of vehicle positions and signal states.
+
+    Registered as an observer of the simulation, the recorder samples a
+    frame every ``interval`` simulated seconds. Frames are buffered and
+    written every ``chunk_frames`` frames to ``chunk_NNNNN.npz`` files in
+    ``path``: flat per-vehicle columns (see ``VEHICLE_COLUMNS``) with
+    per-frame ``offsets`` into them, the frame times and totals, and the
+    green/red state of every signal group. Vehicles keep the ``id`` given to
+    them at spawn, so trajectories can be followed across roads. ``meta.json`` describes the
+    network and lists the chunks, so a recording can be replayed without
+    the code that built the scenario.
+    """
+
+    def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
+        self.sim = sim
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.path = 'recording'
+        self.interval = 1 / 30
+        self.chunk_frames = 900
+
+    def init_properties(self) -> None:
+        self.directory = Path(self.path)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunks: List[Dict[str, Any]] = []
+        self.frames = 0
+        self._next_t = self.sim.t
+        self._last_t = self.sim.t
+        self._reset_buffer()
+
+    def _reset_buffer(self) -> None:
+        self._columns: Dict[str, List[Any]] = {name: [] for name in VEHICLE_COLUMNS}
+        self._counts: List[int] = []
+        self._times: List[float] = []
+        self._frame_counts: List[int] = []
+        self._passed: List[int] = []
+        self._signals: List[List[bool]] = []
+
+    def start(self) -> 'TrajectoryRecorder':
+        self.sim.observers.append(self.observe)
+        return self
+
+    def stop(self) -> None:
+        if self.observe in self.sim.observers:
+            self.sim.observers.remove(self.observe)
+        self.flush()
+        self.write_meta()
+
+    def __enter__(self) -> 'TrajectoryRecorder':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def observe(self, sim: 'Simulation') -> None:
+        """Simulation observer: record a frame when one is due."""
+        if sim.t < self._last_t:
+            # The clock was reset.
+            self._next_t = sim.t
+        self._last_t = sim.t
+        if sim.t + 1e-9 < self._next_t:
+            return
+        self._next_t += self.interval
+        self.capture()
+
+    def capture(self) -> None:
+        """Record the current state as a frame."""
+        columns = self._columns
+        count = 0
+        for road_index, road in enumerate(self.sim.roads):
+            for vehicle in road.vehicles:
+                columns['id'].append(vehicle.id)
+                columns['road'].append(road_index)
+                columns['x'].append(vehicle.x)
+                columns['offset'].append(road.lane_offset(vehicle))
+                columns['length'].append(vehicle.l)
+                columns['height'].append(vehicle.h)
+                columns['color'].append(_rgb(vehicle.color))
+                count += 1
+        self._counts.append(count)
+        self._times.append(self.sim.t)
+        self._frame_counts.append(self.sim.frame_count)
+        self._passed.append(self.sim.vehicles_passed)
+        self._signals.append([bool(state) for signal in self.sim.traffic_signals for state in signal.current_cycle])
+        self.frames += 1
+        if len(self._counts) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered frames as a chunk."""
+        if not self._counts:
+            return
+        name = f'chunk_{len(self.chunks):05d}.npz'
+        arrays: Dict[str, Any] = {column: np.asarray(self._columns[column], dtype=dtype)
+                                  for column, dtype in VEHICLE_COLUMNS.items()}
+        arrays['color'] = arrays['color'].reshape(-1, 3)
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(self._counts, out=offsets[1:])
+        np.savez(
+            self.directory / name,
+            offsets=offsets,
+            t=np.asarray(self._times),
+            frame_count=np.asarray(self._frame_counts, dtype=np.int64),
+            vehicles_passed=np.asarray(self._passed, dtype=np.int64),
+            signals=np.asarray(self._signals, dtype=bool).reshape(len(self._counts), -1),
+            **arrays,
+        )
+        self.chunks.append({'file': name, 'start': self.frames - len(self._counts), 'frames': len(self._counts)})
+        self._reset_buffer()
+
+    def write_meta(self) -> None:
+        road_ids = {id(road): i for i, road in enumerate(self.sim.roads)}
+        meta = {
+            'interval': self.interval,
+            'frames': self.frames,
+            'vehicle_rate': self.sim.vehicle_rate,
+            'roads': [{'start': list(map(float, road.start)), 'end': list(map(float, road.end)),
+                       'width': float(road.width), 'length': float(road.length)} for road in self.sim.roads],
+            'road_names': self.sim.road_names,
+            'signals': [{'roads': [[road_ids[id(road)] for road in group] for group in signal.roads],
+                         'phases': len(signal.current_cycle)} for signal in self.sim.traffic_signals],
+            'chunks': self.chunks,
+        }
+        with open(self.directory / 'meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+
+
+class Recording:
+    """Read access to a recording written by ``TrajectoryRecorder``."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.directory = Path(path)
+        with open(self.directory / 'meta.json') as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.num_frames: int = self.meta['frames']
+        self._starts = np.array([chunk['start'] for chunk in self.meta['chunks']], dtype=np.int64)
+        self._loaded: Optional[Tuple[int, Dict[str, np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def chunk(self, index: int) -> Dict[str, np.ndarray]:
+        """Return the arrays of a chunk; the last chunk read is kept loaded."""
+        if self._loaded is None or self._loaded[0] != index:
+            with np.load(self.directory / self.meta['chunks'][index]['file']) as data:
+                self._loaded = (index, {name: data[name] for name in data.files})
+        return self._loaded[1]
+
+    def read(self, index: int, names: List[str]) -> Dict[str, np.ndarray]:
+        """Read only the named arrays of a chunk, without keeping it loaded."""
+        with np.load(self.directory / self.meta['chunks'][index]['file']) as data:
+            return {name: data[name] for name in names}
+
+    def frame(self, i: int) -> Dict[str, Any]:
+        """Return frame ``i``: its time, totals, signal states and vehicle columns."""
+        if not 0 <= i < self.num_frames:
+            raise IndexError(f"Frame {i} out of range (recording has {self.num_frames} frames)")
+        c = int(np.searchsorted(self._starts, i, side='right')) - 1
+        data = self.chunk(c)
+        k = i - int(self._starts[c])
+        lo, hi = int(data['offsets'][k]), int(data['offsets'][k + 1])
+        frame: Dict[str, Any] = {name: data[name][lo:hi] for name in VEHICLE_COLUMNS}
+        frame['t'] = float(data['t'][k])
+        frame['frame_count'] = int(data['frame_count'][k])
+        frame['vehicles_passed'] = int(data['vehicles_passed'][k])
+        frame['signals'] = data['signals'][k]
+        return frame
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        for i in range(start, self.num_frames if stop is None else min(stop, self.num_frames)):
+            yield self.frame(i)
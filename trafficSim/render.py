@@ -0,0 +1,145 @@
+import math
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+import pygame
+from trafficSim.recorder import Recording
+from trafficSim.road import Road
+from trafficSim.window import Window
+
+
+class ReplaySignal:
+    """A recorded traffic signal: its groups of roads and the state of each group in the frame shown."""
+
+    def __init__(self, roads: List[List[Road]], num_groups: int) -> None:
+        self.roads = roads
+        self.num_groups = num_groups
+        self.current_cycle: Tuple[bool, ...] = ()
+
+
+class ReplayWindow(Window):
+    """A ``Window`` drawing recorded frames onto an off-screen surface.
+
+    Roads and signals are rebuilt from the recording's metadata, so all of
+    ``Window``'s drawing is reused; only the vehicles come from the frame
+    arrays instead of live ``Vehicle`` objects.
+    """
+
+    def __init__(self, recording: Recording, config: Dict[str, Any] | None = None) -> None:
+        meta = recording.meta
+        roads = [Road(tuple(road['start']), tuple(road['end']), {'width': road['width']})
+                 for road in meta['roads']]
+        self.signals = [ReplaySignal([[roads[i] for i in group] for group in signal['roads']], signal['phases'])
+                        for signal in meta['signals']]
+        sim = SimpleNamespace(roads=roads, traffic_signals=self.signals, t=0.0, frame_count=0,
+                              vehicles_passed=0, vehicles_present=0,
+                              vehicle_rate=meta['vehicle_rate'], is_paused=False)
+        Window.__init__(self, sim, config)  # type: ignore[arg-type]
+        self.recording = recording
+        self.frame: Optional[Dict[str, Any]] = None
+        pygame.font.init()
+        self.text_font = pygame.font.SysFont('Lucida Console', 16)
+        self.screen = pygame.Surface((self.width, self.height))
+
+    def show(self, i: int) -> None:
+        """Load frame ``i`` of the recording as the state to draw."""
+        frame = self.recording.frame(i)
+        self.frame = frame
+        self.sim.t = frame['t']
+        self.sim.frame_count = frame['frame_count']
+        self.sim.vehicles_passed = frame['vehicles_passed']
+        self.sim.vehicles_present = len(frame['id'])
+        states = frame['signals'].tolist()
+        k = 0
+        for signal in self.signals:
+            signal.current_cycle = tuple(states[k:k + signal.num_groups])
+            k += signal.num_groups
+
+    def draw_vehicles(self) -> None:
+        if self.frame is None:
+            return
+        frame = self.frame
+        roads = self.sim.roads
+        for road, x, offset, length, height, color in zip(frame['road'].tolist(), frame['x'].tolist(),
+                                                          frame['offset'].tolist(), frame['length'].tolist(),
+                                                          frame['height'].tolist(), frame['color'].tolist(), strict=True):
+            self.draw_on_road(roads[road], x, offset, (length, height), (color[0], color[1], color[2]))
+
+
+def _render_range(path: str, frames: List[Tuple[int, int]], output: str,
+                  config: Dict[str, Any] | None, image_format: str) -> List[str]:
+    """Worker: render ``(recorded frame, output number)`` pairs to image files."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    window = ReplayWindow(Recording(path), config)
+    written: List[str] = []
+    for i, n in frames:
+        window.show(i)
+        window.draw()
+        name = str(Path(output) / f'frame_{n:06d}.{image_format}')
+        pygame.image.save(window.screen, name)
+        written.append(name)
+    return written
+
+
+def render_recording(path: str | Path, output: str | Path, config: Dict[str, Any] | None = None,
+                     frame_step: int = 1, workers: Optional[int] = None,
+                     image_format: str = 'png') -> List[Path]:
+    """Render a recording to a numbered image sequence in parallel.
+
+    The frames are split into contiguous ranges, a few per worker, so each
+    worker mostly reads one recording chunk at a time. Output files are
+    numbered consecutively from ``frame_000000``, as ``encode_video``
+    expects. PNG compression costs several times the drawing itself; use
+    ``'bmp'`` or ``'tga'`` for intermediate frames that are only encoded.
+
+    Args:
+        path: Recording directory written by ``TrajectoryRecorder``
+        output: Directory for the PNG files
+        config: ``Window`` configuration (size, zoom, offset, colours)
+        frame_step: Render every ``frame_step``-th recorded frame
+        workers: Number of worker processes, the CPU count by default
+        image_format: File extension, which selects the image format
+
+    Returns:
+        Paths of the written images, in order
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    pairs = [(i, n) for n, i in enumerate(range(0, len(Recording(path)), frame_step))]
+    if not pairs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    size = math.ceil(len(pairs) / (workers * 4))
+    ranges = [pairs[k:k + size] for k in range(0, len(pairs), size)]
+
+    if workers == 1:
+        written = [_render_range(str(path), frames, str(output), config, image_format) for frames in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = list(executor.map(_render_range, [str(path)] * len(ranges), ranges,
+                                        [str(output)] * len(ranges), [config] * len(ranges),
+                                        [image_format] * len(ranges)))
+    return [Path(name) for names in written for name in names]
+
+
+def encode_video(frames: str | Path, output: str | Path, fps: float = 30.0, image_format: str = 'png') -> Path:
+    """Encode a ``render_recording`` image sequence into a video with ffmpeg.
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed or fails
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required to encode video; the image sequence can be used as is")
+    result = subprocess.run(
+        [ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps),
+         '-i', str(Path(frames) / f'frame_%06d.{image_format}'), '-pix_fmt', 'yuv420p', str(output)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+    return Path(output)
@@ -0,0 +1,161 @@
+import heapq
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
+from scipy.stats import t as student_t
+from trafficSim.batch import run_batch
+from trafficSim.config import Configurable
+from trafficSim.optimizer import default_objective
+from trafficSim.result_cache import ResultCache
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.optimizer import SignalPlan
+
+
+class RunningStats:
+    """Streaming mean and variance of a sequence of values (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, infinite with fewer than two values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.inf
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence: float = 0.95, count: Optional[int] = None) -> float:
+        """Half-width of the Student-t confidence interval of the mean.
+
+        Args:
+            confidence: Confidence level of the interval
+            count: Number of values to assume, the current count by default;
+                used to project the width after more replications
+        """
+        if self.count < 2:
+            return math.inf
+        n = self.count if count is None else count
+        return float(student_t.ppf((1 + confidence) / 2, self.count - 1)) * self.std / math.sqrt(n)
+
+
+class ReplicationController(Configurable):
+    """Runs replications of each configuration until its mean is known well enough.
+
+    Every configuration (a signal plan, or None for the scenario as built)
+    first gets ``min_replications`` runs. After each round the confidence
+    interval of the objective's mean is recomputed from streaming statistics;
+    configurations whose half-width is at most ``half_width`` stop, and the
+    next round's ``batch_size`` replications go one at a time to the open
+    configuration with the widest projected interval, so the noisiest
+    configurations get the most runs. No configuration gets more than
+    ``max_replications``. Replication ``i`` of every configuration uses seed
+    ``first_seed + i``, so configurations are compared on the same demand.
+    """
+
+    def __init__(self, build: Callable[[], 'Simulation'], config: Dict[str, Any] | None = None) -> None:
+        """Create a controller for a scenario.
+
+        Args:
+            build: Picklable callable returning a freshly built simulation
+            config: Dictionary of configuration overrides
+        """
+        self.build = build
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.horizon = 300.0
+        self.half_width = 10.0
+        self.confidence = 0.95
+        self.min_replications = 3
+        self.max_replications = 30
+        self.batch_size: int = os.cpu_count() or 1
+        self.first_seed = 0
+        self.workers: Optional[int] = None
+        self.cache: Optional[ResultCache] = None
+        self.objective: Callable[[Dict[str, float]], float] = default_objective
+
+    def init_properties(self) -> None:
+        if not 0 < self.confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if self.half_width <= 0:
+            raise ValueError("half_width must be positive")
+        if self.min_replications < 2:
+            raise ValueError("min_replications must be at least 2")
+        if self.max_replications < self.min_replications:
+            raise ValueError("max_replications must not be below min_replications")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.stats: List[RunningStats] = []
+        self.rounds = 0
+        self.simulated_time = 0.0
+
+    def converged(self, stats: RunningStats) -> bool:
+        return stats.half_width(self.confidence) <= self.half_width
+
+    def allocate(self, stats: Sequence[RunningStats]) -> Dict[int, int]:
+        """Split the next round's replications between the open configurations.
+
+        Returns:
+            Number of new replications by configuration index
+        """
+        heap = []
+        for i, s in enumerate(stats):
+            if s.count < self.max_replications and not self.converged(s):
+                heap.append((-s.half_width(self.confidence, s.count + 1), i))
+        heapq.heapify(heap)
+        requests: Dict[int, int] = {}
+        for _ in range(self.batch_size):
+            if not heap:
+                break
+            _, i = heapq.heappop(heap)
+            requests[i] = requests.get(i, 0) + 1
+            count = stats[i].count + requests[i]
+            if count < self.max_replications:
+                heapq.heappush(heap, (-stats[i].half_width(self.confidence, count + 1), i))
+        return requests
+
+    def run(self, configurations: Sequence[Optional['SignalPlan']]) -> List[Dict[str, Any]]:
+        """Replicate every configuration until it converges or reaches ``max_replications``.
+
+        Returns:
+            Per configuration: ``plan``, ``replications``, ``mean``, ``std``,
+            ``half_width`` and ``converged``, in configuration order
+        """
+        configurations = list(configurations)
+        self.stats = [RunningStats() for _ in configurations]
+        requests = dict.fromkeys(range(len(configurations)), self.min_replications)
+        while requests:
+            owners: List[int] = []
+            jobs = []
+            for i, count in requests.items():
+                for replication in range(self.stats[i].count, self.stats[i].count + count):
+                    owners.append(i)
+                    jobs.append((configurations[i], self.horizon, self.first_seed + replication))
+            results = run_batch(self.build, jobs, self.workers, self.cache)
+            self.simulated_time += self.horizon * len(jobs)
+            self.rounds += 1
+            for i, metrics in zip(owners, results, strict=True):
+                self.stats[i].push(self.objective(metrics))
+            requests = self.allocate(self.stats)
+
+        return [{
+            'plan': plan,
+            'replications': s.count,
+            'mean': s.mean,
+            'std': s.std,
+            'half_width': s.half_width(self.confidence),
+            'converged': self.converged(s),
+        } for plan, s in zip(configurations, self.stats, strict=True)]
@@ -0,0 +1,192 @@
+import heapq
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from trafficSim.config import Configurable
+from trafficSim.meso_road import MesoRoad
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.vehicle import Vehicle
+
+
+class Rerouter(Configurable):
+    """En-route rerouting on live link travel times.
+
+    Link travel times are exponentially smoothed from the traversal times
+    measured at every hand-off. A road whose front vehicle has already been
+    on it longer than the estimate (a queue at a red light) costs at least
+    that long.
+
+    Every ``interval`` seconds the vehicles waiting to leave a diverging road
+    are reconsidered in one batch. They are tracked as they enter and leave
+    roads (``enter`` and ``leave``, called by the generators and hand-offs),
+    so a batch only touches the vehicles that can choose. For each vehicle only the part of its
+    route within ``horizon`` seconds of travel is searched again, with a
+    Dijkstra search bounded by the cost of the current plan, so each search
+    touches a neighbourhood of the vehicle rather than the whole network.
+    Search results are shared by all vehicles with the same source and
+    rejoin road, and reused across intervals until a link they explored
+    changes cost by more than ``change_threshold``.
+    """
+
+    def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
+        self.sim = sim
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.interval = 5.0
+        self.horizon = 120.0
+        self.min_gain = 0.1
+        self.smoothing = 0.3
+        self.free_speed = 20.0
+        self.change_threshold = 0.2
+        self.last_run_time = 0.0
+
+    def init_properties(self) -> None:
+        self.reroutes = 0
+        self.searches = 0
+        self.cache_hits = 0
+        self._num_roads = -1
+        self._cache: Dict[Tuple[int, int], Tuple[Optional[List[int]], float, float, np.ndarray, np.ndarray]] = {}
+        # Vehicles on diverging roads, in the order they entered them.
+        self._candidates: Dict['Vehicle', None] = {}
+        self._prepare()
+
+    def _prepare(self) -> None:
+        graph = self.sim.road_graph
+        if graph.num_roads == self._num_roads:
+            return
+        previous = getattr(self, 'link_times', np.empty(0))
+        self.link_times = graph.lengths / self.free_speed
+        self.link_times[:previous.size] = previous[:graph.num_roads]
+        self._successors = [graph.successors(r).tolist() for r in range(graph.num_roads)]
+        self._decision_roads = {r for r in range(graph.num_roads) if len(self._successors[r]) > 1}
+        self._num_roads = graph.num_roads
+        self._cache.clear()
+        self._candidates = {}
+        for road_index in sorted(self._decision_roads):
+            road = self.sim.roads[road_index]
+            queued = [vehicle for _, vehicle in road.queue] if isinstance(road, MesoRoad) else []
+            for vehicle in [*road.vehicles, *queued]:
+                self.enter(vehicle)
+
+    def enter(self, vehicle: 'Vehicle') -> None:
+        """Track a vehicle that has just entered the current road of its route."""
+        if vehicle.route_id >= 0 and int(vehicle.path[vehicle.current_road_index]) in self._decision_roads:
+            self._candidates[vehicle] = None
+
+    def leave(self, vehicle: 'Vehicle') -> None:
+        """Stop tracking a vehicle leaving its road."""
+        self._candidates.pop(vehicle, None)
+
+    def clear(self) -> None:
+        """Forget all tracked vehicles, after the vehicles were removed from the roads."""
+        self._candidates.clear()
+
+    def record(self, road_index: int, travel_time: float) -> None:
+        """Fold a measured traversal time of a road into its estimate."""
+        self.link_times[road_index] += self.smoothing * (travel_time - self.link_times[road_index])
+
+    def road_cost(self, road_index: int) -> float:
+        """Return the current expected travel time of a road."""
+        cost = float(self.link_times[road_index])
+        vehicles = self.sim.roads[road_index].vehicles
+        if vehicles:
+            cost = max(cost, self.sim.t - vehicles[0].time_entered)
+        return cost
+
+    def next_update(self, t: float) -> float:
+        return self.last_run_time + self.interval
+
+    def update(self) -> None:
+        if self.sim.t < self.last_run_time:
+            # The clock was reset for a new iteration.
+            self.last_run_time = self.sim.t
+        if self.sim.t - self.last_run_time < self.interval:
+            return
+        self.last_run_time = self.sim.t
+        self._prepare()
+
+        costs: Dict[int, float] = {}
+        results: Dict[Tuple[int, int], Tuple[Optional[List[int]], float]] = {}
+        for vehicle in self._candidates:
+            self._reroute(vehicle, costs, results)
+
+    def _cost(self, road_index: int, costs: Dict[int, float]) -> float:
+        cost = costs.get(road_index)
+        if cost is None:
+            cost = costs[road_index] = self.road_cost(road_index)
+        return cost
+
+    def _reroute(self, vehicle: 'Vehicle', costs: Dict[int, float],
+                 results: Dict[Tuple[int, int], Tuple[Optional[List[int]], float]]) -> None:
+        route = vehicle.path
+        p = vehicle.current_road_index
+        if p + 1 >= len(route):
+            return
+
+        # Rejoin the current plan at the first road beyond the horizon.
+        q = p
+        planned = 0.0
+        while q + 1 < len(route) and planned < self.horizon:
+            q += 1
+            planned += self._cost(int(route[q]), costs)
+
+        key = (int(route[p]), int(route[q]))
+        result = results.get(key)
+        if result is None:
+            result = results[key] = self._search(key[0], key[1], planned, costs)
+        path, cost = result
+
+        if path is None or cost >= planned * (1 - self.min_gain):
+            return
+        graph = self.sim.road_graph
+        vehicle.route_id = graph.intern_route([*route[:p], *path, *route[q + 1:]])
+        vehicle.path = graph.route(vehicle.route_id)
+        self.reroutes += 1
+
+    def _search(self, source: int, target: int, limit: float,
+                costs: Dict[int, float]) -> Tuple[Optional[List[int]], float]:
+        cached = self._cache.get((source, target))
+        if cached is not None and (cached[0] is not None or cached[2] >= limit):
+            cached_path, cached_cost, _, explored, explored_costs = cached
+            current = np.array([self._cost(r, costs) for r in explored])
+            if np.all(np.abs(current - explored_costs) <= self.change_threshold * explored_costs):
+                self.cache_hits += 1
+                return cached_path, cached_cost
+
+        self.searches += 1
+        dist = {source: 0.0}
+        previous: Dict[int, int] = {}
+        heap = [(0.0, source)]
+        explored_list: List[int] = []
+        found = False
+        while heap:
+            d, road = heapq.heappop(heap)
+            if d > dist[road]:
+                continue
+            if road == target:
+                found = True
+                break
+            for nxt in self._successors[road]:
+                cost = self._cost(nxt, costs)
+                nd = d + cost
+                if nd < limit and nd < dist.get(nxt, np.inf):
+                    if nxt not in dist:
+                        explored_list.append(nxt)
+                    dist[nxt] = nd
+                    previous[nxt] = road
+                    heapq.heappush(heap, (nd, nxt))
+
+        path: Optional[List[int]] = None
+        if found:
+            path = [target]
+            while path[-1] != source:
+                path.append(previous[path[-1]])
+            path.reverse()
+
+        explored = np.array(explored_list, dtype=np.int64)
+        explored_costs = np.array([costs[r] for r in explored_list])
+        self._cache[(source, target)] = (path, dist.get(target, np.inf), limit, explored, explored_costs)
+        return path, dist.get(target, np.inf)
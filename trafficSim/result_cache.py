@@ -0,0 +1,178 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import time
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, TYPE_CHECKING
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+    from trafficSim.optimizer import SignalPlan
+
+_SKIP = object()
+
+
+def _canonical(value: Any) -> Any:
+    """Convert a value to plain JSON types, or ``_SKIP`` for live objects."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return value if np.isfinite(value) else repr(value)
+    if isinstance(value, np.generic):
+        return _canonical(value.item())
+    if isinstance(value, np.ndarray):
+        return [_canonical(item) for item in value.tolist()]
+    if isinstance(value, (list, tuple)):
+        elements = [_canonical(item) for item in value]
+        return [item for item in elements if item is not _SKIP]
+    if isinstance(value, dict):
+        if not all(isinstance(k, (str, int)) for k in value):
+            return _SKIP
+        entries = {str(k): _canonical(v) for k, v in value.items()}
+        return {k: v for k, v in entries.items() if v is not _SKIP}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {'type': type(value).__name__, **_canonical(dataclasses.asdict(value))}
+    return _SKIP
+
+
+def _settings(obj: Any) -> Dict[str, Any]:
+    """Return the public, plain-valued attributes of a component."""
+    settings: Dict[str, Any] = {'type': type(obj).__name__}
+    for key, value in sorted(vars(obj).items()):
+        if key.startswith('_'):
+            continue
+        value = _canonical(value)
+        if value is not _SKIP:
+            settings[key] = value
+    return settings
+
+
+def fingerprint(sim: 'Simulation') -> Dict[str, Any]:
+    """Describe a built simulation in plain JSON types.
+
+    Covers the simulation settings, every road, generator (demand), signal
+    (with its road groups as road indices), conflict zone and the rerouter.
+    Live state such as vehicle objects is left out.
+    """
+    road_ids = {id(road): i for i, road in enumerate(sim.roads)}
+    signals = []
+    for signal in sim.traffic_signals:
+        settings = _settings(signal)
+        settings['roads'] = [[road_ids[id(road)] for road in group] for group in signal.roads]
+        signals.append(settings)
+    return {
+        'simulation': _settings(sim),
+        'roads': [_settings(road) for road in sim.roads],
+        'generators': [_settings(gen) for gen in sim.generators],
+        'signals': signals,
+        'conflict_zones': [_settings(zone) for zone in sim.conflict_zones],
+        'rerouter': _settings(sim.rerouter) if sim.rerouter is not None else None,
+    }
+
+
+@lru_cache(maxsize=1)
+def engine_version() -> str:
+    """Return a digest of the package sources.
+
+    Any change to the simulation code gives a new version, which
+    invalidates results computed by the old code.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def run_key(scenario: Dict[str, Any], plan: Optional['SignalPlan'], horizon: float, seed: int) -> str:
+    """Return the cache key of one run of a fingerprinted scenario."""
+    payload = {
+        'scenario': scenario,
+        'plan': _canonical(plan),
+        'horizon': float(horizon),
+        'seed': int(seed),
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache(Configurable):
+    """Local store of run metrics keyed by content.
+
+    Results live in an SQLite file keyed by ``run_key``: a SHA-256 over the
+    scenario fingerprint, signal plan, horizon and seed. Entries written by a
+    different ``engine_version`` are dropped when the cache is opened. When
+    more than ``max_entries`` results are stored, the least recently used
+    ones are evicted.
+    """
+
+    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.path = str(Path.home() / '.cache' / 'trafficSim' / 'results.sqlite')
+        self.max_entries = 100000
+        self.engine = engine_version()
+
+    def init_properties(self) -> None:
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, engine TEXT NOT NULL, metrics TEXT NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self.connection.execute('DELETE FROM results WHERE engine != ?', (self.engine,))
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+        self._last_used = 0.0
+
+    def _now(self) -> float:
+        # Strictly increasing, so recency is well defined within one clock tick.
+        self._last_used = max(time.time(), self._last_used + 1e-6)
+        return self._last_used
+
+    def __len__(self) -> int:
+        return int(self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored metrics of a run, or None."""
+        row = self.connection.execute('SELECT metrics FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (self._now(), key))
+        self.connection.commit()
+        metrics: Dict[str, Any] = json.loads(row[0])
+        return metrics
+
+    def put(self, key: str, metrics: Dict[str, Any]) -> None:
+        """Store the metrics of a run, evicting the least recently used beyond ``max_entries``."""
+        self.put_many({key: metrics})
+
+    def put_many(self, results: Dict[str, Dict[str, Any]]) -> None:
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO results (key, engine, metrics, last_used) VALUES (?, ?, ?, ?)',
+            [(key, self.engine, json.dumps(metrics), self._now()) for key, metrics in results.items()],
+        )
+        self.connection.execute(
+            'DELETE FROM results WHERE key IN '
+            '(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+        self.connection.commit()
+
+    def clear(self) -> None:
+        self.connection.execute('DELETE FROM results')
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -1,11 +1,12 @@
 from scipy.spatial import distance
 from collections import deque
-from typing import Optional, TYPE_CHECKING, Tuple
+from typing import List, Optional, TYPE_CHECKING, Tuple
 from trafficSim.config import Configurable
 
 if TYPE_CHECKING:
     from trafficSim.vehicle import Vehicle
     from trafficSim.traffic_signal import TrafficSignal
+    from trafficSim.integrators import Step
 
 
 class Road(Configurable):
@@ -18,6 +19,7 @@ class Road(Configurable):
 
     def set_defaults(self) -> None:
         self.has_traffic_signal = False
+        self.width = 3.7
 
     def init_properties(self) -> None:
         self.length = distance.euclidean(self.start, self.end)
@@ -29,6 +31,29 @@ class Road(Configurable):
         self.traffic_signal_group = group
         self.has_traffic_signal = True
 
+    @property
+    def vehicle_count(self) -> int:
+        """Number of vehicles on the road."""
+        return len(self.vehicles)
+
+    def has_room(self, vehicle: 'Vehicle') -> bool:
+        """Whether a vehicle can enter at the start of the road: the last vehicle is its length plus ``s0`` in."""
+        return len(self.vehicles) == 0 or self.vehicles[-1].x > vehicle.s0 + vehicle.l
+
+    def admit(self, vehicle: 'Vehicle') -> None:
+        """Place a vehicle entering the road at the back, at its current position."""
+        self.vehicles.append(vehicle)
+
+    def clear(self) -> List['Vehicle']:
+        """Remove every vehicle from the road and return them."""
+        vehicles = list(self.vehicles)
+        self.vehicles.clear()
+        return vehicles
+
+    def lane_offset(self, vehicle: 'Vehicle') -> float:
+        """Return the lateral offset of a vehicle from the road centre line."""
+        return 0.0
+
     @property
     def traffic_signal_state(self) -> bool:
         if self.has_traffic_signal:
@@ -36,22 +61,54 @@ class Road(Configurable):
             return bool(self.traffic_signal.current_cycle[i])
         return True
 
-    def update(self, dt: float) -> None:
+    def update(self, dt: float, lead: Optional['Vehicle'] = None, lead_offset: float = 0.0,
+               step: Optional['Step'] = None, horizon: float = 0.0) -> None:
+        """Advance the vehicles on this road by one step.
+
+        Args:
+            dt: Timestep duration
+            lead: Leader of the front vehicle on a road ahead, if any
+            lead_offset: Offset from the leader's road to this road's start
+            step: Integrator step (see ``integrators``), ``Vehicle.update`` by default
+            horizon: Seconds ahead a vehicle is held at a red signal (see ``hold_at_signal``)
+        """
         n = len(self.vehicles)
 
         if n > 0:
-            self.vehicles[0].update(None, dt)
-            for i in range(1, n):
-                lead = self.vehicles[i - 1]
-                self.vehicles[i].update(lead, dt)
-
-            if self.traffic_signal_state:
-                self.vehicles[0].unstop()
-                for vehicle in self.vehicles:
-                    vehicle.unslow()
+            if step is None:
+                self.vehicles[0].update(lead, dt, lead_offset)
+                for i in range(1, n):
+                    lead = self.vehicles[i - 1]
+                    self.vehicles[i].update(lead, dt)
             else:
-                if self.vehicles[0].x >= self.length - self.traffic_signal.slow_distance:
-                    self.vehicles[0].slow(self.traffic_signal.slow_factor * self.vehicles[0]._v_max)
-                if (self.vehicles[0].x >= self.length - self.traffic_signal.stop_distance and
-                    self.vehicles[0].x <= self.length - self.traffic_signal.stop_distance / 2):
-                    self.vehicles[0].stop()
+                step(self.vehicles[0], lead, dt, lead_offset)
+                for i in range(1, n):
+                    step(self.vehicles[i], self.vehicles[i - 1], dt, 0.0)
+
+            self.apply_signal(horizon)
+
+    def apply_signal(self, horizon: float = 0.0) -> None:
+        """Release the queue on green, or hold its front vehicle on red."""
+        if self.traffic_signal_state:
+            self.vehicles[0].unstop()
+            for vehicle in self.vehicles:
+                vehicle.unslow()
+        else:
+            self.hold_at_signal(self.vehicles[0], horizon)
+
+    def hold_at_signal(self, vehicle: 'Vehicle', horizon: float = 0.0) -> None:
+        """Slow and stop the front vehicle of a queue facing a red signal.
+
+        The vehicle is slowed inside ``slow_distance`` and stopped inside the
+        stop zone, between ``stop_distance`` and half of it from the end of
+        the road. With a ``horizon``, positions are taken where the vehicle
+        would be that many seconds ahead at its current speed, so a long
+        step cannot carry it over either zone, and a stopped vehicle brakes
+        from now on.
+        """
+        ahead = vehicle.x + vehicle.v * horizon
+        if ahead >= self.length - self.traffic_signal.slow_distance:
+            vehicle.slow(self.traffic_signal.slow_factor * vehicle._v_max)
+        if (ahead >= self.length - self.traffic_signal.stop_distance and
+            vehicle.x <= self.length - self.traffic_signal.stop_distance / 2):
+            vehicle.stop(brake=horizon > 0)
@@ -0,0 +1,171 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from trafficSim.road import Road
+
+
+class RoadGraph:
+    """Road-to-road connectivity derived from shared road endpoints.
+
+    Two roads are connected when the end point of the first coincides with
+    the start point of the second. Successors are stored in compressed sparse
+    row (CSR) form: the successors of road ``i`` are
+    ``indices[indptr[i]:indptr[i + 1]]``.
+
+    Routes are validated against this adjacency and interned, so every vehicle
+    travelling the same sequence of roads shares one read-only NumPy array.
+    For each interned route a next-road table is kept alongside it, holding
+    the road that follows each position of the route (``-1`` at the end).
+    """
+
+    def __init__(self, roads: Sequence['Road'], precision: int = 6) -> None:
+        """Build the graph for a list of roads.
+
+        Args:
+            roads: Roads in simulation index order
+            precision: Decimal places used when matching endpoints
+        """
+        self.precision = precision
+        self.num_roads = len(roads)
+
+        node_ids: Dict[Tuple[float, float], int] = {}
+        tail = np.empty(self.num_roads, dtype=np.int64)
+        head = np.empty(self.num_roads, dtype=np.int64)
+        for i, road in enumerate(roads):
+            tail[i] = node_ids.setdefault(self._node_key(road.start), len(node_ids))
+            head[i] = node_ids.setdefault(self._node_key(road.end), len(node_ids))
+
+        self.num_nodes = len(node_ids)
+        self.tail_node = tail
+        self.head_node = head
+        self.lengths = np.array([road.length for road in roads], dtype=np.float64)
+
+        # Roads leaving each node, in CSR form over nodes.
+        order = np.argsort(tail, kind='stable')
+        node_ptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tail, minlength=self.num_nodes), out=node_ptr[1:])
+        self.node_ptr = node_ptr
+        self.node_roads = order.astype(np.int64)
+
+        # Road successors: every road leaving the node a road ends at.
+        counts = node_ptr[head + 1] - node_ptr[head]
+        indptr = np.zeros(self.num_roads + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        self.indptr = indptr
+        if self.num_roads:
+            self.indices = np.concatenate(
+                [self.node_roads[node_ptr[h]:node_ptr[h + 1]] for h in head]
+            ).astype(np.int64)
+        else:
+            self.indices = np.empty(0, dtype=np.int64)
+        # The only road that can follow each road, or -1 at ends and diverges.
+        self.successor = np.full(self.num_roads, -1, dtype=np.int64)
+        single = counts == 1
+        self.successor[single] = self.indices[indptr[:-1][single]]
+
+        self.routes: List[np.ndarray] = []
+        self.next_roads: List[np.ndarray] = []
+        self._route_ids: Dict[Tuple[int, ...], int] = {}
+        self._od_routes: Dict[Tuple[int, int], int] = {}
+
+    def _node_key(self, point: Tuple[float, float]) -> Tuple[float, float]:
+        return (round(float(point[0]), self.precision), round(float(point[1]), self.precision))
+
+    def successors(self, road_index: int) -> np.ndarray:
+        """Return the indices of the roads that can follow a road."""
+        return self.indices[self.indptr[road_index]:self.indptr[road_index + 1]]
+
+    def is_connected(self, from_road: int, to_road: int) -> bool:
+        """Return whether ``to_road`` starts where ``from_road`` ends."""
+        return bool(self.tail_node[to_road] == self.head_node[from_road])
+
+    def validate_route(self, path: Sequence[int]) -> np.ndarray:
+        """Check a route against the network and return it as an int array.
+
+        Raises:
+            ValueError: If the route is empty, references an unknown road or
+                contains two consecutive roads that do not share an endpoint
+        """
+        route = np.asarray(path, dtype=np.int64).reshape(-1)
+        if route.size == 0:
+            raise ValueError("Route must contain at least one road")
+        if route.min() < 0 or route.max() >= self.num_roads:
+            bad = int(route[(route < 0) | (route >= self.num_roads)][0])
+            raise ValueError(f"Route references unknown road {bad} (network has {self.num_roads} roads)")
+        broken = np.flatnonzero(self.head_node[route[:-1]] != self.tail_node[route[1:]])
+        if broken.size:
+            k = int(broken[0])
+            raise ValueError(
+                f"Route is not connected: road {int(route[k])} does not lead to "
+                f"road {int(route[k + 1])} (position {k})"
+            )
+        return route
+
+    def intern_route(self, path: Sequence[int] | np.ndarray) -> int:
+        """Validate a route and return its id, reusing an existing identical route."""
+        key = tuple(int(i) for i in np.asarray(path, dtype=np.int64).reshape(-1))
+        route_id = self._route_ids.get(key)
+        if route_id is not None:
+            return route_id
+
+        route = self.validate_route(key)
+        route.flags.writeable = False
+        next_road = np.empty_like(route)
+        next_road[:-1] = route[1:]
+        next_road[-1] = -1
+        next_road.flags.writeable = False
+
+        route_id = len(self.routes)
+        self.routes.append(route)
+        self.next_roads.append(next_road)
+        self._route_ids[key] = route_id
+        return route_id
+
+    def route(self, route_id: int) -> np.ndarray:
+        """Return the interned road array of a route."""
+        return self.routes[route_id]
+
+    def cost_matrix(self, weights: Optional[np.ndarray] = None) -> csr_matrix:
+        """Return the successor adjacency weighted by the cost of entering each road.
+
+        Args:
+            weights: Per-road traversal cost, road lengths by default
+        """
+        if weights is None:
+            weights = self.lengths
+        # Explicit zeros would read as missing edges, so keep costs positive.
+        data = np.maximum(np.asarray(weights, dtype=np.float64)[self.indices], 1e-9)
+        return csr_matrix((data, self.indices, self.indptr), shape=(self.num_roads, self.num_roads))
+
+    def shortest_route(self, origin: int, destination: int) -> int:
+        """Return the route id of the shortest path between two roads."""
+        return self.shortest_routes([(origin, destination)])[0]
+
+    def shortest_routes(self, pairs: Iterable[Tuple[int, int]]) -> List[int]:
+        """Return route ids of the shortest paths for many origin-destination pairs.
+
+        Both origin and destination are road indices and are part of the route.
+        Results are cached per pair, and uncached pairs are solved with one
+        Dijkstra run per distinct origin.
+
+        Raises:
+            ValueError: If a destination cannot be reached from its origin
+        """
+        pair_list = [(int(o), int(d)) for o, d in pairs]
+        missing = sorted({pair for pair in pair_list if pair not in self._od_routes})
+        if missing:
+            origins = np.unique([o for o, _ in missing])
+            dist, pred = dijkstra(self.cost_matrix(), indices=origins, return_predecessors=True)
+            row_of = {int(o): i for i, o in enumerate(origins)}
+            for origin, destination in missing:
+                row = row_of[origin]
+                if not np.isfinite(dist[row, destination]):
+                    raise ValueError(f"Road {destination} is not reachable from road {origin}")
+                path = [destination]
+                while path[-1] != origin:
+                    path.append(int(pred[row, path[-1]]))
+                self._od_routes[(origin, destination)] = self.intern_route(path[::-1])
+        return [self._od_routes[pair] for pair in pair_list]
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from trafficSim.simulation import Simulation
+from trafficSim.conflict_zone import ConflictZone
 from trafficSim.curve import turn_road, TURN_LEFT, TURN_RIGHT
 
 
@@ -37,19 +38,39 @@ class IntersectionBuilder:
         self.b = b
         self.length = length
 
-    def build_four_way_intersection(self, num_lanes: int = 3) -> List[int]:
+    def build_four_way_intersection(self, num_lanes: int = 3, multilane: bool = False,
+                                    micro_length: Optional[float] = None) -> List[int]:
         """Build a standard 4-way intersection with configurable lanes.
 
         Args:
             num_lanes: Number of lanes per direction
+            multilane: Build each approach as one MultiLaneRoad with
+                ``num_lanes`` lanes sharing a single set of junction roads,
+                instead of a separate road set per lane
+            micro_length: Build the roads as a hybrid of MesoRoads: each
+                incoming road is simulated with IDM only over this many
+                metres before the junction, and each outgoing road, where
+                nothing downstream holds vehicles back, is entirely
+                mesoscopic
+
+        Every road is also registered in ``sim.road_names`` with the lane
+        number (from 1) as suffix: ``<approach>_in_<k>``, ``<approach>_out_<k>``
+        and ``<approach>_straight_<k>`` for the straight roads, and
+        ``<approach>_left_<k>`` and ``<approach>_right_<k>`` for the chains of
+        turn segments, where ``<approach>`` is ``west``, ``south``, ``east``
+        or ``north``.
 
         Returns:
             List of road indices that were created
         """
+        if multilane and micro_length is not None:
+            raise ValueError("Multilane approaches cannot be built as MesoRoads")
+        exit_length = None if micro_length is None else 0.0
         road_index = 0
         created_indices: List[int] = []
+        approach_lanes = num_lanes if multilane else 1
 
-        for lane in range(num_lanes):
+        for lane in range(1 if multilane else num_lanes):
             lane_offset = lane * 4
 
             west_right_start = (-(self.b + self.length), self.a - lane_offset)
@@ -76,77 +97,174 @@ class IntersectionBuilder:
             north_right = (-self.a + lane_offset, -self.b)
             north_left = (self.a - lane_offset, -self.b)
 
-            self._add_road(road_index, RoadSegment(west_right_start, west_right))
+            self._add_road(road_index, RoadSegment(west_right_start, west_right), approach_lanes, micro_length)
+            self.sim.name_roads(f'west_in_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(south_right_start, south_right))
+            self._add_road(road_index, RoadSegment(south_right_start, south_right), approach_lanes, micro_length)
+            self.sim.name_roads(f'south_in_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(east_right_start, east_right))
+            self._add_road(road_index, RoadSegment(east_right_start, east_right), approach_lanes, micro_length)
+            self.sim.name_roads(f'east_in_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(north_right_start, north_right))
+            self._add_road(road_index, RoadSegment(north_right_start, north_right), approach_lanes, micro_length)
+            self.sim.name_roads(f'north_in_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(west_left, west_left_start))
+            self._add_road(road_index, RoadSegment(west_left, west_left_start), approach_lanes, exit_length)
+            self.sim.name_roads(f'west_out_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(south_left, south_left_start))
+            self._add_road(road_index, RoadSegment(south_left, south_left_start), approach_lanes, exit_length)
+            self.sim.name_roads(f'south_out_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(east_left, east_left_start))
+            self._add_road(road_index, RoadSegment(east_left, east_left_start), approach_lanes, exit_length)
+            self.sim.name_roads(f'east_out_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            self._add_road(road_index, RoadSegment(north_left, north_left_start))
+            self._add_road(road_index, RoadSegment(north_left, north_left_start), approach_lanes, exit_length)
+            self.sim.name_roads(f'north_out_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
             self._add_road(road_index, RoadSegment(west_right, east_left))
+            self.sim.name_roads(f'west_straight_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
             self._add_road(road_index, RoadSegment(south_right, north_left))
+            self.sim.name_roads(f'south_straight_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
             self._add_road(road_index, RoadSegment(east_right, west_left))
+            self.sim.name_roads(f'east_straight_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
             self._add_road(road_index, RoadSegment(north_right, south_left))
+            self.sim.name_roads(f'north_straight_{lane + 1}', [road_index])
             created_indices.append(road_index)
             road_index += 1
 
-            for turn_start, turn_end, turn_type in [
-                (west_right, south_left, TURN_LEFT),
-                (west_right, north_left, TURN_RIGHT),
-                (south_right, east_left, TURN_LEFT),
-                (south_right, west_left, TURN_RIGHT),
-                (east_right, north_left, TURN_LEFT),
-                (east_right, south_left, TURN_RIGHT),
-                (north_right, west_left, TURN_LEFT),
-                (north_right, east_left, TURN_RIGHT)
+            for approach, turn_start, turn_end, turn_type in [
+                ('west', west_right, south_left, TURN_RIGHT),
+                ('west', west_right, north_left, TURN_LEFT),
+                ('south', south_right, east_left, TURN_RIGHT),
+                ('south', south_right, west_left, TURN_LEFT),
+                ('east', east_right, north_left, TURN_RIGHT),
+                ('east', east_right, south_left, TURN_LEFT),
+                ('north', north_right, west_left, TURN_RIGHT),
+                ('north', north_right, east_left, TURN_LEFT)
             ]:
                 turn_roads = turn_road(turn_start, turn_end, turn_type, self.n)
+                first = road_index
                 for road in turn_roads:
                     self._add_road(road_index, RoadSegment(*road))
                     created_indices.append(road_index)
                     road_index += 1
+                side = 'right' if turn_type == TURN_RIGHT else 'left'
+                self.sim.name_roads(f'{approach}_{side}_{lane + 1}', list(range(first, road_index)))
 
         return created_indices
 
-    def _add_road(self, index: int, segment: RoadSegment) -> None:
+    def create_conflict_zone(self, config: Optional[Dict[str, Any]] = None) -> ConflictZone:
+        """Add a conflict zone covering the junction roads of the intersection.
+
+        Call after ``build_four_way_intersection`` so the junction roads exist.
+        """
+        zone_config: Dict[str, Any] = {'bounds': (-self.b, -self.b, self.b, self.b)}
+        zone_config.update(config or {})
+        return self.sim.create_conflict_zone(zone_config)
+
+    def _add_road(self, index: int, segment: RoadSegment, num_lanes: int = 1,
+                  micro_length: Optional[float] = None) -> None:
         """Add a road to the simulation at the specified index.
 
         Args:
             index: The road index (must match current road count)
             segment: The road segment definition
+            num_lanes: Number of lanes, creating a MultiLaneRoad when above one
+            micro_length: Length of the microscopic part, creating a MesoRoad when given
+        """
+        if num_lanes > 1:
+            self.sim.create_multilane_road(segment.start, segment.end, {'num_lanes': num_lanes})
+        elif micro_length is not None:
+            self.sim.create_meso_road(segment.start, segment.end, {'micro_length': micro_length})
+        else:
+            self.sim.create_road(segment.start, segment.end)
+
+
+class GridBuilder:
+    """Builds a rectangular grid of two-way roads with entrances on the border."""
+
+    def __init__(self, sim: Simulation, rows: int = 3, cols: int = 3, spacing: float = 200,
+                 approach_length: float = 300, micro_length: Optional[float] = None):
+        """Initialize the grid builder.
+
+        Args:
+            sim: The simulation instance
+            rows: Number of intersection rows
+            cols: Number of intersection columns
+            spacing: Distance between neighbouring intersections
+            approach_length: Length of the entrance and exit roads
+            micro_length: Build the roads as MesoRoads: the entrances and
+                links, which end at an intersection, are simulated with IDM
+                only over this many metres before it, and the exits are
+                entirely mesoscopic
+        """
+        self.sim = sim
+        self.rows = rows
+        self.cols = cols
+        self.spacing = spacing
+        self.approach_length = approach_length
+        self.micro_length = micro_length
+
+    def node(self, row: int, col: int) -> Tuple[float, float]:
+        """Return the position of the intersection at a grid cell."""
+        return (col * self.spacing, row * self.spacing)
+
+    def build_grid(self) -> Dict[str, List[int]]:
+        """Build the grid roads.
+
+        Returns:
+            Road indices grouped as ``entrances``, ``exits`` and ``links``
         """
-        self.sim.create_road(segment.start, segment.end)
+        groups: Dict[str, List[int]] = {'entrances': [], 'exits': [], 'links': []}
+        exit_length = None if self.micro_length is None else 0.0
+
+        for row in range(self.rows):
+            for col in range(self.cols):
+                here = self.node(row, col)
+                for d_row, d_col in [(0, 1), (1, 0)]:
+                    if row + d_row < self.rows and col + d_col < self.cols:
+                        there = self.node(row + d_row, col + d_col)
+                        groups['links'].append(self._add_road(RoadSegment(here, there), self.micro_length))
+                        groups['links'].append(self._add_road(RoadSegment(there, here), self.micro_length))
+
+                for d_row, d_col in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+                    if 0 <= row + d_row < self.rows and 0 <= col + d_col < self.cols:
+                        continue
+                    outside = (here[0] + d_col * self.approach_length,
+                               here[1] + d_row * self.approach_length)
+                    groups['entrances'].append(self._add_road(RoadSegment(outside, here), self.micro_length))
+                    groups['exits'].append(self._add_road(RoadSegment(here, outside), exit_length))
+
+        return groups
+
+    def _add_road(self, segment: RoadSegment, micro_length: Optional[float] = None) -> int:
+        if micro_length is not None:
+            self.sim.create_meso_road(segment.start, segment.end, {'micro_length': micro_length})
+        else:
+            self.sim.create_road(segment.start, segment.end)
+        return len(self.sim.roads) - 1
@@ -0,0 +1,391 @@
+import hashlib
+import os
+import pickle
+import yaml
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+from trafficSim.config import Configurable
+from trafficSim.config_loader import ConfigLoader
+from trafficSim.conflict_zone import ConflictZone
+from trafficSim.curve import turn_road, TURN_LEFT, TURN_RIGHT
+from trafficSim.distributions import DISTRIBUTED_PARAMETERS, validate_distribution
+from trafficSim.meso_road import MesoRoad
+from trafficSim.rerouting import Rerouter
+from trafficSim.result_cache import engine_version
+from trafficSim.road_network import IntersectionBuilder
+from trafficSim.simulation import Simulation
+from trafficSim.traffic_signal import TrafficSignal
+from trafficSim.vehicle_generator import VehicleGenerator
+from trafficSim.vehicle_pool import VehiclePool
+
+SECTIONS = ('simulation', 'vehicle_types', 'network', 'demand', 'signals', 'conflict_zones', 'rerouter',
+            'vehicle_pool')
+VEHICLE_TYPE_KEYS = ('probability', 'length', 'height', 'color', 's0', 'T', 'v_max', 'a_max', 'b_max')
+INTERSECTION_KEYS = ('lanes', 'multilane', 'road_turn_iterations', 'road_length', 'node_a', 'node_b',
+                     'micro_length')
+TURNS = {'left': TURN_LEFT, 'right': TURN_RIGHT}
+
+Point = Tuple[float, float]
+
+
+@dataclass
+class Scenario:
+    """A validated scenario, compiled to plain road, demand and signal tables.
+
+    Names are already resolved to road indices, so building a simulation is
+    a straight replay of the tables. A scenario is picklable and callable,
+    so it can be passed as the ``build`` argument of ``run_batch``,
+    ``SignalPlanOptimizer`` and ``SweepCoordinator``.
+    """
+    simulation: Dict[str, Any] = field(default_factory=dict)
+    roads: List[Tuple[Point, Point, int]] = field(default_factory=list)
+    road_names: Dict[str, List[int]] = field(default_factory=dict)
+    generator: Optional[Dict[str, Any]] = None
+    signals: List[Tuple[List[List[int]], Dict[str, Any]]] = field(default_factory=list)
+    conflict_zones: List[Dict[str, Any]] = field(default_factory=list)
+    rerouter: Optional[Dict[str, Any]] = None
+    source: str = '<scenario>'
+    vehicle_pool: Optional[Dict[str, Any]] = None
+    micro_lengths: Dict[int, float] = field(default_factory=dict)
+
+    def build(self) -> Simulation:
+        """Return a new simulation of the scenario."""
+        sim = Simulation(dict(self.simulation))
+        for index, (start, end, lanes) in enumerate(self.roads):
+            if lanes > 1:
+                sim.create_multilane_road(start, end, {'num_lanes': lanes})
+            elif index in self.micro_lengths:
+                sim.create_meso_road(start, end, {'micro_length': self.micro_lengths[index]})
+            else:
+                sim.create_road(start, end)
+        for name, indices in self.road_names.items():
+            sim.name_roads(name, indices)
+        if self.vehicle_pool is not None:
+            sim.create_vehicle_pool(dict(self.vehicle_pool))
+        if self.generator is not None:
+            sim.create_gen(self.generator)
+        for groups, config in self.signals:
+            sim.create_signal(groups, dict(config))
+        for config in self.conflict_zones:
+            sim.create_conflict_zone(dict(config))
+        if self.rerouter is not None:
+            sim.create_rerouter(dict(self.rerouter))
+        return sim
+
+    def __call__(self) -> Simulation:
+        return self.build()
+
+
+def _options(cls: Type[Configurable]) -> List[str]:
+    # Only the defaults are options; attributes set up afterwards are state.
+    obj = cls.__new__(cls)
+    obj.set_defaults()
+    return [key for key in vars(obj) if not key.startswith('_')]
+
+
+def _check_options(where: str, config: Any, known: List[str]) -> Dict[str, Any]:
+    if config is None:
+        return {}
+    if not isinstance(config, dict):
+        raise ValueError(f"{where}: expected a mapping, got {type(config).__name__}")
+    for key in config:
+        if key not in known:
+            raise ValueError(f"{where}: unknown option '{key}'")
+    return dict(config)
+
+
+def _known_options() -> Dict[str, List[str]]:
+    return {
+        'simulation': _options(Simulation),
+        'traffic_signal': _options(TrafficSignal),
+        'vehicle_generator': _options(VehicleGenerator),
+        'conflict_zone': _options(ConflictZone),
+        'rerouter': _options(Rerouter),
+        'vehicle_pool': _options(VehiclePool),
+    }
+
+
+def _point(where: str, value: Any, nodes: Dict[str, Point]) -> Point:
+    if isinstance(value, str):
+        if value not in nodes:
+            raise ValueError(f"{where}: unknown node '{value}'")
+        return nodes[value]
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return (float(value[0]), float(value[1]))
+    raise ValueError(f"{where}: expected a node name or an [x, y] pair")
+
+
+def _resolve(where: str, names: Any, road_names: Dict[str, List[int]], num_roads: int) -> List[int]:
+    if not isinstance(names, list):
+        raise ValueError(f"{where}: expected a list of road names")
+    indices: List[int] = []
+    for name in names:
+        if isinstance(name, str):
+            if name not in road_names:
+                raise ValueError(f"{where}: unknown road '{name}'")
+            indices.extend(road_names[name])
+        elif isinstance(name, int) and 0 <= name < num_roads:
+            indices.append(name)
+        else:
+            raise ValueError(f"{where}: invalid road {name!r}")
+    return indices
+
+
+def _load_vehicle_types(spec: Any, base_dir: Path, sources: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    if spec is None:
+        return {}
+    if isinstance(spec, str):
+        if spec == 'default':
+            path = Path(__file__).parent.parent / 'config' / 'vehicles.yaml'
+        else:
+            path = base_dir / spec
+        try:
+            data = ConfigLoader.load_yaml(path)
+        except FileNotFoundError:
+            raise ValueError(f"vehicle_types: file not found: {path}") from None
+        sources[str(path)] = _digest(path)
+        spec = data.get('vehicle_types', data)
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("vehicle_types: expected a non-empty mapping of type names")
+    types: Dict[str, Dict[str, Any]] = {}
+    for name, params in spec.items():
+        params = _check_options(f"vehicle_types.{name}", params, list(VEHICLE_TYPE_KEYS))
+        for key in DISTRIBUTED_PARAMETERS:
+            if key in params:
+                try:
+                    validate_distribution(params[key])
+                except ValueError as e:
+                    raise ValueError(f"vehicle_types.{name}.{key}: {e}") from None
+        if 'color' in params:
+            try:
+                params['color'] = list(ConfigLoader.parse_color(params['color']))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"vehicle_types.{name}.color: {e}") from None
+        types[str(name)] = params
+    return types
+
+
+def _build_network(network: Any, defaults: Dict[str, Any]) -> Simulation:
+    """Lay out the roads of the ``network`` section in a scratch simulation."""
+    network = _check_options('network', network, ['intersection', 'nodes', 'roads'])
+    sim = Simulation()
+
+    if network.get('intersection') is not None:
+        spec = {**defaults, **_check_options('network.intersection', network['intersection'],
+                                             list(INTERSECTION_KEYS))}
+        builder = IntersectionBuilder(sim, n=int(spec.get('road_turn_iterations', 20)), a=spec.get('node_a', -2),
+                                      b=spec.get('node_b', 12), length=spec.get('road_length', 300))
+        micro_length = spec.get('micro_length')
+        builder.build_four_way_intersection(int(spec.get('lanes', 3)), bool(spec.get('multilane', False)),
+                                            None if micro_length is None else float(micro_length))
+
+    nodes: Dict[str, Point] = {}
+    raw_nodes = network.get('nodes') or {}
+    if not isinstance(raw_nodes, dict):
+        raise ValueError("network.nodes: expected a mapping of node names to [x, y]")
+    for name, value in raw_nodes.items():
+        nodes[str(name)] = _point(f"network.nodes.{name}", value, {})
+
+    for i, road in enumerate(network.get('roads') or []):
+        where = f"network.roads[{i}]"
+        road = _check_options(where, road, ['name', 'from', 'to', 'turn', 'resolution', 'lanes', 'micro_length'])
+        for key in ('from', 'to'):
+            if key not in road:
+                raise ValueError(f"{where}: missing '{key}'")
+        start = _point(f"{where}.from", road['from'], nodes)
+        end = _point(f"{where}.to", road['to'], nodes)
+        first = len(sim.roads)
+        if 'turn' in road:
+            if road['turn'] not in TURNS:
+                raise ValueError(f"{where}.turn: expected 'left' or 'right', got {road['turn']!r}")
+            if road.get('lanes', 1) != 1:
+                raise ValueError(f"{where}: a turn has a single lane")
+            if 'micro_length' in road:
+                raise ValueError(f"{where}: a turn cannot be a MesoRoad")
+            resolution = int(road.get('resolution', defaults.get('road_turn_iterations', 20)))
+            for segment in turn_road(start, end, TURNS[road['turn']], resolution):
+                sim.create_road(*segment)
+        elif int(road.get('lanes', 1)) > 1:
+            if 'micro_length' in road:
+                raise ValueError(f"{where}: a multilane road cannot be a MesoRoad")
+            sim.create_multilane_road(start, end, {'num_lanes': int(road['lanes'])})
+        elif 'micro_length' in road:
+            sim.create_meso_road(start, end, {'micro_length': float(road['micro_length'])})
+        else:
+            sim.create_road(start, end)
+        if 'name' in road:
+            if road['name'] in sim.road_names:
+                raise ValueError(f"{where}: duplicate road name '{road['name']}'")
+            sim.name_roads(str(road['name']), list(range(first, len(sim.roads))))
+    return sim
+
+
+def compile_scenario(data: Dict[str, Any], base_dir: str | Path = '.', source: str = '<scenario>',
+                     sources: Optional[Dict[str, str]] = None) -> Scenario:
+    """Validate a parsed scenario document and compile it.
+
+    Sections missing from the document take their values from
+    ``config/default.yaml``.
+
+    Args:
+        data: Parsed scenario document
+        base_dir: Directory that relative file references are resolved against
+        source: Name of the scenario used in error messages
+        sources: Filled with the digests of the other files read
+
+    Raises:
+        ValueError: If the scenario is invalid; the message gives its location
+    """
+    sources = {} if sources is None else sources
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected a mapping at the top level")
+    try:
+        for key in data:
+            if key not in SECTIONS:
+                raise ValueError(f"unknown section '{key}'")
+        defaults_path = Path(__file__).parent.parent / 'config' / 'default.yaml'
+        defaults = ConfigLoader.load_yaml(defaults_path) if defaults_path.exists() else {}
+        if defaults:
+            sources[str(defaults_path)] = _digest(defaults_path)
+        known = _known_options()
+
+        def with_defaults(section: str, where: str, config: Any) -> Dict[str, Any]:
+            base = {k: v for k, v in (defaults.get(section) or {}).items() if k in known[section]}
+            return {**base, **_check_options(where, config, known[section])}
+
+        simulation = with_defaults('simulation', 'simulation', data.get('simulation'))
+        if 'network' not in data:
+            raise ValueError("missing section 'network'")
+        sim = _build_network(data['network'], defaults.get('intersection') or {})
+        roads = [((float(road.start[0]), float(road.start[1])), (float(road.end[0]), float(road.end[1])),
+                  int(getattr(road, 'num_lanes', 1))) for road in sim.roads]
+        num_roads = len(roads)
+
+        vehicle_types = _load_vehicle_types(data.get('vehicle_types'), Path(base_dir), sources)
+        generator: Optional[Dict[str, Any]] = None
+        demand = _check_options('demand', data.get('demand'), ['vehicle_rate', 'vehicles', 'od', 'backlog'])
+        if demand:
+            generator = with_defaults('vehicle_generator', 'demand',
+                                      {key: demand[key] for key in ('vehicle_rate', 'backlog') if key in demand})
+            vehicles = []
+            for i, vehicle in enumerate(demand.get('vehicles') or []):
+                where = f"demand.vehicles[{i}]"
+                vehicle = _check_options(where, vehicle, ['weight', 'route', 'vehicle_type'])
+                config: Dict[str, Any] = {}
+                if 'route' in vehicle:
+                    config['path'] = _resolve(f"{where}.route", vehicle['route'], sim.road_names, num_roads)
+                if 'vehicle_type' in vehicle:
+                    config['vehicle_type'] = vehicle['vehicle_type']
+                weight = vehicle.get('weight', 1)
+                if not isinstance(weight, int) or weight < 1:
+                    raise ValueError(f"{where}.weight: expected a positive integer")
+                vehicles.append((weight, config))
+            od = []
+            for i, pair in enumerate(demand.get('od') or []):
+                where = f"demand.od[{i}]"
+                pair = _check_options(where, pair, ['from', 'to', 'rate'])
+                if not {'from', 'to', 'rate'} <= set(pair):
+                    raise ValueError(f"{where}: expected 'from', 'to' and 'rate'")
+                origin = _resolve(f"{where}.from", [pair['from']], sim.road_names, num_roads)
+                destination = _resolve(f"{where}.to", [pair['to']], sim.road_names, num_roads)
+                od.append((origin[0], destination[-1], float(pair['rate'])))
+            if not vehicles and not od:
+                raise ValueError("demand: expected 'vehicles' or 'od'")
+            generator['vehicles'] = vehicles or [(1, {})]
+            if od:
+                generator['od'] = od
+            if vehicle_types:
+                generator['vehicle_types'] = vehicle_types
+
+        signals = []
+        for i, signal in enumerate(data.get('signals') or []):
+            where = f"signals[{i}]"
+            if not isinstance(signal, dict) or 'groups' not in signal:
+                raise ValueError(f"{where}: expected a mapping with 'groups'")
+            config = dict(signal)
+            groups = config.pop('groups')
+            if not isinstance(groups, list) or not groups:
+                raise ValueError(f"{where}.groups: expected a list of road name lists")
+            signals.append(([_resolve(f"{where}.groups[{k}]", group, sim.road_names, num_roads)
+                             for k, group in enumerate(groups)],
+                            with_defaults('traffic_signal', where, config)))
+
+        conflict_zones = [_check_options(f"conflict_zones[{i}]", zone, known['conflict_zone'])
+                          for i, zone in enumerate(data.get('conflict_zones') or [])]
+        rerouter = None
+        if data.get('rerouter') is not None:
+            rerouter = _check_options('rerouter', data['rerouter'], known['rerouter'])
+        vehicle_pool = None
+        if data.get('vehicle_pool') is not None:
+            vehicle_pool = _check_options('vehicle_pool', data['vehicle_pool'], known['vehicle_pool'])
+
+        micro_lengths = {i: road.micro_length for i, road in enumerate(sim.roads) if isinstance(road, MesoRoad)}
+        scenario = Scenario(simulation, roads, dict(sim.road_names), generator, signals,
+                            conflict_zones, rerouter, source, vehicle_pool, micro_lengths)
+        # Building once catches what only the components check, such as
+        # disconnected routes or signal splits that do not fit the cycle.
+        scenario.build()
+    except (ValueError, AttributeError, TypeError) as e:
+        raise ValueError(f"{source}: {e}") from None
+    return scenario
+
+
+def _digest(path: str | Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    return Path.home() / '.cache' / 'trafficSim' / 'scenarios'
+
+
+def load_scenario(path: str | Path, cache: bool = True, cache_dir: str | Path | None = None) -> Scenario:
+    """Load a scenario file, reusing its compiled form when it has not changed.
+
+    Compiled scenarios are pickled into ``cache_dir`` under a key made of the
+    file's digest and the engine version. An entry is used only when the
+    files it was compiled from (vehicle types, ``config/default.yaml``) still
+    have the same digests, so sweep workers loading the same scenario skip
+    YAML parsing and validation.
+
+    Args:
+        path: Scenario YAML file
+        cache: Read and write the compiled-scenario cache
+        cache_dir: Cache directory, ``~/.cache/trafficSim/scenarios`` by default
+
+    Raises:
+        FileNotFoundError: If the scenario file does not exist
+        ValueError: If the scenario is invalid
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Scenario file not found: {path}")
+    raw = path.read_bytes()
+    directory = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    key = hashlib.sha256(raw + engine_version().encode()).hexdigest()
+    entry = directory / f'{key}.pickle'
+
+    if cache and entry.exists():
+        digests: Dict[str, str]
+        cached: Scenario
+        try:
+            with open(entry, 'rb') as f:
+                digests, cached = pickle.load(f)
+            if all(Path(source).exists() and _digest(source) == digest for source, digest in digests.items()):
+                return cached
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+
+    try:
+        data = ConfigLoader.load_yaml(path)
+    except yaml.YAMLError as e:
+        raise ValueError(f"{path}: {e}") from None
+    sources: Dict[str, str] = {}
+    scenario = compile_scenario(data, path.parent, str(path), sources)
+    if cache:
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = entry.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporary, 'wb') as f:
+            pickle.dump((sources, scenario), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, entry)
+    return scenario
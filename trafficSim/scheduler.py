@@ -0,0 +1,82 @@
+import heapq
+import math
+from typing import Any, Callable, List, Tuple
+
+
+def _periodic(component: Any) -> Callable[[float], float]:
+    """Return a ``next_update`` that is ``update_period`` after ``t``, read on each call."""
+    def next_update(t: float) -> float:
+        return t + float(component.update_period)
+    return next_update
+
+
+class Scheduler:
+    """Runs the per-tick components of a simulation only in the ticks they are due.
+
+    A component tells when it next needs an update through one of:
+
+    - ``next_update(t)``: the simulated time of its next update, given the
+      time ``t`` of the update just made; ``math.inf`` when only an outside
+      change can make an update necessary again.
+    - ``update_period``: a fixed number of seconds between updates.
+
+    Components declaring neither are updated every tick. Due components are
+    kept in a priority queue keyed on their next update; those due in the
+    same tick run in the order they were added. A component is treated as due
+    ``tolerance`` seconds early so rounding never delays it by a tick, so
+    updates must be harmless when nothing has changed.
+    """
+
+    def __init__(self, tolerance: float = 1e-6) -> None:
+        self.tolerance = tolerance
+        self._callbacks: List[Callable[[], None]] = []
+        self._next_updates: List[Callable[[float], float] | None] = []
+        self._every_tick: List[int] = []
+        self._queue: List[Tuple[float, int]] = []
+        self._last_t = -math.inf
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def add(self, component: Any, callback: Callable[[], None]) -> None:
+        """Register ``callback`` as the update of ``component``; it runs in the next tick."""
+        rank = len(self._callbacks)
+        self._callbacks.append(callback)
+        next_update = getattr(component, 'next_update', None)
+        if next_update is None and getattr(component, 'update_period', None) is not None:
+            next_update = _periodic(component)
+        self._next_updates.append(next_update)
+        if next_update is None:
+            self._every_tick.append(rank)
+        else:
+            heapq.heappush(self._queue, (-math.inf, rank))
+
+    def wake(self) -> None:
+        """Make every component due in the next tick, after its timing was changed from outside."""
+        self._queue = [(-math.inf, rank) for rank, next_update in enumerate(self._next_updates)
+                       if next_update is not None]
+
+    def run(self, t: float) -> None:
+        """Update the components due at time ``t`` and schedule their next updates."""
+        if t < self._last_t:
+            # The clock was reset.
+            self.wake()
+        self._last_t = t
+        queue = self._queue
+        due: List[int] = []
+        limit = t + self.tolerance
+        while queue and queue[0][0] <= limit:
+            due.append(heapq.heappop(queue)[1])
+        if due:
+            ranks = sorted(due + self._every_tick) if self._every_tick else sorted(due)
+        else:
+            ranks = self._every_tick
+        callbacks = self._callbacks
+        next_updates = self._next_updates
+        for rank in ranks:
+            callbacks[rank]()
+            next_update = next_updates[rank]
+            if next_update is not None:
+                heapq.heappush(queue, (next_update(t), rank))
+        self.updates += len(ranks)
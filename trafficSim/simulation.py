@@ -1,16 +1,34 @@
-from typing import List, Any, Dict
-from copy import deepcopy
+from typing import List, Any, Callable, Dict, Optional, Tuple, TYPE_CHECKING
 from trafficSim.road import Road
+from trafficSim.multilane_road import MultiLaneRoad
+from trafficSim.meso_road import MesoRoad
+from trafficSim.road_graph import RoadGraph
 from trafficSim.vehicle_generator import VehicleGenerator
 from trafficSim.traffic_signal import TrafficSignal
+from trafficSim.rerouting import Rerouter
+from trafficSim.conflict_zone import ConflictZone
+from trafficSim.vehicle_pool import VehiclePool
+from trafficSim.scheduler import Scheduler
+from trafficSim.integrators import integrator_step
 from trafficSim.config import Configurable
 import csv
 
+if TYPE_CHECKING:
+    from trafficSim.vehicle import Vehicle
+
+
+def _updater(component: Any, *args: Any) -> Callable[[], None]:
+    """Return a callback running ``component.update(*args)``.
+
+    ``update`` is looked up on each call, so wrapping it later, as
+    ``AllocationTracker`` does, still takes effect.
+    """
+    def update() -> None:
+        component.update(*args)
+    return update
+
 
 class Simulation(Configurable):
-    vehicles_passed = 0
-    vehicles_present = 0
-    vehicle_rate = 0
     is_paused = False
 
     def __init__(self, config: Dict[str, Any] | None = None) -> None:
@@ -20,27 +38,141 @@ class Simulation(Configurable):
         self.t = 0.0
         self.frame_count = 0
         self.dt = 1 / 60
+        self.integrator = 'ballistic'
+        self.coarse_dt = 0.05
         self.roads: List[Road] = []
+        self.meso_roads: List[MesoRoad] = []
         self.generators: List[VehicleGenerator] = []
         self.traffic_signals: List[TrafficSignal] = []
+        self.conflict_zones: List[ConflictZone] = []
         self.iteration = 0
-        self.time_limit = 300
+        self.time_limit: float = 300
+        self.vehicles_passed = 0
+        self.vehicles_present = 0
+        self.vehicles_spawned = 0
+        self.vehicle_rate: float = 0
+        self.lookahead = 50.0
+        self._road_graph: Optional[RoadGraph] = None
+        self.rerouter: Optional[Rerouter] = None
+        self.vehicle_pool: Optional[VehiclePool] = None
+        self.observers: List[Callable[['Simulation'], None]] = []
+        self.components: List[Any] = []
+        self._scheduler: Optional[Scheduler] = None
+        self._scheduled: Tuple[Any, ...] = ()
+        self.road_names: Dict[str, List[int]] = {}
+
+    @property
+    def road_graph(self) -> RoadGraph:
+        """Connectivity of the current roads, rebuilt when roads are added.
+
+        Routes interned on a previous graph keep their ids.
+        """
+        graph = self._road_graph
+        if graph is None or graph.num_roads != len(self.roads):
+            new_graph = RoadGraph(self.roads)
+            if graph is not None:
+                for route in graph.routes:
+                    new_graph.intern_route(route)
+            self._road_graph = graph = new_graph
+        return graph
+
+    @property
+    def long_steps(self) -> bool:
+        """Whether the corrections for long steps apply: above ``coarse_dt`` or with another integrator.
+
+        They carry the overshoot of a vehicle across hand-offs, keep the
+        generators' schedules, start spawned vehicles with their IDM
+        acceleration and hold vehicles at red signals and conflicts ahead of
+        the step. Runs at the default ``dt`` with the ballistic integrator
+        are left as they were without them.
+        """
+        return self.integrator != 'ballistic' or self.dt > self.coarse_dt
+
+    @property
+    def scheduler(self) -> Scheduler:
+        """Schedule of the generators, signals, conflict zones, rerouter and ``components``.
+
+        Rebuilt when one of them is added or removed; every component is then
+        due in the next tick.
+        """
+        scheduled = (len(self.generators), len(self.traffic_signals), len(self.conflict_zones),
+                     self.rerouter, len(self.components))
+        if self._scheduler is None or scheduled != self._scheduled:
+            scheduler = Scheduler()
+            for gen in self.generators:
+                scheduler.add(gen, _updater(gen))
+            for signal in self.traffic_signals:
+                scheduler.add(signal, _updater(signal, self))
+            for zone in self.conflict_zones:
+                scheduler.add(zone, _updater(zone))
+            if self.rerouter is not None:
+                scheduler.add(self.rerouter, _updater(self.rerouter))
+            for component in self.components:
+                scheduler.add(component, _updater(component, self))
+            self._scheduler = scheduler
+            self._scheduled = scheduled
+        return self._scheduler
+
+    def add_component(self, component: Any) -> Any:
+        """Update ``component`` in each tick it is due, after the built-in components.
+
+        The component provides ``update(sim)`` and may declare
+        ``next_update(t)`` or ``update_period`` (see ``Scheduler``).
+        """
+        self.components.append(component)
+        return component
+
+    def wake(self) -> None:
+        """Update every component in the next tick; call after changing their timing from outside."""
+        if self._scheduler is not None:
+            self._scheduler.wake()
 
     def create_road(self, start: tuple, end: tuple) -> Road:
         road = Road(start, end)
         self.roads.append(road)
         return road
 
+    def create_multilane_road(self, start: tuple, end: tuple, config: Dict[str, Any] | None = None) -> MultiLaneRoad:
+        road = MultiLaneRoad(start, end, config)
+        self.roads.append(road)
+        return road
+
+    def create_meso_road(self, start: tuple, end: tuple, config: Dict[str, Any] | None = None) -> MesoRoad:
+        road = MesoRoad(start, end, config)
+        self.roads.append(road)
+        self.meso_roads.append(road)
+        return road
+
     def create_roads(self, road_list: List[Any]) -> None:
         for road in road_list:
             self.create_road(*road)
 
+    def name_roads(self, name: str, indices: List[int]) -> None:
+        """Register a name for a road, or for a chain of roads such as a turn."""
+        self.road_names[name] = [int(i) for i in indices]
+
+    def resolve_roads(self, names: List[Any]) -> List[int]:
+        """Expand road names and indices into a list of road indices.
+
+        Raises:
+            ValueError: If a name is not registered
+        """
+        indices: List[int] = []
+        for name in names:
+            if isinstance(name, str):
+                if name not in self.road_names:
+                    raise ValueError(f"Unknown road name '{name}'")
+                indices.extend(self.road_names[name])
+            else:
+                indices.append(int(name))
+        return indices
+
     def create_gen(self, config: Dict[str, Any] | None = None) -> VehicleGenerator:
         if config is None:
             config = {}
         gen = VehicleGenerator(self, config)
         self.generators.append(gen)
-        Simulation.vehicle_rate = gen.vehicle_rate
+        self.vehicle_rate = gen.vehicle_rate
         return gen
 
     def create_signal(self, roads: List[List[int]], config: Dict[str, Any] | None = None) -> TrafficSignal:
@@ -51,60 +183,259 @@ class Simulation(Configurable):
         self.traffic_signals.append(sig)
         return sig
 
+    def create_conflict_zone(self, config: Dict[str, Any] | None = None) -> ConflictZone:
+        if config is None:
+            config = {}
+        zone = ConflictZone(self, config)
+        self.conflict_zones.append(zone)
+        return zone
+
+    def create_rerouter(self, config: Dict[str, Any] | None = None) -> Rerouter:
+        if config is None:
+            config = {}
+        self.rerouter = Rerouter(self, config)
+        return self.rerouter
+
+    def create_vehicle_pool(self, config: Dict[str, Any] | None = None) -> VehiclePool:
+        """Recycle vehicle objects through a pool; create it before the generators.
+
+        Raises:
+            ValueError: If a generator already exists
+        """
+        if self.generators:
+            raise ValueError("The vehicle pool must be created before the generators")
+        if config is None:
+            config = {}
+        self.vehicle_pool = VehiclePool(config)
+        return self.vehicle_pool
+
     def update(self) -> None:
-        for road in self.roads:
-            road.update(self.dt)
+        self.update_roads()
+        self.complete_update()
 
-        for gen in self.generators:
-            gen.update()
+    def update_roads(self) -> None:
+        """Move the vehicles on every road; the first half of ``update``."""
+        tails: Dict[int, Optional[Tuple['Vehicle', float]]] = {}
+        step = None if self.integrator == 'ballistic' else integrator_step(self.integrator)
+        horizon = self.dt if self.long_steps else 0.0
+        for road_index, road in enumerate(self.roads):
+            if road.vehicles and self.lookahead > 0:
+                lead, lead_offset = self.leader_ahead(road_index, road.vehicles[0], tails)
+                road.update(self.dt, lead, lead_offset, step, horizon)
+            else:
+                road.update(self.dt, step=step, horizon=horizon)
 
-        for signal in self.traffic_signals:
-            signal.update(self)
+    def complete_update(self) -> None:
+        """Run everything after the vehicle moves: spawns, signals, hand-offs, totals and observers.
 
-        for road in self.roads:
-            if len(road.vehicles) == 0:
-                continue
-            vehicle = road.vehicles[0]
-            if vehicle.x >= road.length:
-                if vehicle.current_road_index + 1 < len(vehicle.path):
-                    vehicle.current_road_index += 1
-                    new_vehicle = deepcopy(vehicle)
-                    new_vehicle.x = 0
-                    next_road_index = vehicle.path[vehicle.current_road_index]
-                    self.roads[next_road_index].vehicles.append(new_vehicle)
-                else:
-                    Simulation.vehicles_passed += 1
-                road.vehicles.popleft()
+        Generators, signals, conflict zones, the rerouter and ``components``
+        run only in the ticks they are due (see ``scheduler``).
+        """
+        self.scheduler.run(self.t)
+        self.hand_off_vehicles()
 
-        Simulation.vehicles_present = 0
+        self.vehicles_present = 0
         for road in self.roads:
-            Simulation.vehicles_present += len(road.vehicles)
+            self.vehicles_present += len(road.vehicles)
+        for road in self.meso_roads:
+            self.vehicles_present += len(road.queue)
 
         self.t += self.dt
         self.frame_count += 1
 
+        for observer in self.observers:
+            observer(self)
+
         if self.t >= self.time_limit:
             print("Traffic Signal Cycle Length: " + str(self.traffic_signals[0].cycle_length))
             print("Time: " + str(self.t))
-            print("Vehicles Passed: " + str(Simulation.vehicles_passed))
-            print("Vehicles Present: " + str(Simulation.vehicles_present))
-            print("Vehicle Rate: " + str(Simulation.vehicle_rate))
-            print("Traffic Density: " + str(Simulation.vehicles_present / (len(self.roads) * self.roads[0].length)))
+            print("Vehicles Passed: " + str(self.vehicles_passed))
+            print("Vehicles Present: " + str(self.vehicles_present))
+            print("Vehicle Rate: " + str(self.vehicle_rate))
+            print("Traffic Density: " + str(self.vehicles_present / (len(self.roads) * self.roads[0].length)))
             print("Iteration: " + str(self.iteration))
 
             with open('data.csv', mode='a') as data_file:
                 data_writer = csv.writer(data_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                data_writer.writerow([self.traffic_signals[0].cycle_length, Simulation.vehicles_passed])
+                data_writer.writerow([self.traffic_signals[0].cycle_length, self.vehicles_passed])
 
             self.t = 0.001
             for gen in self.generators:
                 gen.delete_all_vehicles()
-            Simulation.vehicles_passed = 0
-            Simulation.vehicles_present = 0
+            self.vehicles_passed = 0
+            self.vehicles_present = 0
             self.iteration += 1
             if self.iteration % 5 == 0:
                 for signal in self.traffic_signals:
                     signal.cycle_length += 1
+            self.wake()
+
+    def hand_off_vehicles(self) -> None:
+        """Hand off the front vehicle of every road that has passed the end of it."""
+        for road_index, road in enumerate(self.roads):
+            if len(road.vehicles) == 0:
+                continue
+            vehicle = road.vehicles[0]
+            if vehicle.x >= road.length:
+                if self.spilled_back(vehicle):
+                    # Wait at the end of the road until the queue ahead has room.
+                    vehicle.x = road.length
+                    vehicle.v = 0.0
+                    vehicle.a = 0.0
+                    continue
+                road.vehicles.popleft()
+                self.hand_off(road_index, vehicle)
+
+    def spilled_back(self, vehicle: 'Vehicle') -> bool:
+        """Whether the next road of a vehicle is a MesoRoad whose queue is full."""
+        next_road_index = self.next_road_index(vehicle)
+        if next_road_index < 0:
+            return False
+        next_road = self.roads[next_road_index]
+        return isinstance(next_road, MesoRoad) and not next_road.has_room(vehicle)
+
+    def hand_off(self, road_index: int, vehicle: 'Vehicle') -> None:
+        """Move a vehicle that has passed the end of its road onto the rest of its route.
+
+        With ``long_steps`` the distance travelled beyond the end is carried
+        onto the next road, so long steps do not lose it; a vehicle crossing
+        a whole short road in one step moves on past it. The carried distance
+        never places the vehicle closer than its minimum gap ``s0`` behind
+        the last vehicle already on the road. Otherwise the vehicle starts
+        at the beginning of the next road.
+        Vehicles leaving the network are counted and released to the pool.
+        """
+        x = vehicle.x
+        long_steps = self.long_steps
+        while True:
+            if self.rerouter is not None:
+                self.rerouter.record(road_index, self.t - vehicle.time_entered)
+                self.rerouter.leave(vehicle)
+            x -= self.roads[road_index].length
+            next_road_index = self.next_road_index(vehicle)
+            if next_road_index < 0:
+                self.vehicles_passed += 1
+                if self.vehicle_pool is not None:
+                    self.vehicle_pool.release(vehicle)
+                return
+            vehicle.current_road_index += 1
+            vehicle.time_entered = self.t
+            if self.rerouter is not None:
+                self.rerouter.enter(vehicle)
+            next_road = self.roads[next_road_index]
+            if not long_steps:
+                vehicle.x = 0.0
+                next_road.admit(vehicle)
+                return
+            # A vehicle that could not stop before the end of the road is no
+            # longer held by its signal.
+            vehicle.unstop()
+            if next_road.vehicles:
+                tail = next_road.vehicles[-1]
+                x = min(x, tail.x - tail.l - vehicle.s0)
+            x = max(x, 0.0)
+            if x < next_road.length or next_road.vehicles:
+                vehicle.x = x
+                next_road.admit(vehicle)
+                return
+            road_index = next_road_index
+
+    def metrics(self) -> Dict[str, float]:
+        """Return the running totals of the simulation.
+
+        ``vehicles_waiting`` and ``entry_delay`` (the mean wait before
+        entering) cover the generators with a ``backlog``; ``entry_delay``
+        is the generators' ``entry_delay`` weighted by the vehicles they
+        released.
+        """
+        released = sum(gen.released for gen in self.generators)
+        delay = sum(gen.entry_delay * gen.released for gen in self.generators)
+        return {
+            't': self.t,
+            'vehicles_passed': self.vehicles_passed,
+            'vehicles_present': self.vehicles_present,
+            'throughput': self.vehicles_passed / self.t * 60 if self.t > 0 else 0.0,
+            'vehicles_waiting': sum(gen.waiting for gen in self.generators),
+            'entry_delay': delay / released if released else 0.0,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the metrics with per-road occupancy and signal phases."""
+        return {
+            **self.metrics(),
+            'frame_count': self.frame_count,
+            'occupancy': [road.vehicle_count for road in self.roads],
+            'signals': [signal.current_cycle_index for signal in self.traffic_signals],
+        }
+
+    def leader_ahead(self, road_index: int, vehicle: 'Vehicle',
+                     tails: Dict[int, Optional[Tuple['Vehicle', float]]]) -> Tuple[Optional['Vehicle'], float]:
+        """Find the leader of a road's front vehicle on the roads ahead of it.
+
+        The first road ahead is taken from the vehicle's route; beyond it the
+        search follows the graph's unique-successor pointers. ``tails`` caches,
+        per road and for the current tick, the nearest vehicle at or beyond
+        the road's start together with the length of the roads skipped to
+        reach it, so each road is resolved once per tick.
+
+        Returns:
+            The leader, or None within ``lookahead``, and the offset to add to
+            its position to express it along the vehicle's road
+        """
+        road = self.roads[road_index]
+        if road.length - vehicle.x > self.lookahead:
+            return None, 0.0
+        next_index = self.next_road_index(vehicle)
+        if next_index < 0:
+            return None, 0.0
+        found = self._tail_ahead(next_index, tails)
+        if found is None:
+            return None, 0.0
+        lead, offset = found
+        if road.length + offset + lead.x - vehicle.x > self.lookahead:
+            return None, 0.0
+        return lead, road.length + offset
+
+    def _tail_ahead(self, road_index: int,
+                    tails: Dict[int, Optional[Tuple['Vehicle', float]]]) -> Optional[Tuple['Vehicle', float]]:
+        if road_index in tails:
+            return tails[road_index]
+        # Walk the empty short roads ahead to a road with vehicles, then
+        # resolve the roads walked from the far end back.
+        successors = self.road_graph.successor
+        chain: List[int] = []
+        found: Optional[Tuple['Vehicle', float]] = None
+        index = road_index
+        while True:
+            if index in tails:
+                found = tails[index]
+                break
+            road = self.roads[index]
+            tails[index] = None
+            if road.vehicles:
+                found = tails[index] = (road.vehicles[-1], 0.0)
+                break
+            successor = int(successors[index]) if road.length < self.lookahead else -1
+            if successor < 0:
+                break
+            chain.append(index)
+            index = successor
+        for index in reversed(chain):
+            length = self.roads[index].length
+            if found is not None and found[1] + length < self.lookahead:
+                found = (found[0], found[1] + length)
+            else:
+                found = None
+            tails[index] = found
+        return tails[road_index]
+
+    def next_road_index(self, vehicle: 'Vehicle') -> int:
+        """Return the road a vehicle moves onto after its current one, or -1."""
+        if vehicle.route_id >= 0:
+            return int(self.road_graph.next_roads[vehicle.route_id][vehicle.current_road_index])
+        if vehicle.current_road_index + 1 < len(vehicle.path):
+            return int(vehicle.path[vehicle.current_road_index + 1])
+        return -1
 
     def run(self, steps: int) -> None:
         for _ in range(steps):
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, TYPE_CHECKING
+from trafficSim.batch import Job, horizon_steps, prepare_run
+from trafficSim.config import Configurable
+from trafficSim.result_cache import ResultCache, fingerprint, run_key
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+
+
+@dataclass
+class SweepEvent:
+    """Something that happened to one job of a sweep.
+
+    ``kind`` is ``'progress'`` (``metrics`` are partial), ``'done'``,
+    ``'failed'`` (``error`` holds the exception) or ``'cancelled'``.
+    ``cached`` marks results taken from the resume file or result cache.
+    """
+    kind: str
+    index: int
+    metrics: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def _run_sweep_job(build: Callable[[], 'Simulation'], index: int, job: Job, interval: float,
+                   events: Any, cancel: Any) -> None:
+    """Worker side of a sweep job; every outcome is reported through ``events``."""
+    try:
+        plan, horizon, seed = job
+        sim = prepare_run(build, plan, seed)
+        total = horizon_steps(sim, horizon)
+        chunk = max(int(round(interval / sim.dt)), 1)
+        done = 0
+        while done < total:
+            if cancel.is_set():
+                events.put(('cancelled', index, sim.metrics(), None))
+                return
+            steps = min(chunk, total - done)
+            sim.run(steps)
+            done += steps
+            if done < total:
+                events.put(('progress', index, sim.metrics(), None))
+        events.put(('done', index, sim.metrics(), None))
+    except Exception as exc:
+        events.put(('failed', index, None, repr(exc)))
+
+
+class SweepCoordinator(Configurable):
+    """Runs headless jobs on a process pool and streams what happens to them.
+
+    ``events(jobs)`` is an async iterator of ``SweepEvent``. Workers report
+    partial metrics every ``progress_interval`` simulated seconds through a
+    multiprocessing queue, which is drained without blocking the event loop.
+    At most ``max_concurrency`` jobs run at once. ``cancel()`` stops running
+    jobs at their next report and drops the ones not yet started.
+
+    Finished jobs are appended to ``results_path`` as JSON lines keyed by
+    their run key (see ``result_cache.run_key``). Running the same sweep
+    again with that file skips the jobs already completed, so an interrupted
+    sweep resumes where it stopped. A ``cache`` is consulted and filled in
+    the same way.
+    """
+
+    def __init__(self, build: Callable[[], 'Simulation'], config: Dict[str, Any] | None = None) -> None:
+        """Create a coordinator for a scenario.
+
+        Args:
+            build: Picklable callable returning a freshly built simulation
+            config: Dictionary of configuration overrides
+        """
+        self.build = build
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.max_concurrency: int = os.cpu_count() or 1
+        self.progress_interval = 30.0
+        self.results_path: Optional[str] = None
+        self.cache: Optional[ResultCache] = None
+
+    def init_properties(self) -> None:
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._cancel: Any = None
+        self._cancelled = False
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """Return the metrics recorded in ``results_path``, by run key."""
+        results: Dict[str, Dict[str, Any]] = {}
+        if self.results_path is None or not Path(self.results_path).exists():
+            return results
+        with open(self.results_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short when the previous sweep was killed.
+                    continue
+                results[record['key']] = record['metrics']
+        return results
+
+    def cancel(self) -> None:
+        """Stop the sweep; running jobs end at their next progress report."""
+        self._cancelled = True
+        if self._cancel is not None:
+            self._cancel.set()
+
+    async def events(self, jobs: Sequence[Job]) -> AsyncIterator[SweepEvent]:
+        """Run the jobs and yield their events as they arrive.
+
+        Every job produces exactly one final event: ``done``, ``failed`` or
+        ``cancelled``.
+        """
+        jobs = list(jobs)
+        self._cancelled = False
+        scenario = fingerprint(self.build())
+        keys = [run_key(scenario, *job) for job in jobs]
+        completed = self.completed()
+        self._end_last_line()
+
+        pending: List[int] = []
+        for index, key in enumerate(keys):
+            metrics = completed.get(key)
+            if metrics is None and self.cache is not None:
+                metrics = self.cache.get(key)
+                if metrics is not None:
+                    self._record(key, index, metrics)
+            if metrics is not None:
+                yield SweepEvent('done', index, metrics, cached=True)
+            else:
+                pending.append(index)
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        limit = min(self.max_concurrency, len(pending))
+        with Manager() as manager, ProcessPoolExecutor(max_workers=limit) as pool:
+            reports = manager.Queue()
+            self._cancel = manager.Event()
+            if self._cancelled:
+                self._cancel.set()
+            semaphore = asyncio.Semaphore(limit)
+
+            async def submit(index: int) -> None:
+                async with semaphore:
+                    if self._cancel.is_set():
+                        reports.put(('cancelled', index, None, None))
+                        return
+                    try:
+                        await loop.run_in_executor(pool, _run_sweep_job, self.build, index, jobs[index],
+                                                   self.progress_interval, reports, self._cancel)
+                    except Exception as exc:
+                        reports.put(('failed', index, None, repr(exc)))
+
+            tasks = [asyncio.create_task(submit(index)) for index in pending]
+            remaining: Set[int] = set(pending)
+            try:
+                while remaining:
+                    try:
+                        kind, index, metrics, error = await loop.run_in_executor(None, reports.get, True, 0.1)
+                    except queue.Empty:
+                        continue
+                    if kind != 'progress':
+                        remaining.discard(index)
+                    if kind == 'done':
+                        self._record(keys[index], index, metrics)
+                        if self.cache is not None:
+                            self.cache.put(keys[index], metrics)
+                    yield SweepEvent(kind, index, metrics, error)
+            finally:
+                self._cancel.set()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._cancel = None
+
+    def _end_last_line(self) -> None:
+        # Make sure new records do not continue a line cut short earlier.
+        if self.results_path is None or not Path(self.results_path).exists():
+            return
+        with open(self.results_path, 'rb+') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+    def _record(self, key: str, index: int, metrics: Dict[str, Any]) -> None:
+        if self.results_path is None:
+            return
+        with open(self.results_path, 'a') as f:
+            f.write(json.dumps({'key': key, 'index': index, 'metrics': metrics}) + '\n')
+
+
+def run_sweep(build: Callable[[], 'Simulation'], jobs: Sequence[Job], config: Dict[str, Any] | None = None,
+              on_event: Optional[Callable[[SweepEvent], None]] = None) -> List[Optional[Dict[str, Any]]]:
+    """Run a sweep to completion from synchronous code.
+
+    Args:
+        build: Picklable callable returning a freshly built simulation
+        jobs: ``(plan, horizon, seed)`` tuples
+        config: ``SweepCoordinator`` configuration
+        on_event: Called with every event as it arrives
+
+    Returns:
+        The final metrics of each job, None for failed or cancelled jobs
+    """
+    coordinator = SweepCoordinator(build, config)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+
+    async def consume() -> None:
+        async for event in coordinator.events(jobs):
+            if event.kind == 'done':
+                results[event.index] = event.metrics
+            if on_event is not None:
+                on_event(event)
+
+    asyncio.run(consume())
+    return results
@@ -0,0 +1,181 @@
+import contextlib
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, TYPE_CHECKING
+from trafficSim.config import Configurable
+
+if TYPE_CHECKING:
+    from trafficSim.simulation import Simulation
+
+
+def _offer(target: 'queue.Queue[Any]', item: Any) -> None:
+    """Put without blocking, dropping the oldest item when the queue is full."""
+    while True:
+        try:
+            target.put_nowait(item)
+            return
+        except queue.Full:
+            with contextlib.suppress(queue.Empty):
+                target.get_nowait()
+
+
+class TelemetryServer(Configurable):
+    """Local HTTP endpoint with live metrics of a running simulation.
+
+    The server registers itself as an observer of the simulation. At most
+    once every ``sample_interval`` wall-clock seconds it takes a
+    ``Simulation.snapshot()``, adds the tick rate, and offers it to a bounded
+    queue, dropping the oldest snapshot when the queue is full. Everything
+    else happens on background threads, so a slow or stalled client never
+    holds up ``Simulation.update``.
+
+    Endpoints:
+        ``GET /metrics``: Latest snapshot as JSON
+        ``GET /stream``: Server-sent events, one JSON snapshot per event
+    """
+
+    def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
+        self.sim = sim
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.host = '127.0.0.1'
+        self.port = 8765
+        self.sample_interval = 1.0
+        self.queue_size = 64
+        self.client_queue_size = 16
+        self.keepalive = 15.0
+
+    def init_properties(self) -> None:
+        self.snapshots: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=self.queue_size)
+        self.latest: Optional[Dict[str, Any]] = None
+        self.clients: Set['queue.Queue[Optional[str]]'] = set()
+        self.lock = threading.Lock()
+        self.samples = 0
+        self._last_sample: Optional[float] = None
+        self._last_frame = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> 'TelemetryServer':
+        """Start serving and observing the simulation; returns self."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name='telemetry-http', daemon=True),
+            threading.Thread(target=self._dispatch, name='telemetry-dispatch', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.sim.observers.append(self.observe)
+        return self
+
+    def stop(self) -> None:
+        if self.observe in self.sim.observers:
+            self.sim.observers.remove(self.observe)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        _offer(self.snapshots, None)
+        with self.lock:
+            for client in self.clients:
+                _offer(client, None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self) -> 'TelemetryServer':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def observe(self, sim: 'Simulation') -> None:
+        """Simulation observer: sample a snapshot when one is due."""
+        now = time.monotonic()
+        if self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return
+        snapshot = sim.snapshot()
+        if self._last_sample is not None and now > self._last_sample:
+            snapshot['ticks_per_second'] = (sim.frame_count - self._last_frame) / (now - self._last_sample)
+        else:
+            snapshot['ticks_per_second'] = 0.0
+        self._last_sample = now
+        self._last_frame = sim.frame_count
+        self.samples += 1
+        _offer(self.snapshots, snapshot)
+
+    def _dispatch(self) -> None:
+        while True:
+            snapshot = self.snapshots.get()
+            if snapshot is None:
+                return
+            message = json.dumps(snapshot)
+            with self.lock:
+                self.latest = snapshot
+                for client in self.clients:
+                    _offer(client, message)
+
+    def _handler(self) -> type:
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path == '/metrics':
+                    self._send_metrics()
+                elif self.path == '/stream':
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _send_metrics(self) -> None:
+                with telemetry.lock:
+                    body = json.dumps(telemetry.latest or {}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self) -> None:
+                client: 'queue.Queue[Optional[str]]' = queue.Queue(maxsize=telemetry.client_queue_size)
+                with telemetry.lock:
+                    telemetry.clients.add(client)
+                    if telemetry.latest is not None:
+                        client.put_nowait(json.dumps(telemetry.latest))
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.end_headers()
+                    while True:
+                        try:
+                            message = client.get(timeout=telemetry.keepalive)
+                        except queue.Empty:
+                            self.wfile.write(b': keepalive\n\n')
+                            self.wfile.flush()
+                            continue
+                        if message is None:
+                            return
+                        self.wfile.write(f'data: {message}\n\n'.encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with telemetry.lock:
+                        telemetry.clients.discard(client)
+
+        return Handler
@@ -1,4 +1,5 @@
 import random
+import numpy as np
 from typing import List, Any, Dict, Tuple, Optional, TYPE_CHECKING
 from trafficSim.config import Configurable
 
@@ -8,6 +9,18 @@ if TYPE_CHECKING:
 
 
 class TrafficSignal(Configurable):
+    """Cycles groups of roads through the phases in ``cycle``.
+
+    Without ``splits`` every phase lasts ``cycle_length`` seconds, re-drawn
+    at random between ``cycle_length_min`` and ``cycle_length_max`` whenever
+    the clock lands on a phase boundary. With ``splits``
+    the signal runs a fixed-time plan: the full cycle lasts
+    ``cycle_length * len(cycle)`` seconds, phase ``i`` takes the fraction
+    ``splits[i] / sum(splits)`` of it, and the plan is shifted by ``offset``
+    seconds so neighbouring signals can be coordinated. Equal splits and a
+    zero offset give the same timing as the fixed phase length.
+    """
+
     def __init__(self, roads: List[List['Road']], config: Dict[str, Any] | None = None) -> None:
         self.roads = roads
         Configurable.__init__(self, config)
@@ -23,11 +36,16 @@ class TrafficSignal(Configurable):
         self.slow_distance = 50
         self.slow_factor = 0.4
         self.stop_distance = 12
-        self.cycle_length = 1
+        self.cycle_length: float = 1
+        self.cycle_length_min = 20
+        self.cycle_length_max = 40
+        self.splits: Optional[List[float]] = None
+        self.offset = 0.0
         self.current_cycle_index = 0
         self.last_t = 0
 
     def init_properties(self) -> None:
+        self.set_plan(self.cycle_length, self.splits, self.offset)
         for i in range(len(self.roads)):
             for road in self.roads[i]:
                 road.set_traffic_signal(self, i)
@@ -36,10 +54,63 @@ class TrafficSignal(Configurable):
     def current_cycle(self) -> Tuple[bool, bool, bool, bool]:
         return self.cycle[self.current_cycle_index]
 
+    def set_plan(self, cycle_length: float, splits: Optional[List[float]] = None, offset: float = 0.0) -> None:
+        """Switch to a fixed-time plan, or back to fixed phase lengths without ``splits``.
+
+        Raises:
+            ValueError: If the splits do not give a positive share to every phase
+        """
+        if splits is not None:
+            shares = np.asarray(splits, dtype=float)
+            if shares.shape != (len(self.cycle),) or np.any(shares <= 0):
+                raise ValueError(f"splits must hold one positive value for each of the {len(self.cycle)} phases")
+            self._phase_ends = np.cumsum(shares / shares.sum())
+            splits = [float(share) for share in shares]
+        self.cycle_length = cycle_length
+        self.splits = splits
+        self.offset = offset
+
+    def phase_at(self, t: float) -> int:
+        """Return the phase index of the fixed-time plan at time ``t``."""
+        period = self.cycle_length * len(self.cycle)
+        position = ((t - self.offset) % period) / period
+        return min(int(np.searchsorted(self._phase_ends, position, side='right')), len(self.cycle) - 1)
+
+    def phases(self, times: np.ndarray) -> np.ndarray:
+        """Return the phase index ``update`` gives at each of ``times``, without the random phase lengths."""
+        times = np.asarray(times, dtype=float)
+        if len(self.roads) < 4:
+            return np.full(times.shape, 3, dtype=int)
+        if self.splits is None:
+            return ((times // self.cycle_length) % 4).astype(int)
+        period = self.cycle_length * len(self.cycle)
+        position = ((times - self.offset) % period) / period
+        return np.minimum(np.searchsorted(self._phase_ends, position, side='right'), len(self.cycle) - 1)
+
+    def next_update(self, t: float) -> float:
+        """Return the time of the next phase change after an update at ``t``."""
+        if len(self.roads) < 4:
+            return float('inf')
+        if self.splits is None:
+            if t % self.cycle_length == 0:
+                # This tick used a randomly drawn phase length.
+                return t
+            return (t // self.cycle_length + 1) * self.cycle_length
+        period = self.cycle_length * len(self.cycle)
+        position = ((t - self.offset) % period) / period
+        phase = self.phase_at(t)
+        end = self._phase_ends[phase] if phase < len(self.cycle) - 1 else 1.0
+        return t + (float(end) - position) * period
+
     def update(self, sim: 'Simulation') -> None:
+        if self.splits is not None:
+            self.current_cycle_index = self.phase_at(sim.t)
+            if len(self.roads) < 4:
+                self.current_cycle_index = 3
+            return
         cycle_length = self.cycle_length
         if sim.t % cycle_length == 0:
-            cycle_length = random.randint(20, 40)
+            cycle_length = random.randint(self.cycle_length_min, self.cycle_length_max)
         k = (sim.t // cycle_length) % 4
         self.current_cycle_index = int(k)
         if len(self.roads) < 4:
@@ -22,21 +22,45 @@ VEHICLE_TYPE_PROBABILITIES = [0.3, 0.1, 0.1, 0.5]
 VEHICLE_TYPES = ["car", "truck", "bus", "motorcycle"]
 
 
+def idm_acceleration(v: np.ndarray, v_max: np.ndarray, a_max: np.ndarray, s0: np.ndarray,
+                     T: np.ndarray, sqrt_ab: np.ndarray, gap: np.ndarray, dv: np.ndarray) -> np.ndarray:
+    """Vectorized IDM acceleration, the same law as ``Vehicle.update``.
+
+    ``gap`` is the bumper-to-bumper distance to the leader (``inf`` without
+    one) and ``dv`` the approach rate, follower speed minus leader speed.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = (s0 + np.maximum(0, T * v + dv * v / sqrt_ab)) / gap
+    alpha = np.where(np.isinf(gap), 0.0, alpha)
+    acceleration: np.ndarray = a_max * (1 - (v / v_max) ** 2 - alpha ** 2)
+    return acceleration
+
+
 class Vehicle(Configurable):
     def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        self.reset(config)
+
+    def reset(self, config: Optional[Dict[str, Any]] = None) -> None:
+        """Initialize the vehicle afresh, as ``Vehicle(config)`` would; used to recycle vehicles."""
         self.set_defaults()
 
+        # The type sets the defaults; parameters given explicitly override it.
+        if config is not None and 'vehicle_type' in config:
+            self.vehicle_type = config['vehicle_type']
+        self._apply_vehicle_type_properties()
+
         if config is not None:
             for attr, val in config.items():
                 if hasattr(self, attr):
                     setattr(self, attr, val)
 
-        self._apply_vehicle_type_properties()
         self.init_properties()
 
     def apply_config(self, config: Dict[str, Any]) -> None:
+        if 'vehicle_type' in config:
+            self.vehicle_type = config['vehicle_type']
+            self._apply_vehicle_type_properties()
         Configurable.apply_config(self, config)
-        self._apply_vehicle_type_properties()
         self.init_properties()
 
     def _apply_vehicle_type_properties(self) -> None:
@@ -65,20 +89,25 @@ class Vehicle(Configurable):
         self.a_max = float(config["a_max"])
         self.b_max = float(config["b_max"])
 
-        self.path: List[int] = []
+        self.id = -1
+        self.slot = -1  # Row in an EnsembleSimulation's parameter table
+        self.path: List[int] | np.ndarray = []
+        self.route_id = -1
         self.current_road_index = 0
+        self.lane = 0
 
         self.x = 0.0
         self.v = float(self.v_max)
         self.a = 0.0
         self.stopped = False
         self.time_added = 0.0
+        self.time_entered = 0.0
 
     def init_properties(self) -> None:
         self.sqrt_ab: float = 2 * np.sqrt(float(self.a_max) * float(self.b_max))
         self._v_max: float = float(self.v_max)
 
-    def update(self, lead: Optional['Vehicle'], dt: float) -> None:
+    def update(self, lead: Optional['Vehicle'], dt: float, lead_offset: float = 0.0) -> None:
         delta_a = 2
 
         if self.v + self.a * dt < 0:
@@ -90,7 +119,7 @@ class Vehicle(Configurable):
 
         alpha = 0.0
         if lead:
-            delta_x = lead.x - self.x - lead.l
+            delta_x = lead.x + lead_offset - self.x - lead.l
             delta_v = self.v - lead.v
 
             alpha = (self.s0 + max(0, self.T * self.v + delta_v * self.v / self.sqrt_ab)) / delta_x
@@ -100,7 +129,21 @@ class Vehicle(Configurable):
         if self.stopped:
             self.a = -self.b_max * self.v / self.v_max
 
-    def stop(self) -> None:
+    def acceleration(self, lead: Optional['Vehicle'] = None, lead_offset: float = 0.0) -> float:
+        """Return the acceleration in the current state, by the law ``update`` applies."""
+        if self.stopped:
+            return -self.b_max * self.v / self.v_max
+        alpha = 0.0
+        if lead:
+            delta_x = lead.x + lead_offset - self.x - lead.l
+            delta_v = self.v - lead.v
+            alpha = (self.s0 + max(0, self.T * self.v + delta_v * self.v / self.sqrt_ab)) / delta_x
+        return self.a_max * (1 - (self.v / self.v_max) ** 2 - alpha ** 2)
+
+    def stop(self, brake: bool = False) -> None:
+        """Hold the vehicle; with ``brake`` it brakes from now rather than from its next update."""
+        if brake and not self.stopped:
+            self.a = min(self.a, -self.b_max * self.v / self.v_max)
         self.stopped = True
 
     def unstop(self) -> None:
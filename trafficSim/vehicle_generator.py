@@ -1,47 +1,396 @@
-from typing import Dict, List, Tuple, Any, TYPE_CHECKING
-from numpy.random import randint
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Any, TYPE_CHECKING
+from numpy.random import randint, random
 from trafficSim.vehicle import Vehicle
 from trafficSim.config import Configurable
+from trafficSim.config_loader import ConfigLoader
+from trafficSim.distributions import DISTRIBUTED_PARAMETERS, sample, validate_distribution
 
 if TYPE_CHECKING:
     from trafficSim.simulation import Simulation
 
+# Lower bounds of sampled parameters; the IDM divides by v_max and sqrt(a_max * b_max).
+PARAMETER_FLOORS: Dict[str, float] = {'s0': 0.0, 'T': 0.0, 'v_max': 0.1, 'a_max': 0.1, 'b_max': 0.1}
+
+
+class EntranceBacklog:
+    """Vehicles waiting to enter the network at one entrance road.
+
+    A ring buffer of arrival times and demand records (the index of the
+    vehicle config and of the OD route, -1 without OD), doubling when
+    full. Only the vehicle at the head is ever built, when it is first
+    tried, and kept until it fits on the road.
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.times = np.zeros(capacity)
+        self.choices = np.zeros(capacity, dtype=np.int32)
+        self.routes = np.zeros(capacity, dtype=np.int32)
+        self.head = 0
+        self.size = 0
+        self.vehicle: Optional[Vehicle] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, t: float, choice: int, route: int) -> None:
+        capacity = len(self.times)
+        if self.size == capacity:
+            order = (self.head + np.arange(capacity)) % capacity
+            self.times = np.concatenate([self.times[order], np.zeros(capacity)])
+            self.choices = np.concatenate([self.choices[order], np.zeros(capacity, dtype=np.int32)])
+            self.routes = np.concatenate([self.routes[order], np.zeros(capacity, dtype=np.int32)])
+            self.head = 0
+            capacity *= 2
+        k = (self.head + self.size) % capacity
+        self.times[k] = t
+        self.choices[k] = choice
+        self.routes[k] = route
+        self.size += 1
+
+    def peek(self) -> Tuple[float, int, int]:
+        k = self.head
+        return float(self.times[k]), int(self.choices[k]), int(self.routes[k])
+
+    def pop(self) -> None:
+        self.head = (self.head + 1) % len(self.times)
+        self.size -= 1
+        self.vehicle = None
+
+    def clear(self) -> Optional[Vehicle]:
+        """Empty the backlog and return the built head vehicle, if any."""
+        vehicle = self.vehicle
+        self.head = self.size = 0
+        self.vehicle = None
+        return vehicle
+
 
 class VehicleGenerator(Configurable):
+    """Spawns vehicles at the start of their routes at ``vehicle_rate`` per minute.
+
+    By default a vehicle that finds its entrance road full is thrown away.
+    With ``backlog`` every arrival is queued in the ``EntranceBacklog`` of
+    its entrance road instead and enters as soon as there is room, keeping
+    its arrival time as ``time_added``; ``waiting`` and ``entry_delay``
+    report the queues and the delay they caused.
+    """
+
     def __init__(self, sim: 'Simulation', config: Dict[str, Any] | None = None) -> None:
         self.sim = sim
         Configurable.__init__(self, config)
         self.init_properties()
 
     def set_defaults(self) -> None:
-        self.vehicle_rate = 20
+        self.vehicle_rate: float = 20
         self.vehicles: List[Tuple[int, Dict[str, Any]]] = [(1, {})]
+        self.od: List[Tuple[int, int, float]] = []
+        self.vehicle_types: Dict[str, Dict[str, Any]] = {}
+        self.sample_block = 256
+        self.backlog = False
         self.last_added_time: float = 0
 
     def init_properties(self) -> None:
-        self.upcoming_vehicle = self.generate_vehicle()
+        self.compile_routes()
+        self.compile_od()
+        self.compile_vehicle_types()
+        self.backlogs: Dict[int, EntranceBacklog] = {}
+        self.released = 0
+        self.delay_total = 0.0
+        self.upcoming_vehicle = None if self.backlog else self.generate_vehicle()
+
+    def compile_routes(self) -> None:
+        """Validate and intern the path of every vehicle config.
+
+        Each config with a ``path`` has it replaced by the shared route array
+        of the simulation's road graph and gains the matching ``route_id``.
+
+        Raises:
+            ValueError: If a path is not connected in the road network
+        """
+        compiled: List[Tuple[int, Dict[str, Any]]] = []
+        for weight, config in self.vehicles:
+            if 'path' in config:
+                graph = self.sim.road_graph
+                try:
+                    route_id = graph.intern_route(config['path'])
+                except ValueError as e:
+                    raise ValueError(f"Invalid vehicle path {list(config['path'])}: {e}") from None
+                config = {**config, 'path': graph.route(route_id), 'route_id': route_id}
+            compiled.append((weight, config))
+        self.vehicles = compiled
+
+    def compile_od(self) -> None:
+        """Resolve the origin-destination demand into shared shortest-path routes.
+
+        ``od`` lists ``(origin_road, destination_road, rate)`` triples with
+        rates in vehicles per minute. When given, the generator spawns at the
+        summed rate and draws the pair of each vehicle in proportion to its
+        rate; ``vehicles`` then only supplies the non-route attributes.
+        """
+        self._od_routes: List[Tuple[np.ndarray, int]] = []
+        if not self.od:
+            return
+
+        rates = np.array([float(rate) for _, _, rate in self.od])
+        if (rates < 0).any() or rates.sum() <= 0:
+            raise ValueError("OD rates must be non-negative with a positive total")
+
+        graph = self.sim.road_graph
+        route_ids = graph.shortest_routes((o, d) for o, d, _ in self.od)
+        self._od_routes = [(graph.route(route_id), route_id) for route_id in route_ids]
+        self._od_cumulative = np.cumsum(rates) / rates.sum()
+        self.vehicle_rate = float(rates.sum())
+
+    def compile_vehicle_types(self) -> None:
+        """Prepare the vehicle type table of the generator.
+
+        ``vehicle_types`` maps type names to their parameters in the format of
+        ``config/vehicles.yaml``: a ``probability`` plus ``length``,
+        ``height``, ``color`` and the IDM parameters. When given, every
+        vehicle draws its type from the table, unless its vehicle config names
+        one with ``vehicle_type``; parameters in the vehicle config override
+        the type's.
+
+        The IDM parameters ``s0``, ``T``, ``v_max``, ``a_max`` and ``b_max``
+        may also be distributions (see ``distributions.validate_distribution``),
+        giving every driver of the type their own value. Values are drawn
+        ``sample_block`` vehicles at a time with one numpy call per
+        parameter, so a spawn only takes the next row of the block.
 
-    def generate_vehicle(self) -> Vehicle:
+        Raises:
+            ValueError: If the probabilities are not positive, a distribution
+                is invalid, or a vehicle config names a type missing from the table
+        """
+        self._type_names: List[str] = []
+        self._type_configs: Dict[str, Dict[str, Any]] = {}
+        self._type_distributions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._type_samples: Dict[str, List[Dict[str, float]]] = {}
+        if not self.vehicle_types:
+            return
+
+        renamed = {'length': 'l', 'height': 'h'}
+        probabilities = []
+        for name, params in self.vehicle_types.items():
+            config: Dict[str, Any] = {'vehicle_type': name}
+            for key, value in params.items():
+                if key == 'probability':
+                    continue
+                if key == 'color':
+                    value = ConfigLoader.parse_color(value)
+                if key in DISTRIBUTED_PARAMETERS and isinstance(value, dict):
+                    try:
+                        self._type_distributions.setdefault(name, {})[key] = validate_distribution(value)
+                    except ValueError as e:
+                        raise ValueError(f"Vehicle type '{name}', {key}: {e}") from None
+                    continue
+                config[renamed.get(key, key)] = value
+            self._type_names.append(name)
+            self._type_configs[name] = config
+            probabilities.append(float(params.get('probability', 1.0)))
+
+        probabilities_array = np.array(probabilities)
+        if (probabilities_array < 0).any() or probabilities_array.sum() <= 0:
+            raise ValueError("Vehicle type probabilities must be non-negative with a positive total")
+        self._type_cumulative = np.cumsum(probabilities_array) / probabilities_array.sum()
+
+        for _, config in self.vehicles:
+            vehicle_type = config.get('vehicle_type')
+            if vehicle_type is not None and vehicle_type not in self._type_configs:
+                raise ValueError(f"Unknown vehicle type '{vehicle_type}'")
+
+    def _sample_parameters(self, name: str) -> Dict[str, float]:
+        """Return the next sampled parameters of a vehicle type, drawing a new block when used up."""
+        block = self._type_samples.get(name)
+        if not block:
+            distributions = self._type_distributions[name]
+            columns = [np.maximum(sample(spec, self.sample_block), PARAMETER_FLOORS[key]).tolist()
+                       for key, spec in distributions.items()]
+            block = [dict(zip(distributions, row, strict=True)) for row in zip(*columns, strict=True)]
+            block.reverse()
+            self._type_samples[name] = block
+        return block.pop()
+
+    def draw_demand(self) -> Tuple[int, int]:
+        """Draw the vehicle config and OD route (-1 without OD) of an arrival."""
         total = sum(pair[0] for pair in self.vehicles)
         r = randint(1, total + 1)
-        for weight, config in self.vehicles:
+        choice = len(self.vehicles) - 1
+        for i, (weight, _) in enumerate(self.vehicles):
             r -= weight
             if r <= 0:
-                return Vehicle(config)
-        return Vehicle({})
+                choice = i
+                break
+
+        route = -1
+        if self._od_routes:
+            k = int(np.searchsorted(self._od_cumulative, random(), side='right'))
+            route = min(k, len(self._od_routes) - 1)
+        return choice, route
+
+    def entrance(self, choice: int, route: int) -> int:
+        """Index of the first road of an arrival's route."""
+        if route >= 0:
+            return int(self._od_routes[route][0][0])
+        return int(self.vehicles[choice][1]['path'][0])
+
+    def route_rates(self) -> List[Tuple[np.ndarray, float]]:
+        """Return every route of the demand with its rate in vehicles per minute."""
+        if self._od_routes:
+            shares = np.diff(self._od_cumulative, prepend=0.0)
+            return [(path, float(self.vehicle_rate * share))
+                    for (path, _), share in zip(self._od_routes, shares, strict=True)]
+        total = sum(weight for weight, _ in self.vehicles)
+        return [(np.asarray(config['path']), self.vehicle_rate * weight / total)
+                for weight, config in self.vehicles if 'path' in config]
+
+    def generate_vehicle(self) -> Optional[Vehicle]:
+        return self.build_vehicle(*self.draw_demand())
+
+    def build_vehicle(self, choice: int, route: int) -> Optional[Vehicle]:
+        """Build the vehicle of a demand record, drawing its type and parameters.
+
+        Returns:
+            The vehicle, or None when the vehicle pool is full
+        """
+        chosen = self.vehicles[choice][1]
+        if route >= 0:
+            path, route_id = self._od_routes[route]
+            chosen = {**chosen, 'path': path, 'route_id': route_id}
+
+        if self._type_names:
+            name = chosen.get('vehicle_type')
+            if name is None:
+                k = int(np.searchsorted(self._type_cumulative, random(), side='right'))
+                name = self._type_names[min(k, len(self._type_names) - 1)]
+            if name in self._type_distributions:
+                chosen = {**self._type_configs[name], **self._sample_parameters(name), **chosen}
+            else:
+                chosen = {**self._type_configs[name], **chosen}
+        if self.sim.vehicle_pool is not None:
+            return self.sim.vehicle_pool.acquire(chosen)
+        return Vehicle(chosen)
+
+    def next_update(self, t: float) -> float:
+        """Return the time of the next arrival, or ``t`` while vehicles wait to enter."""
+        if self.backlog and any(self.backlogs.values()):
+            return t
+        return self.last_added_time + 60 / self.vehicle_rate
 
     def update(self) -> None:
-        if self.sim.t - self.last_added_time >= 60 / self.vehicle_rate:
-            road = self.sim.roads[self.upcoming_vehicle.path[0]]
-            if (len(road.vehicles) == 0 or
-                road.vehicles[-1].x > self.upcoming_vehicle.s0 + self.upcoming_vehicle.l):
-                self.upcoming_vehicle.time_added = self.sim.t
-                road.vehicles.append(self.upcoming_vehicle)
+        if self.backlog:
+            self.update_backlog()
+            return
+        interval = 60 / self.vehicle_rate
+        if self.sim.t - self.last_added_time < interval:
+            return
+        # One attempt per tick: a blocked entrance is retried in the next
+        # tick with a new upcoming vehicle.
+        while self.spawn():
+            if not self.sim.long_steps:
                 self.last_added_time = self.sim.t
+                return
+            # With long steps spawns are scheduled an interval apart rather
+            # than an interval after the tick that made them, so the rate
+            # does not depend on dt, and a tick longer than the interval
+            # releases several vehicles while there is room. A backlog is
+            # never carried across more than a tick.
+            self.last_added_time = max(self.last_added_time + interval, self.sim.t - self.sim.dt)
+            if self.sim.t - self.last_added_time < interval:
+                return
+
+    def spawn(self) -> bool:
+        """Place the upcoming vehicle at the start of its route if there is room.
+
+        The upcoming vehicle is replaced either way.
+
+        Returns:
+            Whether the vehicle entered the network
+        """
+        vehicle = self.upcoming_vehicle
+        if vehicle is None:
+            # The vehicle pool was full at the last attempt.
             self.upcoming_vehicle = self.generate_vehicle()
+            return False
+        road = self.sim.roads[vehicle.path[0]]
+        entered = road.has_room(vehicle)
+        if entered:
+            self.enter(vehicle, road)
+        elif self.sim.vehicle_pool is not None:
+            self.sim.vehicle_pool.release(vehicle)
+        self.upcoming_vehicle = self.generate_vehicle()
+        return entered
+
+    def update_backlog(self) -> None:
+        """Queue the arrivals due by now and let waiting vehicles enter where there is room."""
+        interval = 60 / self.vehicle_rate
+        while self.sim.t - self.last_added_time >= interval:
+            self.last_added_time += interval
+            choice, route = self.draw_demand()
+            road_index = self.entrance(choice, route)
+            backlog = self.backlogs.get(road_index)
+            if backlog is None:
+                backlog = self.backlogs[road_index] = EntranceBacklog()
+            backlog.push(self.last_added_time, choice, route)
+
+        for road_index, backlog in self.backlogs.items():
+            if not backlog:
+                continue
+            arrival, choice, route = backlog.peek()
+            if backlog.vehicle is None:
+                backlog.vehicle = self.build_vehicle(choice, route)
+                if backlog.vehicle is None:
+                    continue
+            vehicle = backlog.vehicle
+            road = self.sim.roads[road_index]
+            if not road.has_room(vehicle):
+                continue
+            backlog.pop()
+            self.enter(vehicle, road)
+            vehicle.time_added = arrival
+            self.released += 1
+            self.delay_total += self.sim.t - arrival
+
+    def enter(self, vehicle: Vehicle, road: Any) -> None:
+        """Place a vehicle at the start of a road and give it the next spawn id."""
+        if self.sim.long_steps:
+            # Start from the acceleration behind the tail; with long steps a
+            # vehicle entering at full speed would otherwise run into it
+            # before its first update brakes.
+            vehicle.a = vehicle.acceleration(road.vehicles[-1] if road.vehicles else None)
+        vehicle.id = self.sim.vehicles_spawned
+        self.sim.vehicles_spawned += 1
+        vehicle.time_added = self.sim.t
+        vehicle.time_entered = self.sim.t
+        road.admit(vehicle)
+        if self.sim.rerouter is not None:
+            self.sim.rerouter.enter(vehicle)
+
+    @property
+    def waiting(self) -> int:
+        """Vehicles queued at the entrances."""
+        return sum(len(backlog) for backlog in self.backlogs.values())
+
+    @property
+    def entry_delay(self) -> float:
+        """Mean time from arrival to entering the network of the vehicles released from the backlogs."""
+        return self.delay_total / self.released if self.released else 0.0
 
     def delete_all_vehicles(self) -> None:
+        pool = self.sim.vehicle_pool
         for road in self.sim.roads:
-            road.vehicles.clear()
+            for vehicle in road.clear():
+                if pool is not None:
+                    pool.release(vehicle)
+        for backlog in self.backlogs.values():
+            waiting = backlog.clear()
+            if waiting is not None and pool is not None:
+                pool.release(waiting)
+        if self.upcoming_vehicle is not None and pool is not None:
+            pool.release(self.upcoming_vehicle)
+        self.upcoming_vehicle = None if self.backlog else self.generate_vehicle()
+        if self.sim.rerouter is not None:
+            self.sim.rerouter.clear()
         self.last_added_time = 0
+        self.released = 0
+        self.delay_total = 0.0
 
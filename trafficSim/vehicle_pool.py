@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional
+from trafficSim.config import Configurable
+from trafficSim.vehicle import Vehicle
+
+
+class VehiclePool(Configurable):
+    """Recycles the vehicle objects of a simulation through a free list.
+
+    Vehicles that leave the network, and upcoming vehicles thrown away
+    because their entrance is blocked, are released to the pool, and the
+    generators take them back with ``acquire`` instead of allocating new
+    ones. A reused vehicle is reset exactly as a new one would be
+    initialized, so runs are identical with and without a pool.
+
+    ``preallocate`` vehicle objects are created up front. At most
+    ``capacity`` vehicles (including each generator's upcoming vehicle)
+    exist at once; beyond that ``acquire`` returns None and the generator
+    tries again on its next spawn. ``stats()`` reports the pool's counters.
+    """
+
+    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+        Configurable.__init__(self, config)
+        self.init_properties()
+
+    def set_defaults(self) -> None:
+        self.capacity = 100000
+        self.preallocate = 0
+
+    def init_properties(self) -> None:
+        if self.capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 <= self.preallocate <= self.capacity:
+            raise ValueError("preallocate must be between 0 and capacity")
+        # Bare objects: a vehicle is only initialized when it is acquired,
+        # which keeps the random draws of its initialization in spawn order.
+        self.free: List[Vehicle] = [Vehicle.__new__(Vehicle) for _ in range(self.preallocate)]
+        self._unused = self.preallocate
+        self.allocated = self.preallocate
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired = 0
+        self.reused = 0
+        self.released = 0
+        self.refused = 0
+
+    def acquire(self, config: Optional[Dict[str, Any]] = None) -> Optional[Vehicle]:
+        """Return an initialized vehicle, or None when ``capacity`` vehicles are in use."""
+        if self.free:
+            vehicle = self.free.pop()
+            # Unused preallocated objects sit below every released vehicle.
+            if len(self.free) < self._unused:
+                self._unused -= 1
+            else:
+                self.reused += 1
+        elif self.in_use < self.capacity:
+            vehicle = Vehicle.__new__(Vehicle)
+            self.allocated += 1
+        else:
+            self.refused += 1
+            return None
+        vehicle.reset(config)
+        self.acquired += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return vehicle
+
+    def release(self, vehicle: Vehicle) -> None:
+        """Return a vehicle that is no longer on any road to the free list."""
+        self.free.append(vehicle)
+        self.released += 1
+        self.in_use -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'capacity': self.capacity,
+            'allocated': self.allocated,
+            'in_use': self.in_use,
+            'free': len(self.free),
+            'peak_in_use': self.peak_in_use,
+            'acquired': self.acquired,
+            'reused': self.reused,
+            'released': self.released,
+            'refused': self.refused,
+        }
@@ -1,7 +1,9 @@
+import time
 import pygame
 from pygame import gfxdraw
 import numpy as np
 from typing import Any, Dict, Tuple, List, Optional, Callable, TYPE_CHECKING
+from trafficSim.frame_budget import FrameBudget
 
 if TYPE_CHECKING:
     from trafficSim.simulation import Simulation
@@ -28,6 +30,7 @@ class Window:
         self.mouse_last = (0, 0)
         self.mouse_down = False
         self.flip_x = True
+        self.budget: Optional[FrameBudget] = None
 
     def loop(self, loop: Optional[Callable[['Simulation'], None]] = None) -> None:
         self.screen = pygame.display.set_mode((self.width, self.height))
@@ -39,15 +42,27 @@ class Window:
         self.text_font = pygame.font.SysFont('Lucida Console', 16)
 
         running = True
+        last_frame = time.perf_counter()
         while running:
-            if loop:
+            start = time.perf_counter()
+            if self.budget is not None:
+                steps = self.budget.plan(self.sim.dt)
+                self.sim.run(steps)
+            elif loop:
                 loop(self.sim)
+            simulated = time.perf_counter()
 
             self.draw()
 
             pygame.display.update()
+            drawn = time.perf_counter()
             clock.tick(self.fps)
 
+            if self.budget is not None:
+                now = time.perf_counter()
+                self.budget.record(steps, self.sim.dt, simulated - start, drawn - simulated, now - last_frame)
+                last_frame = now
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -74,6 +89,16 @@ class Window:
             sim.run(steps_per_update)
         self.loop(loop)
 
+    def run_real_time(self, real_time_factor: float = 1.0, config: Dict[str, Any] | None = None) -> None:
+        """Run with the steps per frame and render detail chosen by a ``FrameBudget``.
+
+        Args:
+            real_time_factor: Simulated seconds per wall-clock second
+            config: Further ``FrameBudget`` configuration; its ``fps`` defaults to the window's
+        """
+        self.budget = FrameBudget({'fps': self.fps, 'real_time_factor': real_time_factor, **(config or {})})
+        self.loop()
+
     def convert(self, x: float | List[Tuple[float, float]] | Tuple[float, float], y: Optional[float] = None) -> Any:
         if isinstance(x, list):
             return [self.convert(e[0], e[1]) for e in x]
@@ -104,6 +129,15 @@ class Window:
 
     def draw_status(self) -> None:
         text_fps = self.text_font.render(f't={self.sim.t:.5}', False, (0, 0, 0))
+        if self.budget is not None:
+            text_real_time = self.text_font.render(
+                f'Real Time={self.budget.achieved_real_time_factor:.2f}x '
+                f'({self.budget.achieved_fps:.0f} fps, {self.budget.steps} steps)', False, (0, 0, 0))
+            if not self.budget.shows('status'):
+                self.screen.fill((255, 255, 255), (0, 0, 1400, 20))
+                self.screen.blit(text_fps, (0, 0))
+                self.screen.blit(text_real_time, (100, 0))
+                return
         text_frc = self.text_font.render(f'n={self.sim.frame_count}', False, (0, 0, 0))
         vehicles_passed = int(self.sim.vehicles_passed)
         text_vehicles_passed = self.text_font.render(f'Vehicles Passed={vehicles_passed}', False, (0, 0, 0))
@@ -121,6 +155,8 @@ class Window:
         self.screen.blit(text_average_vehicles_per_minute, (630, 0))
         self.screen.blit(text_total_vehicles, (0, 20))
         self.screen.blit(text_vehicle_rate, (200, 20))
+        if self.budget is not None:
+            self.screen.blit(text_real_time, (400, 20))
 
         if self.sim.is_paused:
             text_pause = self.text_font.render('Play', False, (0, 0, 0))
@@ -253,18 +289,18 @@ class Window:
                 color
             )
 
-    def draw_roads(self) -> None:
+    def draw_roads(self, arrows: bool = True) -> None:
         for road in self.sim.roads:
             self.rotated_box(
                 road.start,
-                (road.length, 3.7),
+                (road.length, road.width),
                 cos=road.angle_cos,
                 sin=road.angle_sin,
                 color=(180, 180, 220),
                 centered=False
             )
 
-            if road.length > 5:
+            if arrows and road.length > 5:
                 for i in np.arange(-0.5 * road.length, 0.5 * road.length, 10):
                     pos = (
                         road.start[0] + (road.length / 2 + i + 3) * road.angle_cos,
@@ -279,12 +315,6 @@ class Window:
                     )
 
     def draw_vehicle(self, vehicle: 'Vehicle', road: 'Road') -> None:
-        l, h = float(vehicle.l), float(vehicle.h)
-        sin, cos = road.angle_sin, road.angle_cos
-
-        x = road.start[0] + cos * vehicle.x
-        y = road.start[1] + sin * vehicle.x
-
         color: Tuple[int, int, int]
         if isinstance(vehicle.color, tuple):
             c = vehicle.color
@@ -292,7 +322,16 @@ class Window:
         else:
             color = (int(vehicle.color), int(vehicle.color), int(vehicle.color))
 
-        self.rotated_box((x, y), (l, h), cos=cos, sin=sin, color=color, centered=True)
+        self.draw_on_road(road, vehicle.x, road.lane_offset(vehicle), (float(vehicle.l), float(vehicle.h)), color)
+
+    def draw_on_road(self, road: 'Road', position: float, offset: float,
+                     size: Tuple[float, float], color: Tuple[int, int, int]) -> None:
+        """Draw a box centred ``position`` along a road and ``offset`` across it."""
+        sin, cos = road.angle_sin, road.angle_cos
+        x = road.start[0] + cos * position - sin * offset
+        y = road.start[1] + sin * position + cos * offset
+
+        self.rotated_box((x, y), size, cos=cos, sin=sin, color=color, centered=True)
 
     def draw_vehicles(self) -> None:
         for road in self.sim.roads:
@@ -319,11 +358,12 @@ class Window:
     def draw(self) -> None:
         self.background(*self.bg_color)
 
-        self.draw_grid(10, (220, 220, 220))
-        self.draw_grid(100, (200, 200, 200))
-        self.draw_axes()
+        if self.budget is None or self.budget.shows('grid'):
+            self.draw_grid(10, (220, 220, 220))
+            self.draw_grid(100, (200, 200, 200))
+            self.draw_axes()
 
-        self.draw_roads()
+        self.draw_roads(self.budget is None or self.budget.shows('arrows'))
         self.draw_vehicles()
         self.draw_signals()
 